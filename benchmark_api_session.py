@@ -0,0 +1,105 @@
+"""
+API连接池基准测试
+
+在本地启动一个模拟DeepSeek接口的HTTP服务，对比“每次调用新建连接”
+（requests.post）与共享连接池会话（call_api）在一批题目上的平均单次延迟。
+
+用法:
+    python benchmark_api_session.py --calls 50 --handshake-ms 30
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.utils import api_utils
+from src.utils.rate_limiter import rate_limiter
+from src.utils.response_cache import response_cache
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """模拟chat/completions接口的请求处理器"""
+    protocol_version = "HTTP/1.1"
+    handshake_delay = 0.0
+
+    def setup(self):
+        # 每个新连接只执行一次，用于模拟TCP+TLS握手的开销
+        time.sleep(self.handshake_delay)
+        super().setup()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps({
+            "choices": [{"message": {"content": "{\"title\": \"stub\"}"}}]
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_batch(call, calls: int) -> float:
+    """执行一批调用，返回平均单次延迟（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return (time.perf_counter() - start) * 1000 / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API连接池基准测试")
+    parser.add_argument("--calls", type=int, default=50, help="每组调用次数")
+    parser.add_argument("--handshake-ms", type=float, default=30.0,
+                        help="模拟的每连接握手延迟（毫秒）")
+    args = parser.parse_args()
+
+    StubHandler.handshake_delay = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    os.environ["DEEPSEEK_API_URL"] = url
+    os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+    # 只测量连接开销，关闭缓存和限流
+    response_cache.enabled = False
+    rate_limiter.requests_per_minute = 0
+    rate_limiter.tokens_per_minute = 0
+
+    payload = {"model": "deepseek-chat", "messages": [{"role": "user", "content": "ping"}]}
+
+    def unpooled_call():
+        response = requests.post(url, json=payload, timeout=10,
+                                 headers={"Connection": "close"})
+        response.raise_for_status()
+
+    def pooled_call():
+        api_utils.call_api("ping", max_retries=1)
+
+    try:
+        unpooled = run_batch(unpooled_call, args.calls)
+        pooled = run_batch(pooled_call, args.calls)
+    finally:
+        api_utils.session_manager.close()
+        server.shutdown()
+
+    print(f"调用次数: {args.calls}，模拟握手延迟: {args.handshake_ms:.1f} ms")
+    print(f"每次新建连接: {unpooled:.2f} ms/次")
+    print(f"共享连接池:   {pooled:.2f} ms/次")
+    if pooled > 0:
+        print(f"加速比: {unpooled / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+题面解析基准测试
+
+生成带有大量样例和长段落的题目描述，对比以下几种提取输入输出格式和样例的方式：
+    原正则方式    原先逐个 re.search / re.findall 的写法。其 (?=##\s+|$) 前瞻会停在第一个
+                  ###/#### 子标题处，因此在标准的多样例题面上只能回退到取第一组样例
+    修正正则方式  同样的正则链，但章节边界锚定到行首，能提取全部样例，输出与单次扫描一致
+    单次扫描      parse_markdown 解析一次后从文档对象中取出各部分
+    命中缓存      同一描述第二次提取（如分片生成测试数据时每个分片各构建一次提示）
+
+用法:
+    python benchmark_markdown_parser.py --samples 200 --paragraphs 400 --repeat 20
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.utils.markdown_doc import parse_markdown
+
+
+def build_statement(samples: int, paragraphs: int, seed: int) -> str:
+    """生成题目描述，结构与 process_description 的输出一致"""
+    rng = random.Random(seed)
+    words = ["给定", "一个", "长度为", "$n$", "的序列", "$a_i$", "，求", "满足条件的", "区间", "数量", "。"]
+    lines = ["# 基准题目", ""]
+    for _ in range(paragraphs):
+        lines.append("".join(rng.choice(words) for _ in range(40)))
+        lines.append("")
+    lines += ["## 输入格式", "", "第一行一个整数 $n$。", "", "## 输出格式", "", "输出一个整数。", "", "## 样例", ""]
+    for index in range(1, samples + 1):
+        numbers = " ".join(str(rng.randint(1, 10 ** 9)) for _ in range(50))
+        lines += [f"### 样例 {index}", "", "#### 输入", "```", numbers, "```", "",
+                  "#### 输出", "```", str(rng.randint(1, 10 ** 9)), "```", "",
+                  "#### 解释", "".join(rng.choice(words) for _ in range(20)), ""]
+    lines += ["## 提示", "", "$1 \\le n \\le 10^5$"]
+    return "\n".join(lines)
+
+
+def legacy_extract(description: str):
+    """原先的正则提取方式"""
+    input_format = output_format = samples = ""
+    input_match = re.search(r'##\s+输入格式\s*([\s\S]*?)(?=##\s+|$)', description)
+    if input_match:
+        input_format = input_match.group(1).strip()
+    output_match = re.search(r'##\s+输出格式\s*([\s\S]*?)(?=##\s+|$)', description)
+    if output_match:
+        output_format = output_match.group(1).strip()
+    samples_section = ""
+    samples_match = re.search(r'##\s+样例(?:\s*\d*)?(?:\s*\d)?\s*([\s\S]*?)(?=##\s+|$)', description)
+    if not samples_match:
+        samples_match = re.search(r'##\s+示例(?:\s*\d*)?(?:\s*\d)?\s*([\s\S]*?)(?=##\s+|$)', description)
+    if samples_match:
+        samples_section = samples_match.group(1).strip()
+    if samples_section:
+        input_blocks = re.findall(r'(?:###\s+样例\s+\d+\s*\n)?\s*####?\s+输入\s*\n```\s*([\s\S]*?)```', samples_section)
+        output_blocks = re.findall(r'####?\s+输出\s*\n```\s*([\s\S]*?)```', samples_section)
+        explanation_blocks = re.findall(r'####?\s+解释\s*\n([\s\S]*?)(?=####?\s+|$)', samples_section)
+        pairs = []
+        for i in range(min(len(input_blocks), len(output_blocks))):
+            pair = f"输入:\n{input_blocks[i].strip()}\n\n输出:\n{output_blocks[i].strip()}"
+            if i < len(explanation_blocks) and explanation_blocks[i].strip():
+                pair += f"\n\n解释:\n{explanation_blocks[i].strip()}"
+            pairs.append(pair)
+        samples = "\n\n".join(pairs)
+    if not samples:
+        basic_match = re.search(r'###\s+输入[\s\S]*?```([\s\S]*?)```[\s\S]*?###\s+输出[\s\S]*?```([\s\S]*?)```',
+                                description)
+        if basic_match:
+            samples = f"输入:\n{basic_match.group(1).strip()}\n\n输出:\n{basic_match.group(2).strip()}"
+    return input_format, output_format, samples
+
+
+def fixed_regex_extract(description: str):
+    """章节边界锚定到行首的正则链，输出与单次扫描相同"""
+    def section(pattern):
+        match = re.search(r'^##[ \t]+' + pattern + r'[^\n]*\n([\s\S]*?)(?=^##[ \t]|\Z)', description, re.M)
+        return match.group(1) if match else ""
+
+    input_format = section("输入格式").strip()
+    output_format = section("输出格式").strip()
+    samples_section = section("样例") or section("示例")
+    input_blocks = re.findall(r'^####?[ \t]+输入[^\n]*\n```[^\n]*\n([\s\S]*?)^```', samples_section, re.M)
+    output_blocks = re.findall(r'^####?[ \t]+输出[^\n]*\n```[^\n]*\n([\s\S]*?)^```', samples_section, re.M)
+    explanation_blocks = re.findall(r'^####?[ \t]+解释[^\n]*\n([\s\S]*?)(?=^#{2,4}[ \t]|\Z)', samples_section, re.M)
+    pairs = []
+    for i in range(min(len(input_blocks), len(output_blocks))):
+        pair = f"输入:\n{input_blocks[i].strip()}\n\n输出:\n{output_blocks[i].strip()}"
+        if i < len(explanation_blocks) and explanation_blocks[i].strip():
+            pair += f"\n\n解释:\n{explanation_blocks[i].strip()}"
+        pairs.append(pair)
+    return input_format, output_format, "\n\n".join(pairs)
+
+
+def document_extract(description: str, document=None):
+    """新的单次扫描提取方式，传入已解析的文档时直接复用"""
+    document = document or parse_markdown(description)
+    pairs = []
+    for sample in document.samples():
+        pair = f"输入:\n{sample.input_data}\n\n输出:\n{sample.output_data}"
+        if sample.explanation:
+            pair += f"\n\n解释:\n{sample.explanation}"
+        pairs.append(pair)
+    return document.section_text("input_format"), document.section_text("output_format"), "\n\n".join(pairs)
+
+
+def measure(function, repeat: int) -> float:
+    """返回单次调用的最短耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="题面解析基准测试")
+    parser.add_argument("--samples", type=int, default=200, help="样例数量")
+    parser.add_argument("--paragraphs", type=int, default=400, help="题目背景段落数量")
+    parser.add_argument("--repeat", type=int, default=20, help="每种方式重复次数，取最短耗时")
+    parser.add_argument("--seed", type=int, default=1, help="生成描述的随机种子")
+    args = parser.parse_args()
+
+    description = build_statement(args.samples, args.paragraphs, args.seed)
+    document = parse_markdown(description)
+    expected = document_extract(description)
+    assert fixed_regex_extract(description) == expected
+    print(f"描述长度 {len(description) / 1024:.1f} KB，{args.samples} 组样例")
+
+    methods = [
+        ("原正则方式", lambda: legacy_extract(description)),
+        ("修正正则方式", lambda: fixed_regex_extract(description)),
+        ("单次扫描", lambda: document_extract(description)),
+        ("命中缓存", lambda: document_extract(description, document)),
+    ]
+    baseline = None
+    print(f"{'提取方式':<12}{'样例数':>8}{'耗时(毫秒)':>12}{'相对修正正则':>14}")
+    for name, function in methods:
+        elapsed = measure(function, args.repeat)
+        found = function()[2].count("输入:")
+        if name == "修正正则方式":
+            baseline = elapsed
+        ratio = f"{baseline / elapsed:.1f}x" if baseline else "-"
+        print(f"{name:<12}{found:>8}{elapsed:>12.2f}{ratio:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+测试数据打包基准测试
+
+生成一批与真实测试数据相似的文本（空格分隔的整数、字符串），分别用不同的压缩方式
+和线程数整体打包，对比压缩后大小与耗时，并测量修改单个测试点后增量更新的耗时。
+
+用法:
+    python benchmark_zip_packager.py --size-mb 200 --cases 20
+    python benchmark_zip_packager.py --codecs stored deflate:1 deflate:6 lzma --workers 1 8
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.utils.zip_packager import ZipPackager
+
+
+def generate_cases(directory: str, size_mb: float, cases: int, seed: int) -> int:
+    """生成测试数据，返回总字节数"""
+    rng = random.Random(seed)
+    per_case = int(size_mb * 1024 * 1024 / cases)
+    total = 0
+    for index in range(1, cases + 1):
+        # 一半测试点是大整数序列，一半是短字符串，压缩率不同
+        with open(os.path.join(directory, f"{index:02d}.in"), "w") as f:
+            written = 0
+            while written < per_case:
+                if index % 2:
+                    line = " ".join(str(rng.randint(-10 ** 9, 10 ** 9)) for _ in range(16)) + "\n"
+                else:
+                    line = "".join(rng.choice("abcde") for _ in range(64)) + "\n"
+                f.write(line)
+                written += len(line)
+        with open(os.path.join(directory, f"{index:02d}.out"), "w") as f:
+            f.write(f"{rng.randint(0, 10 ** 18)}\n")
+        total += os.path.getsize(os.path.join(directory, f"{index:02d}.in"))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测试数据打包基准测试")
+    parser.add_argument("--size-mb", type=float, default=200, help="测试数据总大小（MB）")
+    parser.add_argument("--cases", type=int, default=20, help="测试点数量")
+    parser.add_argument("--codecs", nargs="+", default=["stored", "deflate:1", "deflate:6", "deflate:9", "bzip2", "lzma"],
+                        help="参与比较的压缩方式")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1],
+                        help="参与比较的线程数")
+    parser.add_argument("--seed", type=int, default=1, help="生成数据的随机种子")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="zip_benchmark_")
+    try:
+        source_dir = os.path.join(workdir, "test_cases")
+        os.makedirs(source_dir)
+        print(f"正在生成 {args.size_mb:.0f}MB 测试数据...")
+        total = generate_cases(source_dir, args.size_mb, args.cases, args.seed)
+
+        print(f"{'压缩方式':<12}{'线程数':>6}{'大小(MB)':>12}{'压缩率':>10}{'耗时(秒)':>12}{'速度(MB/s)':>12}{'增量(毫秒)':>12}")
+        for codec in args.codecs:
+            for workers in sorted(set(args.workers)):
+                zip_path = os.path.join(workdir, "bench.zip")
+                packager = ZipPackager(zip_path, source_dir, codec=codec, workers=workers)
+                started = time.perf_counter()
+                packager.rebuild()
+                elapsed = time.perf_counter() - started
+                size = os.path.getsize(zip_path)
+
+                # 修改一个测试点的输出，测量增量更新
+                with open(os.path.join(source_dir, "01.out"), "a") as f:
+                    f.write("0")
+                started = time.perf_counter()
+                packager.update()
+                incremental = time.perf_counter() - started
+
+                print(f"{packager.codec:<12}{workers:>6}{size / 1024 / 1024:>12.1f}{size / total:>10.1%}"
+                      f"{elapsed:>12.2f}{total / 1024 / 1024 / elapsed:>12.1f}{incremental * 1000:>12.1f}")
+                os.unlink(zip_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
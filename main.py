@@ -33,11 +33,28 @@ def parse_args():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description="洛谷出题工具")
     parser.add_argument("--no-gui", action="store_true", help="使用命令行模式而非GUI")
-    parser.add_argument("--description", type=str, help="题目描述（仅命令行模式）")
+    parser.add_argument("--description", type=str, action="append",
+                        help="题目描述（仅命令行模式），可重复指定以流水线方式批量生成多道题目")
     parser.add_argument("--theme", type=str, choices=["light", "dark"], default=None, 
                        help="设置界面主题 (light/dark)，默认为dark")
     parser.add_argument("--test-cases", type=int, default=10, 
                         help="生成的测试点数量，默认为10")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="跳过本地API响应缓存，强制重新请求")
+    parser.add_argument("--solution", type=str, choices=["cpp", "python"], default=None,
+                        help="让模型编写该语言的参考程序，在本地运行以计算测试点输出")
+    parser.add_argument("--generator-script", type=str, choices=["cpp", "python"], default=None,
+                        help="让模型编写该语言的数据生成器，在本地运行生成大规模测试输入（自动启用参考程序）")
+    parser.add_argument("--batch", type=str, metavar="MANIFEST",
+                        help="按JSONL/CSV清单批量生成题目（隐含--no-gui），再次运行时跳过已成功的条目")
+    parser.add_argument("--jobs", type=int, default=2,
+                        help="批量模式下每个阶段同时处理的题目数，默认为2")
+    parser.add_argument("--report", type=str, default=None,
+                        help="批量模式的报告文件，默认为<清单文件名>.report.json")
+    parser.add_argument("--zip-codec", type=str, default=None,
+                        help="测试数据压缩包的压缩方式: stored/deflate/deflate:0-9/bzip2/lzma，默认为stored")
+    parser.add_argument("--dedup", action="store_true",
+                        help="整理测试数据去重存储：将已有题目的测试数据纳入存储、清理无引用的数据，然后退出")
     return parser.parse_args()
 
 
@@ -51,56 +68,154 @@ def run_cli_mode(args):
     
     try:
         from src.generators.simple_generator import SimpleProblemGenerator
+        from src.generators.pipeline import PipelineJob, ProblemPipeline
+        from src.utils.api_utils import session_manager
+        from src.utils.response_cache import response_cache
         
         # 获取题目描述
-        description = args.description
-        if not description:
+        descriptions = [d.strip() for d in (args.description or []) if d.strip()]
+        if not descriptions:
             print("请输入题目描述:")
             description = input().strip()
+            if description:
+                descriptions.append(description)
             
-        if not description:
+        if not descriptions:
             print("错误: 题目描述不能为空")
             return 1
             
-        # 选择生成器
-        generator = SimpleProblemGenerator()
         print("使用简单生成器")
-            
-        # 设置生成器参数
-        generator.problem_description = description
         
         # 设置测试点数量
-        if args.test_cases > 0:
-            generator.test_cases_count = args.test_cases
-            print(f"将生成 {args.test_cases} 个测试点")
+        test_cases_count = args.test_cases
+        if test_cases_count > 0:
+            print(f"每道题目将生成 {test_cases_count} 个测试点")
         else:
             print("警告: 测试点数量必须大于0，使用默认值10")
-            generator.test_cases_count = 10
+            test_cases_count = 10
+            
+        # 每道题目使用独立的生成器
+        jobs = []
+        for index, description in enumerate(descriptions, 1):
+            generator = SimpleProblemGenerator()
+            generator.use_cache = not args.no_cache
+            generator.stream = True
+            if args.solution:
+                generator.use_reference_solution = True
+                generator.solution_language = args.solution
+            if args.generator_script:
+                generator.use_generator_script = True
+                generator.script_language = args.generator_script
+            jobs.append(PipelineJob(generator, description, test_cases_count=test_cases_count,
+                                    name=f"题目{index}"))
+        
+        def report(job, message):
+            prefix = f"[{job.name}] " if len(jobs) > 1 else ""
+            print(f"{prefix}{message}")
         
         try:
-            # 生成题目
-            print("正在格式化题目...")
-            problem_data = generator.format_problem()
+            result = ProblemPipeline(on_progress=report).run(jobs)
             
-            print(f"题目: {problem_data.get('title', '未命名题目')}")
-            print(f"难度: {problem_data.get('difficulty', 0)}/5")
+            for job in result.jobs:
+                if job.succeeded:
+                    print(f"[{job.name}] 生成了 {len(job.test_cases)} 个测试用例，"
+                          f"难度: {job.problem_data.get('difficulty', 0)}/5")
+                else:
+                    print(f"[{job.name}] 生成过程中出错: {job.error}")
+            print(result.summary())
             
-            # 生成测试数据
-            print("正在生成测试数据...")
-            test_cases = generator.generate_test_cases()
+            if not args.no_cache and response_cache.enabled:
+                stats = response_cache.stats()
+                print(f"响应缓存: 命中 {stats['hits']} 次，未命中 {stats['misses']} 次")
             
-            print(f"生成了 {len(test_cases)} 个测试用例")
-            print(f"文件保存在: {generator.current_problem_dir}")
-            
-            return 0
+            return 0 if not result.failed else 1
         except Exception as e:
             print(f"生成过程中出错: {str(e)}")
             return 1
+        finally:
+            session_manager.close()
     except Exception as e:
         print(f"初始化生成器失败: {str(e)}")
         return 1
 
 
+def run_batch_mode(args):
+    """运行批量模式，按清单生成多道题目"""
+    if not check_module('requests'):
+        print("错误: requests模块未安装，批量模式无法正常工作")
+        print("请安装: pip install requests")
+        return 1
+        
+    if not os.path.exists(args.batch):
+        print(f"错误: 清单文件不存在: {args.batch}")
+        return 1
+    
+    try:
+        from src.generators.batch import BatchReport, load_manifest, default_report_path
+        from src.generators.pipeline import ProblemPipeline
+        from src.utils.api_utils import session_manager
+        from src.utils.blob_store import blob_store
+        
+        default_test_cases = args.test_cases if args.test_cases > 0 else 10
+        entries = load_manifest(args.batch, default_test_cases)
+        report = BatchReport(args.report or default_report_path(args.batch))
+        
+        pending = []
+        skipped = 0
+        for entry in entries:
+            if entry.error:
+                print(f"[{entry.name}] 跳过无效条目: {entry.error}")
+                report.record_invalid(entry)
+            elif report.is_done(entry):
+                skipped += 1
+            else:
+                pending.append(entry)
+                
+        print(f"清单共 {len(entries)} 道题目，已完成 {skipped} 道，本次生成 {len(pending)} 道")
+        if not pending:
+            print(f"报告文件: {report.path}")
+            return 0 if all(not entry.error for entry in entries) else 1
+            
+        jobs = [entry.create_job(use_cache=not args.no_cache, solution=args.solution,
+                                 generator_script=args.generator_script) for entry in pending]
+        entry_by_job = {id(job): entry for job, entry in zip(jobs, pending)}
+        jobs_count = max(1, args.jobs)
+        
+        def report_done(job):
+            report.record_job(entry_by_job[id(job)], job)
+            if job.succeeded:
+                print(f"[{job.name}] 完成: {job.problem.directory}（{sum(job.timings.values()):.1f} 秒）")
+            else:
+                print(f"[{job.name}] 失败: {job.error}")
+        
+        pipeline = ProblemPipeline(
+            format_workers=jobs_count,
+            test_case_workers=jobs_count,
+            package_workers=max(1, jobs_count // 2),
+            on_progress=lambda job, message: print(f"[{job.name}] {message}"),
+            on_job_done=report_done
+        )
+        try:
+            result = pipeline.run(jobs)
+        finally:
+            session_manager.close()
+        report.record_run(result, skipped)
+        
+        print(result.summary())
+        print("各题目耗时（格式化/测试数据/打包，秒）:")
+        for job in result.jobs:
+            timings = "/".join(f"{job.timings.get(stage, 0):.1f}" for stage in ("format", "test_cases", "package"))
+            status = "成功" if job.succeeded else f"失败（{job.error}）"
+            print(f"  {job.name}: {timings} {status}")
+        print(f"报告文件: {report.path}")
+        print(blob_store.describe())
+        
+        return 0 if not result.failed and all(not entry.error for entry in entries) else 1
+    except Exception as e:
+        print(f"批量生成失败: {str(e)}")
+        return 1
+
+
 def run_gui_mode():
     """运行GUI模式"""
     # 检查PyQt6安装
@@ -159,6 +274,47 @@ def run_gui_mode():
         return 1
 
 
+def recover_interrupted_saves():
+    """恢复上次运行中被中断的题目保存"""
+    try:
+        from src.utils.journal import recover_all
+    except ImportError as e:
+        print(f"无法检查未完成的保存: {str(e)}")
+        return
+    
+    try:
+        recovered = recover_all("problems")
+    except OSError as e:
+        print(f"恢复未完成的保存失败: {str(e)}")
+        return
+    for directory, outcome in recovered.items():
+        action = "已完成提交" if outcome == "committed" else "已丢弃未提交的修改"
+        print(f"恢复中断的保存 {directory}: {action}")
+
+
+def run_dedup_maintenance():
+    """整理测试数据去重存储"""
+    try:
+        from src.utils.blob_store import blob_store
+    except ImportError as e:
+        print(f"无法加载去重存储: {str(e)}")
+        return 1
+    
+    if not blob_store.enabled:
+        print("测试数据去重已停用（DEDUP_STORE=0）")
+        return 1
+    try:
+        duplicates = blob_store.ingest_tree("problems")
+        removed, freed = blob_store.gc()
+    except OSError as e:
+        print(f"整理去重存储失败: {str(e)}")
+        return 1
+    print(f"已将 {duplicates} 个重复的测试数据文件改为共享存储")
+    print(f"清理无引用的数据块 {removed} 个，释放 {freed / 1024 / 1024:.1f} MB")
+    print(blob_store.describe())
+    return 0
+
+
 def create_needed_directories():
     """创建必要的目录结构"""
     needed_dirs = [
@@ -218,15 +374,26 @@ def main():
                     key, value = line.split('=', 1)
                     os.environ[key] = value
     
+    # 恢复上次被中断的保存（在加载环境变量之后，以使用其中的存储设置）
+    recover_interrupted_saves()
+    
     # 如果命令行指定了主题，则覆盖环境变量
     if args.theme:
         os.environ["THEME"] = args.theme
     
+    # 如果命令行指定了压缩方式，则覆盖环境变量
+    if args.zip_codec:
+        os.environ["ZIP_CODEC"] = args.zip_codec
+    
     # 检查环境需求
     check_requirements()
     
     # 根据不同模式运行程序
-    if args.no_gui:
+    if args.dedup:
+        return run_dedup_maintenance()
+    elif args.batch:
+        return run_batch_mode(args)
+    elif args.no_gui:
         return run_cli_mode(args)
     else:
         return run_gui_mode()
@@ -4,5 +4,9 @@
 from .base_generator import BaseProblemGenerator
 from .simple_generator import SimpleProblemGenerator
 from .advanced_generator import AdvancedProblemGenerator
+from .pipeline import PipelineJob, PipelineResult, ProblemPipeline
+from .batch import ManifestEntry, BatchReport, load_manifest
 
-__all__ = ['BaseProblemGenerator', 'SimpleProblemGenerator', 'AdvancedProblemGenerator'] 
\ No newline at end of file
+__all__ = ['BaseProblemGenerator', 'SimpleProblemGenerator', 'AdvancedProblemGenerator',
+           'PipelineJob', 'PipelineResult', 'ProblemPipeline',
+           'ManifestEntry', 'BatchReport', 'load_manifest'] 
\ No newline at end of file
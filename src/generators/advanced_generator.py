@@ -3,11 +3,9 @@
 """
 import os
 import json
-import re
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Tuple, Any, Optional
 
 from .base_generator import BaseProblemGenerator
-from ..utils.api_utils import call_api
 
 
 class AdvancedProblemGenerator(BaseProblemGenerator):
@@ -19,9 +17,9 @@ class AdvancedProblemGenerator(BaseProblemGenerator):
         self.subtask_count = 3  # 默认子任务数量
         self.test_cases_per_subtask = 3  # 每个子任务的默认测试点数量
         
-    def format_problem(self) -> Dict[str, Any]:
+    def build_format_prompt(self) -> str:
         """
-        格式化题目描述，生成完整的带子任务的题目
+        构建格式化带子任务题目的提示文本
         """
         if not self.problem_description:
             raise ValueError("题目描述不能为空")
@@ -85,82 +83,65 @@ class AdvancedProblemGenerator(BaseProblemGenerator):
 7. 子任务的分值总和为100分
 8. 整体风格应符合标准OI题目，如"数楼梯"、"选数"等经典题目的风格
 """
+        return prompt
         
-        try:
-            # 调用API获取完整题目
-            response = call_api(prompt)
-            
-            # 使用基类方法解析返回的JSON
-            problem_data = self.parse_api_response(response)
-            
-            # 确保必要字段存在
-            required_fields = ["title", "description", "difficulty", "subtasks"]
-            for field in required_fields:
-                if field not in problem_data:
-                    raise ValueError(f"生成的题目缺少必要字段: {field}")
-            
-            # 设置默认值
-            if "time_limit" not in problem_data:
-                problem_data["time_limit"] = 1000
-            if "memory_limit" not in problem_data:
-                problem_data["memory_limit"] = 256
-                
-            # 确保子任务字段存在并符合要求
-            subtasks = problem_data.get("subtasks", [])
-            if not subtasks or len(subtasks) < 1:
-                raise ValueError("生成的子任务为空")
-                
-            # 验证子任务分值总和是否为100
-            total_score = sum(subtask.get("score", 0) for subtask in subtasks)
-            if total_score != 100:
-                # 调整分值，确保总和为100
-                factor = 100 / total_score if total_score > 0 else 0
-                for subtask in subtasks:
-                    subtask["score"] = int(subtask.get("score", 0) * factor)
-                
-                # 处理剩余的误差
-                remainder = 100 - sum(subtask.get("score", 0) for subtask in subtasks)
-                if remainder != 0 and subtasks:
-                    subtasks[-1]["score"] += remainder
-            
-            # 使用基类方法处理描述，合并相关字段
-            description = self.process_description(problem_data)
-            
-            # 处理子任务描述
-            if "子任务" not in description:
-                description += "\n\n## 子任务\n"
-                for i, subtask in enumerate(subtasks, 1):
-                    st_desc = subtask.get("description", "")
-                    st_score = subtask.get("score", 0)
-                    description += f"\n{i}. 子任务 {i}（{st_score} 分）：{st_desc}"
-            
-            problem_data["description"] = description
-            problem_data["has_subtasks"] = True
-            
-            return problem_data
-            
-        except Exception as e:
-            raise RuntimeError(f"格式化题目失败: {str(e)}")
-            
-    def generate_test_cases(self) -> List[Tuple[str, str]]:
+    def process_format_response(self, response: str) -> Dict[str, Any]:
         """
-        生成带子任务的测试数据
-        返回(输入, 输出)元组的列表
+        解析格式化题目的API响应，校正子任务分值并补充子任务描述
+        """
+        # 使用基类方法解析返回的JSON
+        problem_data = self.parse_api_response(response)
+        
+        # 确保必要字段存在
+        required_fields = ["title", "description", "difficulty", "subtasks"]
+        for field in required_fields:
+            if field not in problem_data:
+                raise ValueError(f"生成的题目缺少必要字段: {field}")
+        
+        # 设置默认值
+        if "time_limit" not in problem_data:
+            problem_data["time_limit"] = 1000
+        if "memory_limit" not in problem_data:
+            problem_data["memory_limit"] = 256
+            
+        # 确保子任务字段存在并符合要求
+        subtasks = problem_data.get("subtasks", [])
+        if not subtasks or len(subtasks) < 1:
+            raise ValueError("生成的子任务为空")
+            
+        # 验证子任务分值总和是否为100
+        total_score = sum(subtask.get("score", 0) for subtask in subtasks)
+        if total_score != 100:
+            # 调整分值，确保总和为100
+            factor = 100 / total_score if total_score > 0 else 0
+            for subtask in subtasks:
+                subtask["score"] = int(subtask.get("score", 0) * factor)
+            
+            # 处理剩余的误差
+            remainder = 100 - sum(subtask.get("score", 0) for subtask in subtasks)
+            if remainder != 0 and subtasks:
+                subtasks[-1]["score"] += remainder
+        
+        # 使用基类方法处理描述，合并相关字段
+        description = self.process_description(problem_data)
+        
+        # 处理子任务描述
+        if "子任务" not in description:
+            description += "\n\n## 子任务\n"
+            for i, subtask in enumerate(subtasks, 1):
+                st_desc = subtask.get("description", "")
+                st_score = subtask.get("score", 0)
+                description += f"\n{i}. 子任务 {i}（{st_score} 分）：{st_desc}"
+        
+        problem_data["description"] = description
+        problem_data["has_subtasks"] = True
+        
+        return problem_data
+        
+    def build_test_cases_prompt(self, description: str) -> str:
+        """
+        构建生成带子任务测试数据的提示文本
         """
-        if not self.problem_name:
-            # 如果题目还没格式化，先格式化
-            problem_data = self.format_problem()
-            # 保存题目描述，这步会设置self.problem_name
-            self.save_problem_description(problem_data)
-            
-        # 获取题目描述文件中的内容
-        problem_file = os.path.join(self.current_problem_dir, f"{self.problem_name}.txt")
-        if not os.path.exists(problem_file):
-            raise ValueError(f"题目文件不存在: {problem_file}")
-            
-        with open(problem_file, "r", encoding="utf-8") as f:
-            description = f.read()
-            
         # 使用基类方法提取样例数据
         title, input_format, output_format, samples = self.extract_sample_data(description)
         
@@ -179,10 +160,7 @@ class AdvancedProblemGenerator(BaseProblemGenerator):
         self.test_cases_per_subtask = tests_per_subtask
         
         # 提取子任务描述
-        subtasks_match = re.search(r'## 子任务\s*([\s\S]*?)(?=## |$)', description)
-        subtasks_desc = ""
-        if subtasks_match:
-            subtasks_desc = subtasks_match.group(1).strip()
+        subtasks_desc = self.parse_description(description).section_text("subtasks")
         
         # 构建生成测试数据的提示
         prompt = f"""
@@ -236,37 +214,19 @@ class AdvancedProblemGenerator(BaseProblemGenerator):
 
 确保输入格式符合题目要求，输出是正确的解答。
 """
+        return prompt
         
-        try:
-            # 调用API获取测试数据
-            response = call_api(prompt)
-            
-            # 使用基类方法解析返回的JSON
-            test_data = self.parse_api_response(response)
-            
-            # 提取测试用例
-            test_cases = test_data.get("test_cases", [])
-            if not test_cases:
-                raise ValueError("API未返回有效的测试用例")
-                
-            # 转换为所需的格式
-            formatted_test_cases = []
-            for case in test_cases:
-                case_id = case.get("id", "")
-                input_data = case.get("input", "").strip()
-                output_data = case.get("output", "").strip()
-                
-                if not case_id or not input_data or not output_data:
-                    continue
-                    
-                # 保留原始ID格式作为子任务分组
-                formatted_test_cases.append((input_data, output_data))
-            
-            # 保存测试用例到文件
-            if formatted_test_cases:
-                self.save_test_cases(formatted_test_cases)
-                
-            return formatted_test_cases
+    def convert_test_case(self, case: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        将单个带子任务的测试用例对象转换为(输入, 输出)元组
+        """
+        case_id = case.get("id", "")
+        input_data = case.get("input", "").strip()
+        output_data = case.get("output", "").strip()
+        
+        # 参考程序模式下输出由本地计算，可以为空
+        if not case_id or not input_data or not (output_data or self.use_reference_solution):
+            return None
             
-        except Exception as e:
-            raise RuntimeError(f"生成测试数据失败: {str(e)}") 
\ No newline at end of file
+        # 保留原始ID格式作为子任务分组
+        return (input_data, output_data)
@@ -2,13 +2,234 @@
 基础题目生成器类，定义生成器接口
 """
 import os
+import sys
 import json
 import re
-import zipfile
+import shutil
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Callable
 
-from ..utils.api_utils import call_api
+from ..utils.api_utils import call_api, acall_api, discard_cached_response
+from ..utils.json_stream import JsonArrayStreamParser
+from ..utils.markdown_doc import MarkdownDocument, parse_markdown
+from ..utils.solution_runner import SolutionRunner, normalize_language
+from ..utils.stream_writer import BatchWriter, TextSource, fsync_paths, normalize_file
+from ..utils.blob_store import blob_store
+from ..utils.zip_packager import package_test_cases
+from ..utils.journal import SaveTransaction
+from ..models.problem import TestCase
+from ..models.problem_index import get_problem_index
+
+
+# process_description 使用的格式化规则，模块加载时编译一次
+DOLLAR_BEFORE_PATTERN = re.compile(r'(?<!\s)\$')
+DOLLAR_AFTER_PATTERN = re.compile(r'\$(?!\s)')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+LIST_ITEM_PATTERN = re.compile(r'(\n\d+\..*?)(\n\d+\.)')
+
+# 参考程序模式下追加到测试数据提示末尾的说明，模型只需生成输入
+INPUT_ONLY_NOTE = """
+注意：本次只需要提供每个测试用例的 input 字段，output 字段请填写空字符串 ""，
+输出将由参考程序在本地运行计算。
+"""
+
+# 数据生成器模式下追加到测试数据提示末尾的说明，大规模数据由本地运行的生成器产生
+SCRIPT_NOTE = """
+注意：接近数据范围上限的大规模测试数据将由数据生成器程序另外生成，
+本次只需要生成规模较小、便于人工检查的测试数据。
+"""
+
+
+# 分片模式下各分片测试数据的暂存目录（位于题目目录下），完成的分片在出错重试时复用
+SHARDS_DIR_NAME = ".shards"
+SHARD_DONE_NAME = ".done"
+
+
+class ShardStaging:
+    """
+    一个测试数据分片的暂存目录
+    
+    分片的测试用例在收到时立即写入 <题目目录>/.shards/<提示哈希>/，
+    响应解析成功后写入完成标记。其他分片失败导致本次生成中断时，已完成的分片保留在磁盘上，
+    下次以相同提示生成时直接读取，不再请求API。
+    """
+    
+    def __init__(self, root: str, prompt: str):
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:16]
+        self.directory = os.path.join(root, digest)
+        self.count = 0
+        self.batch = BatchWriter(store=blob_store)
+        
+    def completed(self) -> Optional[List[Tuple[str, str]]]:
+        """
+        返回上一次已完成的分片的测试用例，分片未完成时返回None
+        """
+        marker = os.path.join(self.directory, SHARD_DONE_NAME)
+        try:
+            with open(marker, "r", encoding="utf-8") as f:
+                count = int(f.read().strip() or 0)
+            cases = []
+            for i in range(1, count + 1):
+                input_file, output_file = TestCase.file_paths(self.directory, str(i))
+                with open(input_file, "r", encoding="utf-8") as f:
+                    input_data = f.read()
+                with open(output_file, "r", encoding="utf-8") as f:
+                    cases.append((input_data, f.read()))
+            return cases
+        except (OSError, ValueError):
+            return None
+        
+    def reset(self) -> None:
+        """清空暂存目录，重新接收分片"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+        self.count = 0
+        
+    def write(self, input_data: str, output_data: str) -> None:
+        """写入一个收到的测试用例"""
+        self.count += 1
+        input_file, output_file = TestCase.file_paths(self.directory, str(self.count))
+        self.batch.write(input_file, input_data)
+        self.batch.write(output_file, output_data)
+        
+    def finish(self, cases: List[Tuple[str, str]]) -> None:
+        """
+        分片响应解析成功后调用：以解析结果为准写出全部测试用例并同步，最后写入完成标记
+        """
+        if self.count != len(cases):
+            # 流式接收的内容与最终解析结果不一致（如命中缓存时未经流式回调），以解析结果为准
+            self.reset()
+            for input_data, output_data in cases:
+                self.write(input_data, output_data)
+        self.batch.commit()
+        marker = os.path.join(self.directory, SHARD_DONE_NAME)
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write(str(self.count))
+        fsync_paths([marker])
+
+
+class TestCaseStreamWriter:
+    """
+    流式测试数据写入器
+    
+    作为 call_api 的 on_delta 回调使用：每当响应中的一个 test_cases[i] 对象闭合，
+    就立即转换并写入磁盘，再通知调用方，无需等待整个回复生成完毕。
+    
+    分片并发生成时，每个分片请求通过 channel() 取得各自独立解析的回调，
+    编号和通知在所有分片间共享；此时 save 为False，每个分片的测试用例收到时写入各自的
+    暂存目录（见 ShardStaging），合并去重后再统一按稳定顺序写入测试数据目录。
+    
+    写入的文件位于保存事务的暂存目录中，commit 时才替换测试数据目录中的文件；
+    合并去重后数量变化时调用 discard 丢弃，改由 save_test_cases 重新保存。
+    """
+    
+    def __init__(self, generator: "BaseProblemGenerator",
+                 on_test_case: Optional[Callable[[int, str, str], None]] = None,
+                 save: bool = True):
+        self.generator = generator
+        self.on_test_case = on_test_case
+        self.save = save
+        self.parser = JsonArrayStreamParser("test_cases")
+        self.saved = 0  # 已写入磁盘的测试用例数量
+        self.received = 0  # 已收到的测试用例数量
+        self.txn: Optional[SaveTransaction] = None  # 收到第一个测试用例时开始
+        self._lock = threading.Lock()
+        
+    def __call__(self, text: str) -> None:
+        self._accept(self.parser.feed(text))
+        
+    def channel(self, shard: Optional[ShardStaging] = None) -> Callable[[str], None]:
+        """
+        为一个并发请求创建独立的 on_delta 回调
+        
+        参数:
+            shard: 分片模式下该请求的暂存目录，收到的测试用例写入其中
+        """
+        parser = JsonArrayStreamParser("test_cases")
+        return lambda text: self._accept(parser.feed(text), shard)
+        
+    def shard(self, prompt: str) -> Optional[ShardStaging]:
+        """
+        返回分片请求的暂存目录，不分片（save为True）时返回None
+        """
+        if self.save:
+            return None
+        return ShardStaging(os.path.join(self.generator.problem_dir_for_test_cases(), SHARDS_DIR_NAME), prompt)
+        
+    def resume(self, shard: ShardStaging) -> Optional[List[Tuple[str, str]]]:
+        """
+        读取上一次已完成的分片并逐个通知 on_test_case；分片未完成时清空其暂存目录并返回None
+        """
+        cases = shard.completed()
+        if cases is None:
+            shard.reset()
+            return None
+        for input_data, output_data in cases:
+            with self._lock:
+                self.received += 1
+                index = self.received
+            if self.on_test_case:
+                self.on_test_case(index, input_data, output_data)
+        return cases
+        
+    def clear_shards(self) -> None:
+        """
+        测试数据保存完成后删除全部分片暂存目录
+        """
+        shutil.rmtree(os.path.join(self.generator.problem_dir_for_test_cases(), SHARDS_DIR_NAME),
+                      ignore_errors=True)
+        
+    def commit(self) -> None:
+        """
+        提交已写入的测试数据，同时删除上一次生成留下的编号更大的测试点文件
+        """
+        with self._lock:
+            if self.txn is None:
+                return
+            txn, self.txn = self.txn, None
+            try:
+                for path in self.generator.stale_test_case_files(self.saved):
+                    txn.remove(path)
+                txn.commit()
+            except BaseException:
+                txn.__exit__(*sys.exc_info())
+                raise
+            txn.close()
+            
+    def discard(self) -> None:
+        """
+        丢弃已写入暂存目录的测试数据，测试数据目录保持不变
+        """
+        with self._lock:
+            if self.txn is not None:
+                txn, self.txn = self.txn, None
+                txn.rollback()
+        
+    def _accept(self, cases: List[Dict[str, Any]], shard: Optional[ShardStaging] = None) -> None:
+        for case in cases:
+            converted = self.generator.convert_test_case(case)
+            if not converted:
+                continue
+            input_data, output_data = converted
+            with self._lock:
+                self.received += 1
+                index = self.received
+                if self.save:
+                    if self.txn is None:
+                        self.txn = SaveTransaction(self.generator.problem_dir_for_test_cases())
+                        self.txn.begin()
+                    self.saved += 1
+                    self.generator.save_test_case(self.saved, input_data, output_data, self.txn)
+            if shard is not None:
+                # 每个分片只由一个请求线程写入，无需持有共享锁
+                shard.write(input_data, output_data)
+            if self.on_test_case:
+                self.on_test_case(index, input_data, output_data)
 
 
 class BaseProblemGenerator(ABC):
@@ -20,12 +241,29 @@ class BaseProblemGenerator(ABC):
         self.test_cases_dir = ""
         self.problem_name = ""
         self.test_cases_count = 10  # 默认测试点数量
+        self.use_cache = True  # 是否使用本地API响应缓存
+        self.stream = False  # 是否以流式方式接收测试数据，边生成边写入
+        self.parallel_shards = True  # 是否将测试数据拆分为多个分片并发请求
+        self.use_reference_solution = False  # 是否由模型编写参考程序，在本地运行计算输出
+        self.solution_language = "cpp"  # 参考程序语言: cpp / python
+        self.use_generator_script = False  # 是否由模型编写数据生成器，在本地运行生成大规模输入
+        self.script_language = "cpp"  # 数据生成器语言: cpp / python
+        self.script_seed = 1  # 数据生成器的随机种子基数，第i个测试点使用 script_seed + i
+        self.script_time_limit = 10000  # 数据生成器单次运行的时间限制(毫秒)
+        self.unique_problem_dir = False  # 是否总是新建题目目录，标题与已有题目相同时加编号后缀
+        self._parsed_description = None  # (描述, MarkdownDocument)，见 parse_description
         
     @abstractmethod
-    def format_problem(self) -> Dict[str, Any]:
+    def build_format_prompt(self) -> str:
         """
-        格式化题目描述，生成完整的题目
-        返回包含题目信息的字典，至少应包含:
+        构建格式化题目的提示文本
+        """
+        pass
+        
+    @abstractmethod
+    def process_format_response(self, response: str) -> Dict[str, Any]:
+        """
+        解析格式化题目的API响应，返回包含题目信息的字典，至少应包含:
         {
             "title": "题目标题",
             "description": "完整的题目描述",
@@ -37,12 +275,492 @@ class BaseProblemGenerator(ABC):
         pass
         
     @abstractmethod
-    def generate_test_cases(self) -> List[Tuple[str, str]]:
+    def build_test_cases_prompt(self, description: str) -> str:
         """
-        生成测试数据
-        返回(输入, 输出)元组的列表
+        根据已保存的题目描述构建生成测试数据的提示文本
         """
         pass
+        
+    @abstractmethod
+    def convert_test_case(self, case: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        将API返回的单个测试用例对象转换为(输入, 输出)元组
+        无效的测试用例返回None
+        """
+        pass
+        
+    def build_test_cases_prompts(self, description: str) -> List[str]:
+        """
+        构建生成测试数据的全部提示文本，每个提示对应一个并发请求的分片
+        默认不分片，只返回 build_test_cases_prompt 的结果
+        """
+        return [self.build_test_cases_prompt(description)]
+        
+    def merge_test_cases(self, shards: List[List[Tuple[str, str]]]) -> List[Tuple[str, str]]:
+        """
+        按分片顺序合并测试用例，输入相同的测试用例只保留第一个
+        """
+        merged = []
+        seen = set()
+        for shard in shards:
+            for input_data, output_data in shard:
+                if input_data in seen:
+                    continue
+                seen.add(input_data)
+                merged.append((input_data, output_data))
+        duplicates = sum(len(shard) for shard in shards) - len(merged)
+        if duplicates:
+            print(f"合并分片时去除了 {duplicates} 个重复的测试用例")
+        return merged
+        
+    def process_test_cases_response(self, response: str) -> List[Tuple[str, str]]:
+        """
+        解析测试数据的API响应
+        返回(输入, 输出)元组的列表
+        """
+        # 解析返回的JSON
+        test_data = self.parse_api_response(response)
+        
+        # 提取测试用例
+        test_cases = test_data.get("test_cases", [])
+        if not test_cases:
+            raise ValueError("API未返回有效的测试用例")
+            
+        # 转换为所需的格式
+        formatted_test_cases = []
+        for case in test_cases:
+            converted = self.convert_test_case(case)
+            if converted:
+                formatted_test_cases.append(converted)
+                
+        return formatted_test_cases
+        
+    def format_problem(self) -> Dict[str, Any]:
+        """
+        格式化题目描述，生成完整的题目
+        """
+        prompt = self.build_format_prompt()
+        try:
+            response = call_api(prompt, use_cache=self.use_cache)
+            return self.process_format_response(response)
+        except Exception as e:
+            discard_cached_response(prompt)
+            raise RuntimeError(f"格式化题目失败: {str(e)}")
+            
+    async def aformat_problem(self) -> Dict[str, Any]:
+        """
+        format_problem 的异步版本，可与其他题目在同一事件循环上并发执行
+        """
+        prompt = self.build_format_prompt()
+        try:
+            response = await acall_api(prompt, use_cache=self.use_cache)
+            return self.process_format_response(response)
+        except Exception as e:
+            discard_cached_response(prompt)
+            raise RuntimeError(f"格式化题目失败: {str(e)}")
+        
+    def generate_test_cases(self, on_test_case: Optional[Callable[[int, str, str], None]] = None) -> List[TestCase]:
+        """
+        生成测试数据并保存到测试数据目录
+        返回基于已保存文件、延迟加载的测试用例列表，数据不会读入内存
+        
+        有多个分片时各分片请求并发执行，总耗时取决于最慢的分片；
+        参考程序模式下参考程序与测试输入同时请求，输出在本地运行参考程序得到；
+        数据生成器模式下大规模测试点的输入由本地运行的生成器写出，排在其他测试点之后
+        
+        参数:
+            on_test_case: 流式模式（self.stream为True）下，每收到一个测试用例时
+                以 (编号, 输入, 输出) 调用的回调；不分片时在写入磁盘后调用
+        """
+        if not self.problem_name:
+            # 如果题目还没格式化，先格式化
+            problem_data = self.format_problem()
+            # 保存题目描述，这步会设置self.problem_name
+            self.save_problem_description(problem_data)
+            
+        script_count = self.prepare_generator_script()
+        description = self.read_problem_file()
+        prompts = self.build_all_test_cases_prompts(description)
+        writer = TestCaseStreamWriter(self, on_test_case, save=len(prompts) == 1) if self.stream else None
+        try:
+            with ThreadPoolExecutor(max_workers=len(prompts) + 2) as pool:
+                solution_future = (pool.submit(self._fetch_solution, description)
+                                   if self.use_reference_solution else None)
+                script_future = (pool.submit(self._fetch_generator_script, description, script_count)
+                                 if script_count else None)
+                futures = [pool.submit(self._fetch_test_cases, prompt, writer) for prompt in prompts]
+                shards = [future.result() for future in futures]
+                solution = solution_future.result() if solution_future else None
+                script = script_future.result() if script_future else None
+            test_cases = self.merge_test_cases(shards)
+            # 流式模式下已逐个写入的测试用例直接提交，去重后数量变化时丢弃并重新保存
+            if writer is not None and test_cases and writer.saved == len(test_cases):
+                writer.commit()
+            else:
+                if writer is not None:
+                    writer.discard()
+                if test_cases:
+                    self.save_test_cases(test_cases)
+            if writer is not None and not writer.save:
+                # 合并结果已保存，分片暂存目录不再需要；出错时保留以便重试时复用已完成的分片
+                writer.clear_shards()
+            count = len(test_cases)
+            if script:
+                count += len(self.run_generator_script(script, count + 1, script_count))
+            if solution:
+                return self.run_reference_solution(solution, count)
+            return self.saved_test_cases(count)
+        except Exception as e:
+            if writer is not None:
+                writer.discard()
+            raise RuntimeError(f"生成测试数据失败: {str(e)}")
+            
+    async def agenerate_test_cases(self, on_test_case: Optional[Callable[[int, str, str], None]] = None) -> List[TestCase]:
+        """
+        generate_test_cases 的异步版本，文件读写放到线程中执行以免阻塞事件循环
+        流式模式下 on_test_case 在执行请求的后台线程中被调用
+        """
+        if not self.problem_name:
+            problem_data = await self.aformat_problem()
+            await asyncio.to_thread(self.save_problem_description, problem_data)
+            
+        script_count = self.prepare_generator_script()
+        description = await asyncio.to_thread(self.read_problem_file)
+        prompts = self.build_all_test_cases_prompts(description)
+        writer = TestCaseStreamWriter(self, on_test_case, save=len(prompts) == 1) if self.stream else None
+        try:
+            calls = [self._afetch_test_cases(prompt, writer) for prompt in prompts]
+            if self.use_reference_solution:
+                calls.append(self._afetch_solution(description))
+            if script_count:
+                calls.append(self._afetch_generator_script(description, script_count))
+            results = await asyncio.gather(*calls)
+            script = results.pop() if script_count else None
+            solution = results.pop() if self.use_reference_solution else None
+            test_cases = self.merge_test_cases(list(results))
+            if writer is not None and test_cases and writer.saved == len(test_cases):
+                await asyncio.to_thread(writer.commit)
+            else:
+                if writer is not None:
+                    await asyncio.to_thread(writer.discard)
+                if test_cases:
+                    await asyncio.to_thread(self.save_test_cases, test_cases)
+            if writer is not None and not writer.save:
+                await asyncio.to_thread(writer.clear_shards)
+            count = len(test_cases)
+            if script:
+                count += len(await asyncio.to_thread(self.run_generator_script, script, count + 1, script_count))
+            if solution:
+                return await asyncio.to_thread(self.run_reference_solution, solution, count)
+            return self.saved_test_cases(count)
+        except Exception as e:
+            if writer is not None:
+                await asyncio.to_thread(writer.discard)
+            raise RuntimeError(f"生成测试数据失败: {str(e)}")
+            
+    def script_test_cases_count(self) -> int:
+        """
+        数据生成器模式下由生成器产生的测试点数量，其余测试点仍由模型直接给出
+        返回0表示该生成器不支持数据生成器模式，子类按需覆盖
+        """
+        return 0
+        
+    def prepare_generator_script(self) -> int:
+        """
+        检查数据生成器模式的设置，返回由生成器产生的测试点数量
+        生成器只产生输入，因此该模式总是同时启用参考程序
+        """
+        if not self.use_generator_script:
+            return 0
+        script_count = self.script_test_cases_count()
+        if script_count <= 0:
+            raise ValueError("当前生成器不支持数据生成器模式")
+        self.use_reference_solution = True
+        return script_count
+        
+    def build_all_test_cases_prompts(self, description: str) -> List[str]:
+        """
+        返回实际发送的测试数据提示，参考程序模式下要求模型只生成输入，
+        数据生成器模式下要求模型只生成小规模数据
+        """
+        prompts = self.build_test_cases_prompts(description)
+        if self.use_generator_script:
+            prompts = [prompt + SCRIPT_NOTE for prompt in prompts]
+        if self.use_reference_solution:
+            prompts = [prompt + INPUT_ONLY_NOTE for prompt in prompts]
+        return prompts
+        
+    def build_solution_prompt(self, description: str) -> str:
+        """
+        构建请求参考程序的提示文本
+        """
+        language = normalize_language(self.solution_language)
+        language_name = "C++17" if language == "cpp" else "Python 3"
+        return f"""
+请为以下算法题目编写一份正确且高效的{language_name}参考程序。
+
+题目描述:
+{description}
+
+要求：
+1. 从标准输入读取数据，向标准输出输出结果，严格遵守题目的输入输出格式
+2. 程序必须正确处理题目数据范围内的所有输入，包括边界情况
+3. 时间复杂度和空间复杂度要能在题目的时间和内存限制内通过最大规模的数据
+4. 不要输出任何提示信息或调试信息
+
+请按照以下JSON格式返回结果:
+{{
+    "language": "{language}",
+    "code": "完整的参考程序源代码"
+}}
+"""
+        
+    def process_solution_response(self, response: str, default_language: Optional[str] = None) -> Tuple[str, str]:
+        """
+        解析参考程序（或数据生成器）的API响应
+        返回(语言, 源代码)元组
+        """
+        data = self.parse_api_response(response)
+        code = data.get("code", "")
+        if not isinstance(code, str) or not code.strip():
+            raise ValueError("API未返回程序代码")
+        return normalize_language(data.get("language") or default_language or self.solution_language), code
+        
+    def run_reference_solution(self, solution: Tuple[str, str], count: int) -> List[TestCase]:
+        """
+        编译并在每个已保存的测试输入上运行参考程序，用其输出替换测试数据的输出
+        
+        参数:
+            solution: (语言, 源代码)
+            count: 已写入测试数据目录的测试点数量，编号为 1..count
+        
+        返回:
+            基于文件的测试用例列表，参考程序的输出留在磁盘上，不读入内存
+        """
+        language, code = solution
+        time_limit, memory_limit = self.read_problem_limits()
+        
+        # 保存参考程序，方便出题人检查
+        source_file = os.path.join(self.current_problem_dir, "std.cpp" if language == "cpp" else "std.py")
+        with open(source_file, "w", encoding="utf-8") as f:
+            f.write(code)
+            
+        files = [
+            (os.path.join(self.test_cases_dir, f"{i:02d}.in"), os.path.join(self.test_cases_dir, f"{i:02d}.out"))
+            for i in range(1, count + 1)
+        ]
+        try:
+            with SolutionRunner(code, language, time_limit, memory_limit) as runner:
+                results = runner.run_all(files)
+        except Exception:
+            # 编译失败的参考程序不应留在缓存中，下次重新请求
+            discard_cached_response(self.build_solution_prompt(self.read_problem_file()))
+            raise
+            
+        failures = [f"测试点 {i}: {result.describe()}" for i, result in enumerate(results, 1) if not result.ok]
+        if failures:
+            discard_cached_response(self.build_solution_prompt(self.read_problem_file()))
+            raise RuntimeError("参考程序运行失败\n" + "\n".join(failures[:5]))
+            
+        for _, output_file in files:
+            # 流式去除首尾空白，与 save_test_case 写出的格式一致
+            normalize_file(output_file)
+            blob_store.ingest(output_file)
+        fsync_paths(output_file for _, output_file in files)
+        print(f"参考程序已计算 {count} 个测试点的输出，最长耗时 "
+              f"{max(result.elapsed for result in results):.2f} 秒")
+        return self.saved_test_cases(count)
+        
+    def build_generator_script_prompt(self, description: str, count: int) -> str:
+        """
+        构建请求数据生成器程序的提示文本
+        """
+        language = normalize_language(self.script_language)
+        language_name = "C++17" if language == "cpp" else "Python 3"
+        return f"""
+请为以下算法题目编写一个{language_name}数据生成器程序，用于生成{count}组大规模测试输入。
+
+题目描述:
+{description}
+
+要求：
+1. 程序通过命令行参数接收三个整数：随机种子 seed、测试点序号 index（从1开始）和测试点总数 total
+2. 使用 seed 初始化随机数生成器（如 C++ 的 std::mt19937_64 或 Python 的 random.Random），相同参数必须生成完全相同的数据
+3. 向标准输出写出一组完整、合法、严格符合题目输入格式的输入数据，不要输出任何其他内容
+4. 数据规模随 index 递增，index 等于 total 时必须达到题目数据范围的上限
+5. 不同的 index 应覆盖不同的数据形态（如随机、全部相同、有序、逆序、极端值密集等）
+6. 使用高效的输出方式，保证生成上限规模的数据也能在几秒内完成
+7. 不要读取标准输入，不要生成输出答案
+
+请按照以下JSON格式返回结果:
+{{
+    "language": "{language}",
+    "code": "完整的数据生成器源代码"
+}}
+"""
+        
+    def run_generator_script(self, script: Tuple[str, str], start_index: int, count: int) -> List[str]:
+        """
+        在本地运行数据生成器，直接在测试数据目录中写出 count 个输入文件
+        
+        生成器的标准输出直接写入目标文件，规范化和去重都通过替换、链接文件完成，
+        输入数据不会读入内存，可以生成远大于内存的测试点
+        
+        参数:
+            script: (语言, 源代码)
+            start_index: 第一个生成的测试点编号
+            count: 生成的测试点数量
+        
+        返回:
+            生成的输入文件路径列表，输出由参考程序随后计算
+        """
+        language, code = script
+        source_file = os.path.join(self.current_problem_dir, "gen.cpp" if language == "cpp" else "gen.py")
+        with open(source_file, "w", encoding="utf-8") as f:
+            f.write(code)
+            
+        cases = [
+            (None, os.path.join(self.test_cases_dir, f"{start_index + i:02d}.in"),
+             [str(self.script_seed + start_index + i), str(i + 1), str(count)])
+            for i in range(count)
+        ]
+        try:
+            with SolutionRunner(code, language, self.script_time_limit, memory_limit=1024,
+                                time_factor=1.0) as runner:
+                results = runner.run_all(cases)
+        except Exception:
+            discard_cached_response(self.build_generator_script_prompt(self.read_problem_file(), count))
+            raise
+            
+        generated = []
+        failures = []
+        total_bytes = 0
+        for (_, input_file, _), result in zip(cases, results):
+            if result.ok and os.path.getsize(input_file) == 0:
+                result.status, result.message = "RE", "没有输出任何数据"
+            if not result.ok:
+                failures.append(f"测试点 {os.path.basename(input_file)[:-3]}: {result.describe()}")
+                continue
+            total_bytes += normalize_file(input_file)
+            blob_store.ingest(input_file)
+            generated.append(input_file)
+        if failures:
+            discard_cached_response(self.build_generator_script_prompt(self.read_problem_file(), count))
+            raise RuntimeError("数据生成器运行失败\n" + "\n".join(failures[:5]))
+            
+        print(f"数据生成器已生成 {count} 个测试点的输入，共 {total_bytes / 1024:.1f} KB")
+        return generated
+        
+    def read_problem_limits(self) -> Tuple[int, int]:
+        """
+        从 metadata.json 读取时间限制(毫秒)和内存限制(MB)，缺失时使用1000和128
+        """
+        metadata = {}
+        metadata_file = os.path.join(self.current_problem_dir, "metadata.json")
+        if os.path.exists(metadata_file):
+            with open(metadata_file, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        return int(metadata.get("time_limit", 1000)), int(metadata.get("memory_limit", 128))
+            
+    def _fetch_test_cases(self, prompt: str, writer: Optional[TestCaseStreamWriter]) -> List[Tuple[str, str]]:
+        """
+        请求并解析一个分片的测试数据，解析失败时丢弃该分片的缓存
+        分片模式下已完成的分片直接从暂存目录读取，不再请求
+        """
+        shard = writer.shard(prompt) if writer else None
+        if shard is not None:
+            cases = writer.resume(shard)
+            if cases is not None:
+                return cases
+        on_delta = writer.channel(shard) if writer else None
+        response = call_api(prompt, use_cache=self.use_cache, stream=self.stream, on_delta=on_delta)
+        try:
+            cases = self.process_test_cases_response(response)
+        except Exception:
+            discard_cached_response(prompt)
+            raise
+        if shard is not None:
+            shard.finish(cases)
+        return cases
+            
+    async def _afetch_test_cases(self, prompt: str, writer: Optional[TestCaseStreamWriter]) -> List[Tuple[str, str]]:
+        """
+        _fetch_test_cases 的异步版本
+        """
+        shard = writer.shard(prompt) if writer else None
+        if shard is not None:
+            cases = await asyncio.to_thread(writer.resume, shard)
+            if cases is not None:
+                return cases
+        on_delta = writer.channel(shard) if writer else None
+        response = await acall_api(prompt, use_cache=self.use_cache, stream=self.stream, on_delta=on_delta)
+        try:
+            cases = self.process_test_cases_response(response)
+        except Exception:
+            discard_cached_response(prompt)
+            raise
+        if shard is not None:
+            await asyncio.to_thread(shard.finish, cases)
+        return cases
+            
+    def _fetch_solution(self, description: str) -> Tuple[str, str]:
+        """
+        请求并解析参考程序，解析失败时丢弃缓存
+        """
+        prompt = self.build_solution_prompt(description)
+        response = call_api(prompt, use_cache=self.use_cache)
+        try:
+            return self.process_solution_response(response)
+        except Exception:
+            discard_cached_response(prompt)
+            raise
+            
+    async def _afetch_solution(self, description: str) -> Tuple[str, str]:
+        """
+        _fetch_solution 的异步版本
+        """
+        prompt = self.build_solution_prompt(description)
+        response = await acall_api(prompt, use_cache=self.use_cache)
+        try:
+            return self.process_solution_response(response)
+        except Exception:
+            discard_cached_response(prompt)
+            raise
+            
+    def _fetch_generator_script(self, description: str, count: int) -> Tuple[str, str]:
+        """
+        请求并解析数据生成器程序，解析失败时丢弃缓存
+        """
+        prompt = self.build_generator_script_prompt(description, count)
+        response = call_api(prompt, use_cache=self.use_cache)
+        try:
+            return self.process_solution_response(response, self.script_language)
+        except Exception:
+            discard_cached_response(prompt)
+            raise
+            
+    async def _afetch_generator_script(self, description: str, count: int) -> Tuple[str, str]:
+        """
+        _fetch_generator_script 的异步版本
+        """
+        prompt = self.build_generator_script_prompt(description, count)
+        response = await acall_api(prompt, use_cache=self.use_cache)
+        try:
+            return self.process_solution_response(response, self.script_language)
+        except Exception:
+            discard_cached_response(prompt)
+            raise
+            
+    def read_problem_file(self) -> str:
+        """
+        读取已保存的题目描述文件
+        """
+        problem_file = os.path.join(self.current_problem_dir, f"{self.problem_name}.txt")
+        if not os.path.exists(problem_file):
+            raise ValueError(f"题目文件不存在: {problem_file}")
+            
+        with open(problem_file, "r", encoding="utf-8") as f:
+            return f.read()
     
     def parse_api_response(self, response: str) -> Dict[str, Any]:
         """
@@ -126,14 +844,14 @@ class BaseProblemGenerator(ABC):
             description += "\n\n" + "\n\n".join(sections)
         
         # 优化数学公式的显示（确保$符号周围有适当的空格）
-        description = re.sub(r'(?<!\s)\$', ' $', description)  # 在$前添加空格（如果没有）
-        description = re.sub(r'\$(?!\s)', '$ ', description)  # 在$后添加空格（如果没有）
+        description = DOLLAR_BEFORE_PATTERN.sub(' $', description)  # 在$前添加空格（如果没有）
+        description = DOLLAR_AFTER_PATTERN.sub('$ ', description)  # 在$后添加空格（如果没有）
         
         # 确保所有段落之间有空行
-        description = re.sub(r'\n{3,}', '\n\n', description)  # 将多个空行替换为两个空行
+        description = BLANK_LINES_PATTERN.sub('\n\n', description)  # 将多个空行替换为两个空行
         
         # 为列表项增加适当的间距
-        description = re.sub(r'(\n\d+\..*?)(\n\d+\.)', r'\1\n\2', description)
+        description = LIST_ITEM_PATTERN.sub(r'\1\n\2', description)
         
         return description
     
@@ -141,72 +859,35 @@ class BaseProblemGenerator(ABC):
         """
         从题目描述中提取输入输出格式和样例
         """
-        input_format = ""
-        output_format = ""
-        samples = ""
-        
-        # 提取输入格式 - 匹配更多可能的格式化方式
-        input_match = re.search(r'##\s+输入格式\s*([\s\S]*?)(?=##\s+|$)', description)
-        if input_match:
-            input_format = input_match.group(1).strip()
-            
-        # 提取输出格式
-        output_match = re.search(r'##\s+输出格式\s*([\s\S]*?)(?=##\s+|$)', description)
-        if output_match:
-            output_format = output_match.group(1).strip()
-            
-        # 提取样例 - 处理可能的多个样例
-        samples_section = ""
-        samples_match = re.search(r'##\s+样例(?:\s*\d*)?(?:\s*\d)?\s*([\s\S]*?)(?=##\s+|$)', description)
-        if not samples_match:
-            samples_match = re.search(r'##\s+示例(?:\s*\d*)?(?:\s*\d)?\s*([\s\S]*?)(?=##\s+|$)', description)
-            
-        if samples_match:
-            samples_section = samples_match.group(1).strip()
-        
-        # 如果找到了样例部分，解析所有的输入/输出对
-        if samples_section:
-            # 处理多个样例的情况
-            sample_pairs = []
-            
-            # 查找所有 "输入" 和 "输出" 模式
-            input_blocks = re.findall(r'(?:###\s+样例\s+\d+\s*\n)?\s*####?\s+输入\s*\n```\s*([\s\S]*?)```', samples_section)
-            output_blocks = re.findall(r'####?\s+输出\s*\n```\s*([\s\S]*?)```', samples_section)
-            explanation_blocks = re.findall(r'####?\s+解释\s*\n([\s\S]*?)(?=####?\s+|$)', samples_section)
-            
-            # 确保找到的输入和输出块数量相同
-            min_blocks = min(len(input_blocks), len(output_blocks))
-            
-            for i in range(min_blocks):
-                sample_input = input_blocks[i].strip()
-                sample_output = output_blocks[i].strip()
-                sample_explanation = ""
-                if i < len(explanation_blocks):
-                    sample_explanation = explanation_blocks[i].strip()
-                    
-                sample_pair = f"输入:\n{sample_input}\n\n输出:\n{sample_output}"
-                if sample_explanation:
-                    sample_pair += f"\n\n解释:\n{sample_explanation}"
-                    
-                sample_pairs.append(sample_pair)
-            
-            # 将所有样例组合在一起
-            if sample_pairs:
-                samples = "\n\n".join(sample_pairs)
+        document = self.parse_description(description)
+        input_format = document.section_text("input_format")
+        output_format = document.section_text("output_format")
         
-        # 如果上面的方法没有找到样例，尝试更简单的模式匹配
-        if not samples:
-            # 寻找最基本的样例格式
-            basic_match = re.search(r'###\s+输入[\s\S]*?```([\s\S]*?)```[\s\S]*?###\s+输出[\s\S]*?```([\s\S]*?)```', description)
-            if basic_match:
-                sample_input = basic_match.group(1).strip()
-                sample_output = basic_match.group(2).strip()
-                samples = f"输入:\n{sample_input}\n\n输出:\n{sample_output}"
+        # 处理多个样例的情况
+        sample_pairs = []
+        for sample in document.samples():
+            sample_pair = f"输入:\n{sample.input_data}\n\n输出:\n{sample.output_data}"
+            if sample.explanation:
+                sample_pair += f"\n\n解释:\n{sample.explanation}"
+            sample_pairs.append(sample_pair)
+        samples = "\n\n".join(sample_pairs)
         
         title = self.problem_name.replace("_", " ")
         
         return title, input_format, output_format, samples
         
+    def parse_description(self, description: str) -> MarkdownDocument:
+        """
+        解析题目描述为章节结构，最近一次的结果会被缓存，
+        同一描述构建多个提示（如分片生成测试数据）时只解析一次
+        """
+        cached = self._parsed_description
+        if cached is not None and (cached[0] is description or cached[0] == description):
+            return cached[1]
+        document = parse_markdown(description)
+        self._parsed_description = (description, document)
+        return document
+        
     def save_problem_description(self, problem_data: Optional[Dict[str, Any]] = None) -> str:
         """
         保存题目描述到文件
@@ -229,20 +910,18 @@ class BaseProblemGenerator(ABC):
             
         # 创建以题目名称命名的子目录
         self.problem_name = title.replace(" ", "_")
-        self.current_problem_dir = os.path.join(base_dir, self.problem_name)
-        if not os.path.exists(self.current_problem_dir):
-            os.makedirs(self.current_problem_dir)
+        if self.unique_problem_dir:
+            self.current_problem_dir = self.claim_problem_dir(base_dir, self.problem_name)
+        else:
+            self.current_problem_dir = os.path.join(base_dir, self.problem_name)
+            if not os.path.exists(self.current_problem_dir):
+                os.makedirs(self.current_problem_dir)
             
         # 创建测试数据目录
         self.test_cases_dir = os.path.join(self.current_problem_dir, "test_cases")
         if not os.path.exists(self.test_cases_dir):
             os.makedirs(self.test_cases_dir)
             
-        # 保存题目文件 - 使用self.problem_name代替title，确保与后续查找一致
-        problem_file = os.path.join(self.current_problem_dir, f"{self.problem_name}.txt")
-        with open(problem_file, "w", encoding="utf-8") as f:
-            f.write(description)
-            
         # 保存题目元数据
         metadata = {
             "title": title,
@@ -256,16 +935,43 @@ class BaseProblemGenerator(ABC):
         if "subtasks" in problem_data:
             metadata["subtasks"] = problem_data["subtasks"]
         
+        # 题目文件和元数据在同一个事务中原子地提交
+        # 保存题目文件 - 使用self.problem_name代替title，确保与后续查找一致
+        problem_file = os.path.join(self.current_problem_dir, f"{self.problem_name}.txt")
         metadata_file = os.path.join(self.current_problem_dir, "metadata.json")
-        with open(metadata_file, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        with SaveTransaction(self.current_problem_dir) as txn:
+            txn.write_text(problem_file, description)
+            txn.write_text(metadata_file, json.dumps(metadata, ensure_ascii=False, indent=2))
+            
+        # 更新题库索引，测试数据写入后由对账按修改时间补上测试点信息
+        try:
+            get_problem_index(base_dir).update(self.current_problem_dir)
+        except (sqlite3.Error, OSError) as e:
+            print(f"更新题库索引失败: {str(e)}")
             
         return problem_file
         
-    def save_test_cases(self, test_cases: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    @staticmethod
+    def claim_problem_dir(base_dir: str, name: str) -> str:
+        """
+        创建一个尚不存在的题目目录，名称已被占用时依次尝试 name_2、name_3 ...
+        使用 os.mkdir 原子地创建，并发生成的同名题目不会写入同一目录
+        """
+        suffix = 1
+        while True:
+            directory = os.path.join(base_dir, name if suffix == 1 else f"{name}_{suffix}")
+            try:
+                os.mkdir(directory)
+                return directory
+            except FileExistsError:
+                suffix += 1
+        
+    def save_test_cases(self, test_cases: List[Tuple[TextSource, TextSource]]) -> List[Tuple[str, str]]:
         """
-        保存测试数据到文件
+        保存测试数据到文件，全部写入暂存目录并统一同步后原子地提交
         返回保存的文件路径列表
+        
+        输入和输出可以是字符串，也可以是迭代器或文件对象，按块流式写入
         """
         if not test_cases:
             raise ValueError("测试数据为空")
@@ -275,24 +981,74 @@ class BaseProblemGenerator(ABC):
             
         saved_files = []
         
-        for i, (input_data, output_data) in enumerate(test_cases, 1):
-            # 使用两位数格式的编号，如01, 02, 03...
-            case_id = f"{i:02d}"
-            
-            # 保存输入数据
-            input_file = os.path.join(self.test_cases_dir, f"{case_id}.in")
-            with open(input_file, "w", encoding="utf-8", newline="\n") as f:
-                f.write(input_data.strip())
-                
-            # 保存输出数据
-            output_file = os.path.join(self.test_cases_dir, f"{case_id}.out")
-            with open(output_file, "w", encoding="utf-8", newline="\n") as f:
-                f.write(output_data.strip())
-                
-            saved_files.append((input_file, output_file))
+        # 全部测试数据在同一个事务中提交，中途失败不会留下一半新一半旧的数据
+        with SaveTransaction(self.problem_dir_for_test_cases()) as txn:
+            for i, (input_data, output_data) in enumerate(test_cases, 1):
+                saved_files.append(self.save_test_case(i, input_data, output_data, txn))
+            # 上一次生成的测试点更多时，删除多出的文件，以免被打包
+            for path in self.stale_test_case_files(len(test_cases)):
+                txn.remove(path)
             
         return saved_files
         
+    def saved_test_cases(self, count: int) -> List[TestCase]:
+        """
+        返回测试数据目录中编号为 1..count 的测试用例，只记录文件路径和大小
+        """
+        test_cases = []
+        for i in range(1, count + 1):
+            input_file, output_file = TestCase.file_paths(self.test_cases_dir, str(i))
+            test_cases.append(TestCase.from_files(str(i), input_file, output_file))
+        return test_cases
+        
+    def problem_dir_for_test_cases(self) -> str:
+        """
+        测试数据所属的题目目录，即保存事务的目录
+        """
+        return self.current_problem_dir or os.path.dirname(self.test_cases_dir)
+        
+    def stale_test_case_files(self, count: int) -> List[str]:
+        """
+        返回测试数据目录中编号大于 count 的测试点文件
+        """
+        if not self.test_cases_dir or not os.path.isdir(self.test_cases_dir):
+            return []
+        stale = []
+        for name in os.listdir(self.test_cases_dir):
+            stem, ext = os.path.splitext(name)
+            if ext in (".in", ".out") and stem.isdigit() and int(stem) > count:
+                stale.append(os.path.join(self.test_cases_dir, name))
+        return stale
+        
+    def save_test_case(self, index: int, input_data: TextSource, output_data: TextSource,
+                       batch: Optional[BatchWriter] = None) -> Tuple[str, str]:
+        """
+        保存单个测试用例到文件，写入时去除首尾空白
+        返回(输入文件, 输出文件)路径
+        
+        参数:
+            index: 测试点编号
+            input_data: 输入数据（字符串、迭代器或文件对象）
+            output_data: 输出数据（字符串、迭代器或文件对象）
+            batch: 所属的批量写入器或保存事务，为None时单独写入且不执行fsync
+        """
+        if not self.test_cases_dir:
+            raise ValueError("测试数据目录未初始化")
+            
+        # 使用两位数格式的编号，如01, 02, 03...
+        case_id = f"{index:02d}"
+        writer = batch or BatchWriter(fsync=False)
+        
+        # 保存输入数据
+        input_file = os.path.join(self.test_cases_dir, f"{case_id}.in")
+        writer.write(input_file, input_data)
+            
+        # 保存输出数据
+        output_file = os.path.join(self.test_cases_dir, f"{case_id}.out")
+        writer.write(output_file, output_data)
+            
+        return (input_file, output_file)
+        
     def create_zip_package(self) -> str:
         """
         将测试数据打包为zip文件
@@ -303,10 +1059,6 @@ class BaseProblemGenerator(ABC):
             
         zip_file = os.path.join(self.current_problem_dir, f"{self.problem_name}_test_cases.zip")
         
-        with zipfile.ZipFile(zip_file, "w") as zipf:
-            for file_name in os.listdir(self.test_cases_dir):
-                file_path = os.path.join(self.test_cases_dir, file_name)
-                if os.path.isfile(file_path):
-                    zipf.write(file_path, arcname=file_name)
+        package_test_cases(self.test_cases_dir, zip_file)
                     
         return zip_file 
\ No newline at end of file
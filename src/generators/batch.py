@@ -0,0 +1,236 @@
+"""
+批量生成清单 - 从JSONL/CSV清单读取题目，记录每道题目的结果以便中断后续跑
+"""
+import os
+import csv
+import json
+import hashlib
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .base_generator import BaseProblemGenerator
+from .simple_generator import SimpleProblemGenerator
+from .advanced_generator import AdvancedProblemGenerator
+from .pipeline import PipelineJob, PipelineResult, STAGES
+from ..utils.solution_runner import normalize_language
+
+
+# 清单中 generator 字段可用的生成器类型
+GENERATOR_TYPES = {
+    "simple": SimpleProblemGenerator,
+    "advanced": AdvancedProblemGenerator,
+}
+
+
+class ManifestEntry:
+    """清单中的一道题目"""
+
+    def __init__(self, line: int, description: str, test_cases: int = 10,
+                 generator: str = "simple", name: str = "", solution: str = "", generator_script: str = ""):
+        self.line = line
+        self.description = description
+        self.test_cases = test_cases
+        self.generator = generator
+        self.name = name or f"第{line}行"
+        self.solution = solution  # 参考程序语言，为空时由模型直接给出输出
+        self.generator_script = generator_script  # 数据生成器语言，为空时不使用数据生成器
+        self.error = ""  # 清单条目本身无效时的原因
+
+    @property
+    def key(self) -> str:
+        """条目的唯一标识，由内容决定，清单增删行不会影响其他条目的续跑状态"""
+        fields = [self.description, self.test_cases, self.generator]
+        if self.solution or self.generator_script:
+            fields.append(self.solution)
+        if self.generator_script:
+            fields.append(self.generator_script)
+        content = json.dumps(fields, ensure_ascii=False)
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+    def create_job(self, use_cache: bool = True, solution: Optional[str] = None,
+                   generator_script: Optional[str] = None) -> PipelineJob:
+        """
+        创建对应的流水线任务
+        
+        参数:
+            use_cache: 是否使用本地API响应缓存
+            solution: 清单未指定参考程序语言时使用的默认语言
+            generator_script: 清单未指定数据生成器语言时使用的默认语言
+        """
+        generator: BaseProblemGenerator = GENERATOR_TYPES[self.generator]()
+        generator.use_cache = use_cache
+        generator.stream = True
+        # 并发运行的题目标题可能相同，每道题目使用各自的目录，报告中记录实际路径
+        generator.unique_problem_dir = True
+        language = self.solution or solution
+        if language:
+            generator.use_reference_solution = True
+            generator.solution_language = language
+        script_language = self.generator_script or generator_script
+        if script_language:
+            generator.use_generator_script = True
+            generator.script_language = script_language
+        return PipelineJob(generator, self.description,
+                           has_subtasks=self.generator == "advanced",
+                           test_cases_count=self.test_cases, name=self.name)
+
+
+def load_manifest(path: str, default_test_cases: int = 10) -> List[ManifestEntry]:
+    """
+    读取批量生成清单
+
+    JSONL每行一个对象，CSV第一行为表头，支持的字段:
+        description  题目描述（必填）
+        test_cases   测试点数量，默认为 default_test_cases
+        generator    生成器类型 simple/advanced，默认为simple
+        name         显示名称，默认为行号
+        solution     参考程序语言 cpp/python，指定时在本地运行参考程序计算输出
+        generator_script  数据生成器语言 cpp/python，指定时大规模测试输入由本地运行的生成器产生
+
+    参数:
+        path: 清单文件路径，扩展名为 .csv 时按CSV解析，否则按JSONL解析
+        default_test_cases: 未指定测试点数量时的默认值
+
+    返回:
+        清单条目列表；无效的条目也会返回，其 error 字段说明原因
+    """
+    rows = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for line, row in enumerate(csv.DictReader(f), 2):
+                rows.append((line, row))
+        else:
+            for line, text in enumerate(f, 1):
+                text = text.strip()
+                if not text or text.startswith("#"):
+                    continue
+                try:
+                    row = json.loads(text)
+                except json.JSONDecodeError as e:
+                    row = {"_error": f"JSON格式错误: {str(e)}"}
+                if not isinstance(row, dict):
+                    row = {"_error": "每行必须是一个JSON对象"}
+                rows.append((line, row))
+
+    entries = []
+    for line, row in rows:
+        description = str(row.get("description") or "").strip()
+        generator = str(row.get("generator") or "simple").strip().lower()
+        name = str(row.get("name") or "").strip()
+        solution = str(row.get("solution") or "").strip()
+        generator_script = str(row.get("generator_script") or "").strip()
+        entry = ManifestEntry(line, description, default_test_cases, generator, name)
+        try:
+            if row.get("test_cases") not in (None, ""):
+                entry.test_cases = int(row["test_cases"])
+        except (TypeError, ValueError):
+            entry.error = f"测试点数量无效: {row.get('test_cases')}"
+
+        if row.get("_error"):
+            entry.error = row["_error"]
+        elif not description:
+            entry.error = "题目描述不能为空"
+        elif generator not in GENERATOR_TYPES:
+            entry.error = f"未知的生成器类型: {generator}"
+        elif entry.test_cases <= 0:
+            entry.error = "测试点数量必须大于0"
+        else:
+            try:
+                entry.solution = normalize_language(solution) if solution else ""
+                entry.generator_script = normalize_language(generator_script) if generator_script else ""
+            except ValueError as e:
+                entry.error = str(e)
+        entries.append(entry)
+    return entries
+
+
+class BatchReport:
+    """
+    批量生成报告
+
+    每道题目结束时立即写回磁盘，再次运行同一清单时已成功的条目会被跳过，
+    失败或上次未运行到的条目重新生成。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.runs: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.entries = data.get("entries", {})
+                self.runs = data.get("runs", [])
+            except (OSError, ValueError) as e:
+                print(f"读取批量报告失败，将重新生成全部题目: {str(e)}")
+
+    def is_done(self, entry: ManifestEntry) -> bool:
+        """条目是否已在之前的运行中成功生成，且题目目录仍然存在"""
+        record = self.entries.get(entry.key)
+        return bool(record and record.get("status") == "done"
+                    and record.get("directory") and os.path.isdir(record["directory"]))
+
+    def record_invalid(self, entry: ManifestEntry) -> None:
+        """记录清单中无效、被跳过的条目"""
+        self._record(entry, {"status": "skipped", "error": entry.error})
+
+    def record_job(self, entry: ManifestEntry, job: PipelineJob) -> None:
+        """记录一道题目的生成结果"""
+        record = {
+            "status": "done" if job.succeeded else "failed",
+            "timings": {stage: round(job.timings[stage], 3) for stage in STAGES if stage in job.timings},
+            "total": round(sum(job.timings.values()), 3),
+        }
+        if job.succeeded:
+            record["title"] = job.problem.title
+            record["directory"] = job.problem.directory
+            record["test_cases"] = len(job.test_cases)
+        else:
+            record["failed_stage"] = job.failed_stage
+            record["error"] = job.error
+            if job.generator.current_problem_dir:
+                record["directory"] = job.generator.current_problem_dir
+        self._record(entry, record)
+
+    def record_run(self, result: PipelineResult, skipped: int) -> None:
+        """记录本次运行的汇总信息"""
+        with self._lock:
+            self.runs.append({
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "jobs": len(result.jobs),
+                "completed": len(result.completed),
+                "failed": len(result.failed),
+                "skipped": skipped,
+                "elapsed": round(result.elapsed, 3),
+                "throughput": round(result.throughput, 3),
+            })
+            self._save()
+
+    def _record(self, entry: ManifestEntry, record: Dict[str, Any]) -> None:
+        record.update({
+            "line": entry.line,
+            "name": entry.name,
+            "description": entry.description,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        with self._lock:
+            self.entries[entry.key] = record
+            self._save()
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # 先写临时文件再替换，避免中断时报告损坏导致无法续跑
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries, "runs": self.runs}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def default_report_path(manifest_path: str) -> str:
+    """清单对应的默认报告路径: <清单文件名>.report.json"""
+    return f"{manifest_path}.report.json"
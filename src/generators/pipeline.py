@@ -0,0 +1,275 @@
+"""
+批量生成流水线 - 格式化、生成测试数据、打包三个阶段通过队列重叠执行
+"""
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .base_generator import BaseProblemGenerator
+from ..models.problem import Problem, TestCase, SubTask
+
+
+# 流水线阶段，按执行顺序排列
+STAGES = ("format", "test_cases", "package")
+
+STAGE_NAMES = {
+    "format": "格式化题目",
+    "test_cases": "生成测试数据",
+    "package": "打包测试数据",
+}
+
+
+class PipelineJob:
+    """流水线中的一道题目"""
+
+    def __init__(self, generator: BaseProblemGenerator, description: str,
+                 has_subtasks: bool = False, test_cases_count: int = 10, name: str = ""):
+        self.generator = generator
+        self.description = description
+        self.has_subtasks = has_subtasks
+        self.test_cases_count = test_cases_count
+        self.name = name or description[:20]
+        self.problem_data: Dict[str, Any] = {}
+        self.test_cases: List[TestCase] = []
+        self.problem: Optional[Problem] = None
+        self.error = ""
+        self.failed_stage = ""
+        self.timings: Dict[str, float] = {}  # 阶段: 耗时(秒)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.problem is not None and not self.error
+
+
+class PipelineResult:
+    """一次批量运行的结果"""
+
+    def __init__(self, jobs: List[PipelineJob], elapsed: float):
+        self.jobs = jobs
+        self.elapsed = elapsed
+
+    @property
+    def completed(self) -> List[PipelineJob]:
+        return [job for job in self.jobs if job.succeeded]
+
+    @property
+    def failed(self) -> List[PipelineJob]:
+        return [job for job in self.jobs if not job.succeeded]
+
+    @property
+    def throughput(self) -> float:
+        """吞吐量（题/分钟）"""
+        if self.elapsed <= 0:
+            return 0.0
+        return len(self.completed) * 60 / self.elapsed
+
+    def summary(self) -> str:
+        """返回一行运行摘要"""
+        return (f"完成 {len(self.completed)}/{len(self.jobs)} 道题目，"
+                f"总耗时 {self.elapsed:.1f} 秒，吞吐量 {self.throughput:.2f} 题/分钟")
+
+
+class ProblemPipeline:
+    """
+    批量生成流水线
+
+    每个阶段有自己的输入队列和工作线程，一道题目完成某个阶段后立即进入下一阶段的队列，
+    因此题目B格式化的同时，题目A可以在生成测试数据，题目C可以在打包。
+    某个阶段失败的题目会跳过后续阶段，不影响其他题目。
+    """
+
+    def __init__(self, format_workers: int = 2, test_case_workers: int = 2, package_workers: int = 1,
+                 on_progress: Optional[Callable[[PipelineJob, str], None]] = None,
+                 on_job_done: Optional[Callable[[PipelineJob], None]] = None):
+        """
+        参数:
+            format_workers: 格式化阶段的并发数
+            test_case_workers: 生成测试数据阶段的并发数
+            package_workers: 打包阶段的并发数
+            on_progress: 进度回调，以 (题目, 消息) 调用，可能在任意工作线程中被调用
+            on_job_done: 每道题目结束（成功或失败）时调用
+        """
+        self.workers = {
+            "format": max(1, format_workers),
+            "test_cases": max(1, test_case_workers),
+            "package": max(1, package_workers),
+        }
+        self.on_progress = on_progress
+        self.on_job_done = on_job_done
+
+    def run(self, jobs: List[PipelineJob]) -> PipelineResult:
+        """
+        运行流水线直到所有题目处理完毕
+
+        参数:
+            jobs: 待生成的题目列表
+
+        返回:
+            PipelineResult，题目按输入顺序排列
+        """
+        started = time.monotonic()
+        queues = {stage: queue.Queue() for stage in STAGES}
+        remaining = dict(self.workers)
+        lock = threading.Lock()
+
+        def worker(index: int) -> None:
+            stage = STAGES[index]
+            inbox = queues[stage]
+            outbox = queues[STAGES[index + 1]] if index + 1 < len(STAGES) else None
+            try:
+                while True:
+                    job = inbox.get()
+                    if job is None:
+                        break
+                    try:
+                        if not job.error:
+                            self._run_stage(stage, job)
+                        if outbox is not None and not job.error:
+                            outbox.put(job)
+                            continue
+                    except Exception as e:
+                        # 进度回调等出错时也要让题目结束，不能让工作线程退出
+                        self._fail(job, stage, e)
+                    self._finish(job, stage)
+            finally:
+                # 本阶段最后一个退出的线程通知下一阶段结束，即使线程异常退出也要通知，否则run()会一直等待
+                with lock:
+                    remaining[stage] -= 1
+                    last = remaining[stage] == 0
+                if last and outbox is not None:
+                    for _ in range(self.workers[STAGES[index + 1]]):
+                        outbox.put(None)
+
+        threads = [
+            threading.Thread(target=worker, args=(index,), daemon=True,
+                             name=f"pipeline-{stage}-{n}")
+            for index, stage in enumerate(STAGES)
+            for n in range(self.workers[stage])
+        ]
+        for thread in threads:
+            thread.start()
+        for job in jobs:
+            queues["format"].put(job)
+        for _ in range(self.workers["format"]):
+            queues["format"].put(None)
+        for thread in threads:
+            thread.join()
+
+        return PipelineResult(list(jobs), time.monotonic() - started)
+
+    def _run_stage(self, stage: str, job: PipelineJob) -> None:
+        """执行单个阶段，记录耗时和错误"""
+        self._report(job, f"正在{STAGE_NAMES[stage]}...")
+        stage_started = time.monotonic()
+        try:
+            if stage == "format":
+                self._format(job)
+            elif stage == "test_cases":
+                self._generate_test_cases(job)
+            else:
+                self._package(job)
+        except Exception as e:
+            job.error = str(e)
+            job.failed_stage = stage
+            self._report(job, f"生成过程中出错: {job.error}")
+        finally:
+            job.timings[stage] = time.monotonic() - stage_started
+
+    def _finish(self, job: PipelineJob, stage: str) -> None:
+        """题目结束时调用 on_job_done，回调出错（如报告写入失败）时把题目记为失败"""
+        if not self.on_job_done:
+            return
+        try:
+            self.on_job_done(job)
+        except Exception as e:
+            self._fail(job, stage, e)
+
+    @staticmethod
+    def _fail(job: PipelineJob, stage: str, error: Exception) -> None:
+        """记录题目失败，保留最先出现的错误"""
+        if not job.error:
+            job.error = str(error) or type(error).__name__
+            job.failed_stage = stage
+        print(f"题目 {job.name} 的回调出错: {str(error)}")
+
+    def _format(self, job: PipelineJob) -> None:
+        generator = job.generator
+        generator.problem_description = job.description
+        if hasattr(generator, 'has_subtasks'):
+            generator.has_subtasks = job.has_subtasks
+        generator.test_cases_count = job.test_cases_count
+
+        job.problem_data = generator.format_problem()
+        if not job.problem_data:
+            raise RuntimeError("题目格式化失败")
+        # 保存题目描述，同时确定题目目录
+        generator.save_problem_description(job.problem_data)
+        self._report(job, f"题目: {job.problem_data.get('title', '未命名题目')}")
+
+    def _generate_test_cases(self, job: PipelineJob) -> None:
+        job.test_cases = job.generator.generate_test_cases(
+            on_test_case=lambda index, input_data, output_data: self._report(
+                job, f"已生成测试点 {index}（输入 {len(input_data)} 字符，输出 {len(output_data)} 字符）"
+            )
+        )
+        if not job.test_cases:
+            raise RuntimeError("测试数据生成失败")
+
+    def _package(self, job: PipelineJob) -> None:
+        job.problem = build_problem(job.generator, job.problem_data, job.test_cases, job.has_subtasks)
+        # 创建zip包（不重新保存题目文件和测试数据文件，只打包）
+        job.problem.create_zip_package()
+        self._report(job, f"文件保存在: {job.problem.directory}")
+
+    def _report(self, job: PipelineJob, message: str) -> None:
+        if self.on_progress:
+            self.on_progress(job, message)
+
+
+def build_problem(generator: BaseProblemGenerator, problem_data: Dict[str, Any],
+                  test_cases: List[TestCase], has_subtasks: bool = False) -> Problem:
+    """
+    根据生成器的输出创建Problem对象，使用生成器已创建的题目目录
+
+    参数:
+        generator: 已完成生成的生成器
+        problem_data: format_problem 返回的题目信息
+        test_cases: generate_test_cases 返回的基于文件的测试用例
+        has_subtasks: 是否包含子任务
+
+    返回:
+        Problem对象
+    """
+    problem_obj = Problem(
+        title=problem_data.get("title", "未命名题目"),
+        description=problem_data.get("description", ""),
+        difficulty=problem_data.get("difficulty", 0),
+        time_limit=problem_data.get("time_limit", 1000),
+        memory_limit=problem_data.get("memory_limit", 128),
+        has_subtasks=has_subtasks
+    )
+
+    # 设置题目目录为生成器已创建的目录
+    if generator.current_problem_dir:
+        problem_obj.directory = generator.current_problem_dir
+
+    # 添加测试用例，测试用例指向test_cases_dir下已有的文件，只记录路径而不复制内容
+    for test_case in test_cases:
+        case_id = test_case.case_id
+        if has_subtasks and "." in case_id:
+            test_case.group = int(case_id.split(".")[0])
+        problem_obj.add_test_case(test_case)
+
+    # 添加子任务信息
+    if has_subtasks and "subtasks" in problem_data:
+        for i, subtask_data in enumerate(problem_data["subtasks"], 1):
+            subtask = SubTask(
+                task_id=i,
+                description=subtask_data.get("description", ""),
+                score=subtask_data.get("score", 0),
+                test_cases=[str(tc_id) for tc_id in subtask_data.get("test_cases", [])]
+            )
+            problem_obj.add_subtask(subtask)
+
+    return problem_obj
@@ -1,24 +1,28 @@
 """
 简单题目生成器 - 生成不带子任务的题目
 """
-import os
-import json
-import random
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 
 from .base_generator import BaseProblemGenerator
-from ..utils.api_utils import call_api
 
 
 class SimpleProblemGenerator(BaseProblemGenerator):
     """简单题目生成器类"""
     
+    # 分片生成测试数据时的类别：(类别, 名称, 说明, 数量权重)
+    TEST_CASE_SHARDS = [
+        ("basic", "基础测试用例", "简单情况，能快速验证算法正确性，其中可以包含与题目角色或场景相关的有趣测试用例", 3),
+        ("boundary", "边界情况测试", "最大/最小值，特殊情况如0、负数、空集等", 2),
+        ("large", "随机大规模测试", "接近题目中描述的数据范围上限，保证数据生成的随机性和多样性", 3),
+        ("trap", "具有陷阱的测试用例", "可能导致常见错误的情况", 2),
+    ]
+    
     def __init__(self):
         super().__init__()
         
-    def format_problem(self) -> Dict[str, Any]:
+    def build_format_prompt(self) -> str:
         """
-        格式化题目描述，生成完整的题目
+        构建格式化题目的提示文本
         """
         if not self.problem_description:
             raise ValueError("题目描述不能为空")
@@ -73,71 +77,106 @@ class SimpleProblemGenerator(BaseProblemGenerator):
 7. 整体风格应既符合OI题目的严谨性，又具有生动有趣的叙述方式
 8. 请确保所有字段中的 Markdown 格式正确，包括标题、列表、代码块等
 """
+        return prompt
         
-        try:
-            # 调用API获取完整题目
-            response = call_api(prompt)
-            
-            # 使用基类中的方法解析返回的JSON
-            problem_data = self.parse_api_response(response)
-            
-            # 确保必要字段存在
-            required_fields = ["title", "description", "difficulty"]
-            for field in required_fields:
-                if field not in problem_data:
-                    raise ValueError(f"生成的题目缺少必要字段: {field}")
-            
-            # 设置默认值
-            if "time_limit" not in problem_data:
-                problem_data["time_limit"] = 1000
-            if "memory_limit" not in problem_data:
-                problem_data["memory_limit"] = 128
-                
-            # 使用基类方法处理描述，合并相关字段并美化格式
-            problem_data["description"] = self.process_description(problem_data)
-            
-            return problem_data
-            
-        except Exception as e:
-            raise RuntimeError(f"格式化题目失败: {str(e)}")
-            
-    def generate_test_cases(self) -> List[Tuple[str, str]]:
+    def process_format_response(self, response: str) -> Dict[str, Any]:
         """
-        生成测试数据
-        返回(输入, 输出)元组的列表
+        解析格式化题目的API响应，补全默认值并美化描述
         """
-        if not self.problem_name:
-            # 如果题目还没格式化，先格式化
-            problem_data = self.format_problem()
-            # 保存题目描述，这步会设置self.problem_name
-            self.save_problem_description(problem_data)
-            
-        # 获取题目描述文件中的内容
-        problem_file = os.path.join(self.current_problem_dir, f"{self.problem_name}.txt")
-        if not os.path.exists(problem_file):
-            raise ValueError(f"题目文件不存在: {problem_file}")
+        # 使用基类中的方法解析返回的JSON
+        problem_data = self.parse_api_response(response)
+        
+        # 确保必要字段存在
+        required_fields = ["title", "description", "difficulty"]
+        for field in required_fields:
+            if field not in problem_data:
+                raise ValueError(f"生成的题目缺少必要字段: {field}")
+        
+        # 设置默认值
+        if "time_limit" not in problem_data:
+            problem_data["time_limit"] = 1000
+        if "memory_limit" not in problem_data:
+            problem_data["memory_limit"] = 128
             
-        with open(problem_file, "r", encoding="utf-8") as f:
-            description = f.read()
+        # 使用基类方法处理描述，合并相关字段并美化格式
+        problem_data["description"] = self.process_description(problem_data)
+        
+        return problem_data
+        
+    def build_test_cases_prompt(self, description: str) -> str:
+        """
+        构建生成测试数据的提示文本
+        """
+        count = self.test_cases_count - self.script_test_cases_count()
+        return self._build_test_cases_prompt(description, count, """包括以下类型：
+1. 基础测试用例（简单情况，能快速验证算法正确性）
+2. 边界情况测试（最大/最小值，特殊情况如0、负数、空集等）
+3. 随机大规模测试（接近题目中描述的数据范围上限）
+4. 具有陷阱的测试用例（可能导致常见错误的情况）
+5. 能体现题目趣味性情景的特殊测试用例（与题目的角色或场景相关）""")
+        
+    def build_test_cases_prompts(self, description: str) -> List[str]:
+        """
+        按测试类别将测试数据拆分为多个分片，每个分片单独请求
+        测试点数量少于类别数或关闭分片时退化为单个请求；
+        数据生成器模式下大规模测试由生成器产生，不再向模型请求
+        """
+        if not self.parallel_shards or self.test_cases_count < len(self.TEST_CASE_SHARDS):
+            if self.test_cases_count - self.script_test_cases_count() <= 0:
+                return []
+            return [self.build_test_cases_prompt(description)]
             
+        prompts = []
+        for (key, name, detail, _), count in zip(self.TEST_CASE_SHARDS, self.split_test_cases_count()):
+            if key == "large" and self.use_generator_script:
+                continue
+            if count > 0:
+                prompts.append(self._build_test_cases_prompt(
+                    description, count,
+                    f"本次只需要生成「{name}」（{detail}），其他类型的测试数据会另外生成，不要重复。"
+                ))
+        return prompts
+        
+    def script_test_cases_count(self) -> int:
+        """
+        数据生成器模式下由生成器产生的测试点数量，即大规模测试类别分到的数量（至少1个）
+        """
+        if not self.use_generator_script:
+            return 0
+        if self.test_cases_count < len(self.TEST_CASE_SHARDS):
+            return max(1, self.test_cases_count * 3 // 10)
+        keys = [key for key, _, _, _ in self.TEST_CASE_SHARDS]
+        return max(1, self.split_test_cases_count()[keys.index("large")])
+        
+    def split_test_cases_count(self) -> List[int]:
+        """
+        按权重把 test_cases_count 分配到各个类别（最大余数法，总数保持不变）
+        """
+        total_weight = sum(weight for _, _, _, weight in self.TEST_CASE_SHARDS)
+        exact = [self.test_cases_count * weight / total_weight for _, _, _, weight in self.TEST_CASE_SHARDS]
+        counts = [int(value) for value in exact]
+        remainders = sorted(range(len(exact)), key=lambda i: counts[i] - exact[i])
+        for i in remainders[:self.test_cases_count - sum(counts)]:
+            counts[i] += 1
+        return counts
+        
+    def _build_test_cases_prompt(self, description: str, count: int, categories: str) -> str:
+        """
+        构建生成 count 组指定类别测试数据的提示文本
+        """
         # 使用基类方法提取样例数据
         title, input_format, output_format, samples = self.extract_sample_data(description)
         
         # 构建生成测试数据的提示
         prompt = f"""
-我需要为以下算法题目生成{self.test_cases_count}组测试数据，每组包含输入和对应的正确输出。这个题目具有富有趣味性的情景设定。
+我需要为以下算法题目生成{count}组测试数据，每组包含输入和对应的正确输出。这个题目具有富有趣味性的情景设定。
 
 题目名称: {title}
 
 题目描述:
 {description}
 
-请为这个题目生成{self.test_cases_count}组有效的测试数据，包括以下类型：
-1. 基础测试用例（简单情况，能快速验证算法正确性）
-2. 边界情况测试（最大/最小值，特殊情况如0、负数、空集等）
-3. 随机大规模测试（接近题目中描述的数据范围上限）
-4. 具有陷阱的测试用例（可能导致常见错误的情况）
-5. 能体现题目趣味性情景的特殊测试用例（与题目的角色或场景相关）
+请为这个题目生成{count}组有效的测试数据，{categories}
 
 请确保测试数据具有以下特点：
 - 测试数据应该由易到难，逐步增加难度和规模
@@ -147,21 +186,21 @@ class SimpleProblemGenerator(BaseProblemGenerator):
 - 对于每个测试用例，提供一个简短的描述，说明该测试用例的目的和特点
 
 请按照以下JSON格式返回结果:
-{
+{{
     "test_cases": [
-        {
+        {{
             "input": "测试输入1",
             "output": "期望输出1",
             "description": "这是一个基础测试用例，用于验证简单情况下的正确性"
-        },
-        {
+        }},
+        {{
             "input": "测试输入2",
             "output": "期望输出2", 
             "description": "这是一个边界情况测试，测试最小值情况"
-        },
+        }},
         ... 更多测试用例
     ]
-}
+}}
 
 务必确保：
 1. 每个测试用例的输入格式严格符合题目要求
@@ -170,32 +209,15 @@ class SimpleProblemGenerator(BaseProblemGenerator):
 4. 包含与题目情景相关的有趣测试用例
 5. 对于大规模数据，保证数据生成的随机性和多样性
 """
+        return prompt
         
-        try:
-            # 调用API获取测试数据
-            response = call_api(prompt)
-            
-            # 使用基类方法解析返回的JSON
-            test_data = self.parse_api_response(response)
-            
-            # 提取测试用例
-            test_cases = test_data.get("test_cases", [])
-            if not test_cases:
-                raise ValueError("API未返回有效的测试用例")
-                
-            # 转换为所需的格式
-            formatted_test_cases = []
-            for case in test_cases:
-                input_data = case.get("input", "").strip()
-                output_data = case.get("output", "").strip()
-                if input_data and output_data:  # 确保输入和输出都不为空
-                    formatted_test_cases.append((input_data, output_data))
-            
-            # 保存测试用例到文件
-            if formatted_test_cases:
-                self.save_test_cases(formatted_test_cases)
-                
-            return formatted_test_cases
-            
-        except Exception as e:
-            raise RuntimeError(f"生成测试数据失败: {str(e)}")
\ No newline at end of file
+    def convert_test_case(self, case: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        将单个测试用例对象转换为(输入, 输出)元组
+        """
+        input_data = case.get("input", "").strip()
+        output_data = case.get("output", "").strip()
+        # 确保输入和输出都不为空；参考程序模式下输出由本地计算
+        if input_data and (output_data or self.use_reference_solution):
+            return (input_data, output_data)
+        return None
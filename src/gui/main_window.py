@@ -19,15 +19,19 @@ from PyQt6.QtGui import QAction, QIcon, QFont, QTextCursor, QIntValidator, QPale
 
 # 当模块处于开发中，使用相对导入
 try:
-    from ..models.problem import Problem, TestCase, SubTask
+    from ..models.problem import Problem
     from .widgets.problem_manager import ProblemManagerDialog
     from ..generators.base_generator import BaseProblemGenerator
+    from ..generators.pipeline import PipelineJob, ProblemPipeline
+    from ..utils.response_cache import response_cache
 except ImportError:
     # 绝对导入作为后备
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-    from src.models.problem import Problem, TestCase, SubTask
+    from src.models.problem import Problem
     from src.gui.widgets.problem_manager import ProblemManagerDialog
     from src.generators.base_generator import BaseProblemGenerator
+    from src.generators.pipeline import PipelineJob, ProblemPipeline
+    from src.utils.response_cache import response_cache
 
 
 class LogRedirector:
@@ -52,89 +56,55 @@ class GeneratorThread(QThread):
     generation_completed = pyqtSignal(Problem)
     generation_failed = pyqtSignal(str)
     
-    def __init__(self, generator: BaseProblemGenerator, description: str, has_subtasks: bool = False, test_cases_count: int = 10):
+    def __init__(self, generator: BaseProblemGenerator, description: str, has_subtasks: bool = False,
+                 test_cases_count: int = 10, use_cache: bool = True, use_reference_solution: bool = False,
+                 use_generator_script: bool = False):
         super().__init__()
         self.generator = generator
         self.description = description
         self.has_subtasks = has_subtasks
         self.test_cases_count = test_cases_count
+        self.use_cache = use_cache
+        self.use_reference_solution = use_reference_solution
+        self.use_generator_script = use_generator_script
         
     def run(self):
         try:
-            # 设置生成器参数
-            self.generator.problem_description = self.description
-            if hasattr(self.generator, 'has_subtasks'):
-                self.generator.has_subtasks = self.has_subtasks
-            if hasattr(self.generator, 'test_cases_count'):
-                self.generator.test_cases_count = self.test_cases_count
-                
-            # 生成题目
-            self.progress_update.emit("正在格式化题目...")
-            problem_data = self.generator.format_problem()
-            if not problem_data:
-                self.generation_failed.emit("题目格式化失败")
-                return
-                
-            # 生成测试数据
-            self.progress_update.emit("正在生成测试数据...")
-            test_cases = self.generator.generate_test_cases()
-            if not test_cases:
-                self.generation_failed.emit("测试数据生成失败")
-                return
-                
-            # 创建Problem对象，使用生成器中已有的题目信息
-            self.progress_update.emit("正在保存题目和测试数据...")
-            problem_obj = Problem(
-                title=problem_data.get("title", "未命名题目"),
-                description=problem_data.get("description", ""),
-                difficulty=problem_data.get("difficulty", 0),
-                time_limit=problem_data.get("time_limit", 1000),
-                memory_limit=problem_data.get("memory_limit", 128),
-                has_subtasks=self.has_subtasks
+            # 流式接收测试数据，每个测试点生成后立即写入磁盘并显示进度
+            self.generator.use_cache = self.use_cache
+            self.generator.stream = True
+            self.generator.use_reference_solution = self.use_reference_solution
+            self.generator.use_generator_script = self.use_generator_script
+            job = PipelineJob(
+                generator=self.generator,
+                description=self.description,
+                has_subtasks=self.has_subtasks,
+                test_cases_count=self.test_cases_count
             )
+            pipeline = ProblemPipeline(on_progress=self.report_progress)
+            result = pipeline.run([job])
+            if not job.succeeded:
+                self.generation_failed.emit(f"生成过程中出错: {job.error}")
+                return
             
-            # 设置题目目录为生成器已创建的目录
-            if self.generator.current_problem_dir:
-                problem_obj.directory = self.generator.current_problem_dir
-                
-            # 添加测试用例，使用生成器中test_cases_dir下已有的文件
-            for i, (input_data, output_data) in enumerate(test_cases, 1):
-                case_id = str(i)
-                if self.has_subtasks and "." in case_id:
-                    group = int(case_id.split(".")[0])
-                else:
-                    group = 0
-                    
-                test_case = TestCase(
-                    case_id=case_id,
-                    input_data=input_data,
-                    output_data=output_data,
-                    group=group
-                )
-                problem_obj.add_test_case(test_case)
-                
-            # 添加子任务信息
-            if self.has_subtasks and "subtasks" in problem_data:
-                for i, subtask_data in enumerate(problem_data["subtasks"], 1):
-                    subtask = SubTask(
-                        task_id=i,
-                        description=subtask_data.get("description", ""),
-                        score=subtask_data.get("score", 0),
-                        test_cases=[str(tc_id) for tc_id in subtask_data.get("test_cases", [])]
-                    )
-                    problem_obj.add_subtask(subtask)
-            
-            # 创建zip包（不重新保存题目文件和测试数据文件，只打包）
-            problem_obj.create_zip_package()
+            if self.use_cache and response_cache.enabled:
+                stats = response_cache.stats()
+                self.progress_update.emit(f"响应缓存: 命中 {stats['hits']} 次，未命中 {stats['misses']} 次")
             
+            self.progress_update.emit(result.summary())
             self.progress_update.emit("生成完成!")
-            self.generation_completed.emit(problem_obj)
+            self.generation_completed.emit(job.problem)
             
         except Exception as e:
             error_msg = f"生成过程中出错: {str(e)}\n{traceback.format_exc()}"
             self.generation_failed.emit(error_msg)
 
 
+    def report_progress(self, job: PipelineJob, message: str):
+        """流水线各阶段的进度消息，在流水线工作线程中调用"""
+        self.progress_update.emit(message)
+
+
 class ApiKeyDialog(QDialog):
     """API密钥配置对话框"""
     def __init__(self, parent=None, current_key=""):
@@ -322,6 +292,24 @@ class MainWindow(QMainWindow):
         test_cases_layout.addStretch()  # 添加弹性空间，使组件左对齐
         
         left_options.addLayout(test_cases_layout)
+        
+        # 跳过缓存选项
+        self.no_cache_checkbox = QCheckBox("跳过缓存")
+        self.no_cache_checkbox.setObjectName("optionCheckBox")
+        self.no_cache_checkbox.setToolTip("不使用本地缓存的API响应，强制重新生成")
+        left_options.addWidget(self.no_cache_checkbox)
+        
+        # 参考程序选项
+        self.reference_solution_checkbox = QCheckBox("参考程序计算输出")
+        self.reference_solution_checkbox.setObjectName("optionCheckBox")
+        self.reference_solution_checkbox.setToolTip("让模型编写C++参考程序，在本地编译运行以计算每个测试点的输出")
+        left_options.addWidget(self.reference_solution_checkbox)
+        
+        # 数据生成器选项
+        self.generator_script_checkbox = QCheckBox("生成器产生大数据")
+        self.generator_script_checkbox.setObjectName("optionCheckBox")
+        self.generator_script_checkbox.setToolTip("让模型编写数据生成器，在本地运行生成接近数据范围上限的测试输入（同时使用参考程序计算输出）")
+        left_options.addWidget(self.generator_script_checkbox)
         options_layout.addLayout(left_options)
         
         options_layout.addStretch()
@@ -654,7 +642,10 @@ class MainWindow(QMainWindow):
                 generator=generator,
                 description=description,
                 has_subtasks=False,  # 始终为False
-                test_cases_count=test_cases_count
+                test_cases_count=test_cases_count,
+                use_cache=not self.no_cache_checkbox.isChecked(),
+                use_reference_solution=self.reference_solution_checkbox.isChecked(),
+                use_generator_script=self.generator_script_checkbox.isChecked()
             )
             
             # 连接信号
@@ -831,6 +822,15 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage(f"切换主题失败: {str(e)}")
             print(f"切换主题时发生错误: {str(e)}")
 
+    def closeEvent(self, event):
+        """关闭事件，释放共享的API连接池"""
+        try:
+            from ..utils.api_utils import session_manager
+        except ImportError:
+            from src.utils.api_utils import session_manager
+        session_manager.close()
+        super().closeEvent(event)
+
     def fade_in_animation(self):
         """窗口渐入动画"""
         self.animation = QPropertyAnimation(self, b"windowOpacity")
@@ -0,0 +1,256 @@
+"""
+测试数据查看器 - 大文件基于mmap分页只读显示，小文件可以直接编辑
+"""
+import os
+import sys
+from typing import Callable, Optional
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QLabel, QPushButton, QSpinBox
+)
+from PyQt6.QtGui import QFont, QTextCursor
+
+# 当模块处于开发中，使用相对导入
+try:
+    from ...utils.line_index import LineIndex
+except ImportError:
+    # 绝对导入作为后备
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+    from src.utils.line_index import LineIndex
+
+PAGE_LINES = 1000  # 分页显示时每页的行数
+PAGE_BYTES = 512 * 1024  # 每页最多显示的字节数，超长的行在此截断
+AUTO_EDIT_SIZE = 256 * 1024  # 不超过该大小的数据直接完整显示并可编辑
+EDIT_SIZE_LIMIT = 8 * 1024 * 1024  # 允许切换到编辑模式的最大数据大小
+
+
+class TestDataViewer(QWidget):
+    """
+    测试数据查看器
+
+    小数据与原先一样完整显示并可直接编辑。较大的数据以只读方式分页显示：行索引建立在
+    TestCase.input_view() / output_view() 返回的mmap视图上，每次只解码并显示当前一页，
+    可以跳到开头、结尾或指定行；不超过 EDIT_SIZE_LIMIT 的数据可以点击“编辑”完整载入后修改。
+
+    是否修改由文档的修改标志判断，切换测试点时不再把整个编辑器内容与原数据逐字比较。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._size = 0  # 当前数据的字节数
+        self._read_text: Optional[Callable[[], str]] = None  # 完整读取数据的函数
+        self._index: Optional[LineIndex] = None  # 分页模式下的行索引，持有数据视图
+        self._first_line = 0  # 当前页的起始行（从0开始）
+        self._editing = False
+        self.init_ui()
+        self.clear()
+
+    def init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        self.editor = QPlainTextEdit()
+        self.editor.setFont(QFont("Consolas", 10))
+        self.editor.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        layout.addWidget(self.editor)
+
+        self.info_label = QLabel()
+        self.info_label.setObjectName("viewerInfoLabel")
+        layout.addWidget(self.info_label)
+
+        nav_layout = QHBoxLayout()
+        nav_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.head_button = QPushButton("开头")
+        self.head_button.setToolTip("显示开头部分")
+        self.head_button.clicked.connect(self.show_head)
+        nav_layout.addWidget(self.head_button)
+
+        self.prev_button = QPushButton("上一页")
+        self.prev_button.clicked.connect(lambda: self.show_page(self._first_line - PAGE_LINES))
+        nav_layout.addWidget(self.prev_button)
+
+        self.line_spin = QSpinBox()
+        self.line_spin.setPrefix("行 ")
+        self.line_spin.setMinimum(1)
+        self.line_spin.setKeyboardTracking(False)
+        self.line_spin.lineEdit().returnPressed.connect(lambda: self.jump_to_line(self.line_spin.value()))
+        nav_layout.addWidget(self.line_spin, 1)
+
+        self.jump_button = QPushButton("跳转")
+        self.jump_button.clicked.connect(lambda: self.jump_to_line(self.line_spin.value()))
+        nav_layout.addWidget(self.jump_button)
+
+        self.next_button = QPushButton("下一页")
+        self.next_button.clicked.connect(lambda: self.show_page(self._first_line + PAGE_LINES))
+        nav_layout.addWidget(self.next_button)
+
+        self.tail_button = QPushButton("结尾")
+        self.tail_button.setToolTip("显示结尾部分")
+        self.tail_button.clicked.connect(self.show_tail)
+        nav_layout.addWidget(self.tail_button)
+
+        self.edit_button = QPushButton("编辑")
+        self.edit_button.setToolTip(f"完整载入数据进行编辑（不超过 {EDIT_SIZE_LIMIT // 1024 // 1024} MB）")
+        self.edit_button.clicked.connect(self.start_editing)
+        nav_layout.addWidget(self.edit_button)
+
+        layout.addLayout(nav_layout)
+
+    def setObjectName(self, name: str) -> None:
+        # 样式表按名称匹配文本框
+        super().setObjectName(name)
+        self.editor.setObjectName(name)
+
+    def load(self, view, read_text: Callable[[], str]) -> None:
+        """
+        显示一份测试数据
+
+        参数:
+            view: 数据的字节视图，大数据分页显示时只从中读取当前页
+            read_text: 完整读取数据文本的函数，进入编辑模式时调用
+        """
+        self.clear()
+        self._size = len(view)
+        self._read_text = read_text
+        if self._size <= AUTO_EDIT_SIZE:
+            self.start_editing()
+        else:
+            self._index = LineIndex(view)
+            self.line_spin.setMaximum(max(1, self._index.line_count))
+            self.show_page(0)
+
+    def clear(self) -> None:
+        """清空显示并释放对数据视图的引用"""
+        self._size = 0
+        self._read_text = None
+        self._index = None
+        self._first_line = 0
+        self._editing = False
+        self.editor.setReadOnly(False)
+        self.editor.clear()
+        self.editor.document().setModified(False)
+        self.info_label.clear()
+        self.line_spin.setMaximum(1)
+        self._update_buttons()
+
+    @property
+    def is_editing(self) -> bool:
+        """数据是否已完整载入并可编辑"""
+        return self._editing
+
+    @property
+    def is_modified(self) -> bool:
+        """编辑模式下文档是否被修改过"""
+        return self._editing and self.editor.document().isModified()
+
+    def set_modified(self, modified: bool) -> None:
+        """设置文档的修改标志，修改已取走后调用 set_modified(False)"""
+        self.editor.document().setModified(modified)
+
+    def text(self) -> str:
+        """编辑器中的完整文本，只应在编辑模式下调用"""
+        return self.editor.toPlainText()
+
+    def show_head(self) -> None:
+        """显示开头部分"""
+        if self._editing:
+            self.editor.moveCursor(QTextCursor.MoveOperation.Start)
+        else:
+            self.show_page(0)
+
+    def show_tail(self) -> None:
+        """显示结尾部分"""
+        if self._editing:
+            self.editor.moveCursor(QTextCursor.MoveOperation.End)
+        elif self._index is not None:
+            self.show_page(self._index.line_count - PAGE_LINES)
+
+    def jump_to_line(self, line: int) -> None:
+        """
+        跳转到指定行
+
+        参数:
+            line: 行号（从1开始）
+        """
+        if self._editing:
+            block = self.editor.document().findBlockByNumber(max(0, line - 1))
+            if block.isValid():
+                self.editor.setTextCursor(QTextCursor(block))
+                self.editor.centerCursor()
+            return
+        if self._index is None:
+            return
+        # 目标行放在页面的前部，上方保留几行上下文
+        line = max(0, min(line - 1, self._index.line_count - 1))
+        self.show_page(line - 10, highlight_line=line)
+
+    def show_page(self, first_line: int, highlight_line: Optional[int] = None) -> None:
+        """
+        分页模式下显示从 first_line 开始的一页
+
+        参数:
+            first_line: 起始行号（从0开始）
+            highlight_line: 需要移动光标到的行号
+        """
+        if self._index is None:
+            return
+        first_line = max(0, min(first_line, self._index.line_count - PAGE_LINES))
+        text, lines, truncated = self._index.window(first_line, PAGE_LINES, PAGE_BYTES)
+        self._first_line = first_line
+        self.editor.setReadOnly(True)
+        self.editor.setPlainText(text)
+        self.editor.document().setModified(False)
+
+        if highlight_line is not None:
+            block = self.editor.document().findBlockByNumber(highlight_line - first_line)
+            if block.isValid():
+                self.editor.setTextCursor(QTextCursor(block))
+                self.editor.centerCursor()
+        self.line_spin.blockSignals(True)
+        self.line_spin.setValue((highlight_line if highlight_line is not None else first_line) + 1)
+        self.line_spin.blockSignals(False)
+
+        last_line = first_line + max(lines, 1)
+        info = (f"{_format_size(self._index.size)}，共 {self._index.line_count} 行，"
+                f"显示第 {first_line + 1}-{last_line} 行（只读）")
+        if truncated:
+            info += f"，本页超过 {PAGE_BYTES // 1024} KB 已截断"
+        self.info_label.setText(info)
+        self._update_buttons()
+
+    def start_editing(self) -> None:
+        """完整载入数据并切换到编辑模式"""
+        if self._read_text is None or self._size > EDIT_SIZE_LIMIT:
+            return
+        text = self._read_text()
+        # 不再需要数据视图，测试用例可以关闭mmap
+        self._index = None
+        self._editing = True
+        self.editor.setReadOnly(False)
+        self.editor.setPlainText(text)
+        self.editor.document().setModified(False)
+        self.line_spin.setMaximum(max(1, self.editor.document().blockCount()))
+        self.info_label.setText(f"{_format_size(self._size)}，共 {self.editor.document().blockCount()} 行")
+        self._update_buttons()
+
+    def _update_buttons(self) -> None:
+        paged = self._index is not None
+        # 直接完整显示的小数据不需要导航栏
+        show_nav = paged or (self._editing and self._size > AUTO_EDIT_SIZE)
+        for widget in (self.info_label, self.head_button, self.tail_button, self.line_spin, self.jump_button):
+            widget.setVisible(show_nav)
+        for widget in (self.prev_button, self.next_button, self.edit_button):
+            widget.setVisible(paged)
+        self.prev_button.setEnabled(paged and self._first_line > 0)
+        self.next_button.setEnabled(paged and self._first_line + PAGE_LINES < self._index.line_count)
+        self.edit_button.setEnabled(paged and self._size <= EDIT_SIZE_LIMIT)
+
+def _format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} 字节"
@@ -0,0 +1,311 @@
+"""
+题目列表模型 - 按需分页读取题库索引的列表模型，以及把排序和筛选交给索引完成的代理模型
+"""
+import os
+import sys
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+
+# 当模块处于开发中，使用相对导入
+try:
+    from ...models.problem import Problem
+    from ...models.problem_index import SORT_COLUMNS, get_problem_index
+except ImportError:
+    # 绝对导入作为后备
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+    from src.models.problem import Problem
+    from src.models.problem_index import SORT_COLUMNS, get_problem_index
+
+# 自定义数据角色
+PROBLEM_DATA_ROLE = Qt.ItemDataRole.UserRole + 1  # 题目信息字典
+DIRECTORY_ROLE = Qt.ItemDataRole.UserRole + 2  # 题目目录
+
+PAGE_SIZE = 200  # 每次从数据源读取的题目数
+DETAIL_CACHE_SIZE = 5000  # 内存中最多保留的题目信息条数
+
+
+class ProblemIndexSource:
+    """题库索引数据源：ID列表一次读出，题目详情按页读取"""
+
+    def __init__(self, base_dir: str = "problems"):
+        self.base_dir = base_dir
+        self.index = get_problem_index(base_dir)
+
+    def refresh(self) -> None:
+        """与题库目录对账，只重新读取发生变化的题目"""
+        self.index.reconcile()
+
+    def ids(self, sort_by: str, descending: bool, search: str) -> List[str]:
+        return self.index.ids(sort_by, descending, search)
+
+    def fetch(self, problem_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return self.index.get(problem_ids)
+
+    def update(self, problem_dir: str) -> None:
+        self.index.update(problem_dir)
+
+
+class ProblemScanSource:
+    """索引不可用时的后备数据源：扫描全部题目目录，在内存中排序和筛选"""
+
+    def __init__(self, base_dir: str = "problems"):
+        self.base_dir = base_dir
+        self._problems: Dict[str, Dict[str, Any]] = {}
+
+    def refresh(self) -> None:
+        problems = Problem._scan_problems(self.base_dir) if os.path.isdir(self.base_dir) else []
+        self._problems = {problem["id"]: problem for problem in problems}
+
+    def ids(self, sort_by: str, descending: bool, search: str) -> List[str]:
+        search = search.lower()
+        problems = [problem for problem in self._problems.values()
+                    if not search or search in str(problem.get("title", "")).lower()]
+        # 与索引一致：先按ID排序，再按排序字段稳定排序
+        problems.sort(key=lambda problem: problem["id"])
+        problems.sort(key=lambda problem: problem.get(sort_by) or 0, reverse=descending)
+        return [problem["id"] for problem in problems]
+
+    def fetch(self, problem_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {problem_id: self._problems[problem_id] for problem_id in problem_ids if problem_id in self._problems}
+
+    def update(self, problem_dir: str) -> None:
+        self.refresh()
+
+
+class ProblemListModel(QAbstractListModel):
+    """
+    题目列表模型
+
+    只在内存中保存按当前排序排列的题目ID列表和 ID→行号 的字典，
+    题目标题等信息在视图请求某一行时按页从数据源读取，并以LRU方式缓存，
+    因此打开含上万道题目的题库时不需要为每道题目创建列表项。
+    刷新时将新的ID列表与当前列表比较，只对删除、插入和顺序变化的行发出相应的信号，
+    视图中的选中项和滚动位置得以保留。
+    """
+
+    def __init__(self, base_dir: str = "problems", parent=None):
+        """
+        参数:
+            base_dir: 题库目录
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.base_dir = base_dir
+        self.source = ProblemIndexSource(base_dir)
+        self.sort_by = "modified_at"
+        self.descending = True
+        self.search = ""
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}  # 题目ID: 行号
+        self._details: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ids)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or not 0 <= index.row() < len(self._ids):
+            return None
+        if role == DIRECTORY_ROLE:
+            # 不需要读取题目详情
+            return self.directory(index.row())
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole, PROBLEM_DATA_ROLE):
+            return None
+
+        problem = self.problem_at(index.row())
+        if role == PROBLEM_DATA_ROLE:
+            return problem
+        if problem is None:
+            # 题目已被删除但列表尚未刷新
+            return self._ids[index.row()] if role == Qt.ItemDataRole.DisplayRole else None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return problem["title"]
+        modified = datetime.fromtimestamp(problem["modified_at"]).strftime('%Y-%m-%d %H:%M:%S')
+        return f"路径: {problem['directory']}\n修改时间: {modified}"
+
+    def problem_at(self, row: int) -> Optional[Dict[str, Any]]:
+        """返回指定行的题目信息，不在缓存中时读取该行所在的整页"""
+        problem_id = self._ids[row]
+        problem = self._details.get(problem_id)
+        if problem is None:
+            self._fetch_page(row)
+            problem = self._details.get(problem_id)
+        else:
+            self._details.move_to_end(problem_id)
+        return problem
+
+    def directory(self, row: int) -> str:
+        """返回指定行的题目目录"""
+        return os.path.join(self.base_dir, self._ids[row])
+
+    def row_of(self, problem_dir: str) -> int:
+        """返回题目目录所在的行号，不在列表中时返回-1"""
+        return self._rows.get(os.path.basename(os.path.normpath(problem_dir)), -1)
+
+    def index_of(self, problem_dir: str) -> QModelIndex:
+        """返回题目目录对应的模型索引，不在列表中时返回无效索引"""
+        row = self.row_of(problem_dir)
+        return self.index(row, 0) if row >= 0 else QModelIndex()
+
+    def set_sort(self, sort_by: str, descending: bool = True) -> None:
+        """按指定字段排序，见 problem_index.SORT_COLUMNS"""
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"不支持的排序字段: {sort_by}")
+        if (sort_by, descending) != (self.sort_by, self.descending):
+            self.sort_by, self.descending = sort_by, descending
+            self._apply_ids(self._query_ids())
+
+    def set_search(self, search: str) -> None:
+        """只显示标题包含 search 的题目"""
+        if search != self.search:
+            self.search = search
+            self._apply_ids(self._query_ids())
+
+    def refresh(self) -> None:
+        """与题库目录对账后增量更新列表"""
+        self._call(lambda: self.source.refresh())
+        ids = self._query_ids()
+        # 题目信息可能已变化，丢弃缓存，视图会重新读取可见行
+        self._details.clear()
+        self._apply_ids(ids)
+        if self._ids:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._ids) - 1, 0))
+
+    def refresh_problem(self, problem_dir: str) -> None:
+        """重新读取单个题目的信息，题目是新增的则插入列表"""
+        self.refresh_problems([problem_dir])
+
+    def refresh_problems(self, problem_dirs: List[str]) -> None:
+        """
+        重新读取若干题目的信息并更新索引，新增的题目插入列表，目录已不存在的题目从列表中移除
+
+        只重新查询一次ID列表，适合文件监视器合并后的一批变化
+        """
+        new_or_removed = False
+        for problem_dir in problem_dirs:
+            self._call(lambda: self.source.update(problem_dir))
+            problem_id = os.path.basename(os.path.normpath(problem_dir))
+            self._details.pop(problem_id, None)
+            row = self._rows.get(problem_id, -1)
+            if row < 0 or not os.path.isdir(problem_dir):
+                new_or_removed = True
+            else:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+        if new_or_removed:
+            self._apply_ids(self._query_ids())
+
+    def remove_problem(self, problem_dir: str) -> None:
+        """从列表中移除一个题目，不重新查询数据源"""
+        row = self.row_of(problem_dir)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        problem_id = self._ids.pop(row)
+        self._details.pop(problem_id, None)
+        self._rebuild_rows()
+        self.endRemoveRows()
+
+    def _query_ids(self) -> List[str]:
+        return self._call(lambda: self.source.ids(self.sort_by, self.descending, self.search))
+
+    def _fetch_page(self, row: int) -> None:
+        start = row - row % PAGE_SIZE
+        missing = [problem_id for problem_id in self._ids[start:start + PAGE_SIZE] if problem_id not in self._details]
+        self._details.update(self._call(lambda: self.source.fetch(missing)))
+        while len(self._details) > DETAIL_CACHE_SIZE:
+            self._details.popitem(last=False)
+
+    def _call(self, operation):
+        """调用数据源，索引不可用时改为扫描题目目录"""
+        try:
+            return operation()
+        except (sqlite3.Error, OSError) as e:
+            if isinstance(self.source, ProblemScanSource):
+                raise
+            print(f"读取题库索引失败，改为扫描题目目录: {str(e)}")
+            self.source = ProblemScanSource(self.base_dir)
+            self.source.refresh()
+            return operation()
+
+    def _apply_ids(self, new_ids: List[str]) -> None:
+        """将当前ID列表增量更新为 new_ids：依次处理删除、顺序变化和插入"""
+        new_set = set(new_ids)
+
+        # 1. 删除不再出现的题目，按连续区间从后往前删除
+        removed = [row for row, problem_id in enumerate(self._ids) if problem_id not in new_set]
+        for first, last in reversed(_ranges(removed)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._ids[first:last + 1]
+            self.endRemoveRows()
+
+        # 2. 保留下来的题目与新顺序不一致时整体重排，持久索引（选中项）随之移动
+        kept = set(self._ids)
+        target = [problem_id for problem_id in new_ids if problem_id in kept]
+        if target != self._ids:
+            self.layoutAboutToBeChanged.emit()
+            old_ids = self._ids
+            new_rows = {problem_id: row for row, problem_id in enumerate(target)}
+            persistent = self.persistentIndexList()
+            self._ids = target
+            self.changePersistentIndexList(
+                persistent, [self.index(new_rows[old_ids[index.row()]], 0) for index in persistent]
+            )
+            self.layoutChanged.emit()
+
+        # 3. 插入新题目：保留的题目已与新顺序一致，新列表中对不上的位置都是新增
+        row = 0
+        while row < len(new_ids):
+            if row < len(self._ids) and self._ids[row] == new_ids[row]:
+                row += 1
+                continue
+            end = row
+            while end < len(new_ids) and new_ids[end] not in kept:
+                end += 1
+            self.beginInsertRows(QModelIndex(), row, end - 1)
+            self._ids[row:row] = new_ids[row:end]
+            self.endInsertRows()
+            row = end
+
+        self._rebuild_rows()
+
+    def _rebuild_rows(self) -> None:
+        self._rows = {problem_id: row for row, problem_id in enumerate(self._ids)}
+
+
+class ProblemSortFilterProxyModel(QSortFilterProxyModel):
+    """
+    题目列表的排序和筛选代理
+
+    排序和按标题筛选下推给源模型，在题库索引中用 ORDER BY / LIKE 完成，
+    代理自身不逐行比较，因此不会为了排序而读取全部题目的信息，源模型的分页加载得以保留。
+    视图只与代理交互，以后增加只能在内存中判断的筛选条件时在这里实现 filterAcceptsRow。
+    """
+
+    def sourceModel(self) -> ProblemListModel:
+        return super().sourceModel()
+
+    def set_sort_key(self, sort_by: str, descending: bool = True) -> None:
+        """按题库索引中的字段排序"""
+        self.sourceModel().set_sort(sort_by, descending)
+
+    def set_filter_text(self, text: str) -> None:
+        """只显示标题包含 text 的题目"""
+        self.sourceModel().set_search(text.strip())
+
+    def index_of(self, problem_dir: str) -> QModelIndex:
+        """返回题目目录对应的代理索引"""
+        return self.mapFromSource(self.sourceModel().index_of(problem_dir))
+
+
+def _ranges(rows: List[int]) -> List[tuple]:
+    """将升序行号列表合并为 (起始行, 结束行) 连续区间"""
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
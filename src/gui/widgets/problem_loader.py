@@ -0,0 +1,161 @@
+"""
+题目加载器 - 在线程池中分阶段加载题目，新的请求取消旧的请求，已缓存的题目直接返回
+"""
+import os
+import sys
+import threading
+from typing import Optional
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+# 当模块处于开发中，使用相对导入
+try:
+    from ...models.problem import Problem
+    from ...models.problem_cache import ProblemCache, problem_cache
+except ImportError:
+    # 绝对导入作为后备
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+    from src.models.problem import Problem
+    from src.models.problem_cache import ProblemCache, problem_cache
+
+
+class _LoadSignals(QObject):
+    """工作线程发出的信号，都带有请求编号，由加载器过滤掉过期的结果"""
+    stage_loaded = pyqtSignal(int, str, object)  # 请求编号, 阶段, 题目
+    failed = pyqtSignal(int, str)  # 请求编号, 错误信息
+
+
+class ProblemLoadTask(QRunnable):
+    """在线程池中运行的单次加载请求"""
+
+    def __init__(self, request_id: int, problem_dir: str, signals: _LoadSignals,
+                 cache: Optional[ProblemCache] = None):
+        """
+        参数:
+            request_id: 请求编号
+            problem_dir: 题目目录
+            signals: 用于回报结果的信号对象
+            cache: 加载完成后放入的题目缓存
+        """
+        super().__init__()
+        self.request_id = request_id
+        self.problem_dir = problem_dir
+        self.signals = signals
+        self.cache = cache
+        self.cancelled = threading.Event()
+
+    def run(self) -> None:
+        try:
+            # 签名在读取文件之前记录，加载期间发生的修改会让缓存在下次读取时失效
+            signature = self.cache.signature(self.problem_dir) if self.cache else None
+            for stage, problem in Problem.load_stages(self.problem_dir, self.cancelled.is_set):
+                if stage == "test_cases" and self.cache:
+                    # 已完整加载的题目即使请求已被取消也放入缓存，再次选中时可以直接显示
+                    self.cache.put(self.problem_dir, problem, signature)
+                if self.cancelled.is_set():
+                    return
+                self.signals.stage_loaded.emit(self.request_id, stage, problem)
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.signals.failed.emit(self.request_id, str(e))
+
+
+class ProblemLoader(QObject):
+    """
+    题目加载器
+
+    每次 load 都会取消上一个请求：尚未开始的任务直接从线程池中移除，正在运行的任务在下一个阶段
+    或下一个测试用例之前停止；已经发出、还在事件队列中的结果按请求编号丢弃。
+    因此在题目列表中快速切换时，界面只会显示最后选中的题目。
+
+    加载分三个阶段，每个阶段结束时发出对应的信号：
+        metadata_loaded     标题、难度、限制和子任务
+        description_loaded  题目描述
+        problem_loaded      测试用例列表，题目加载完成
+    各信号传递的是同一个 Problem 对象，前两个阶段时它仍在被工作线程填充，只应读取已完成的部分。
+    缓存中有文件未变化的题目时不启动任务，在 load 中直接依次发出三个信号。
+    """
+
+    metadata_loaded = pyqtSignal(object)
+    description_loaded = pyqtSignal(object)
+    problem_loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None, cache: Optional[ProblemCache] = problem_cache):
+        """
+        参数:
+            parent: 父对象
+            cache: 题目缓存，为None时每次都从文件加载
+        """
+        super().__init__(parent)
+        self.cache = cache
+        # 使用独立的单线程池：同一时间只需要加载一个题目，也不占用全局线程池
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._signals = _LoadSignals(self)
+        self._signals.stage_loaded.connect(self._on_stage_loaded)
+        self._signals.failed.connect(self._on_failed)
+        self._request_id = 0
+        # 当前请求的取消标志。任务对象交给线程池，运行结束后由线程池删除，这里只保留取消标志
+        self._cancelled: Optional[threading.Event] = None
+
+    @property
+    def is_loading(self) -> bool:
+        """是否有尚未完成的加载请求"""
+        return self._cancelled is not None
+
+    def load(self, problem_dir: str) -> int:
+        """
+        在后台加载题目，取消之前的请求
+
+        参数:
+            problem_dir: 题目目录
+
+        返回:
+            请求编号
+        """
+        self.cancel()
+        self._request_id += 1
+        problem = self.cache.get(problem_dir) if self.cache else None
+        if problem is not None:
+            for stage in ("metadata", "description", "test_cases"):
+                self._on_stage_loaded(self._request_id, stage, problem)
+            return self._request_id
+        task = ProblemLoadTask(self._request_id, problem_dir, self._signals, self.cache)
+        self._cancelled = task.cancelled
+        self.pool.start(task)
+        return self._request_id
+
+    def cancel(self) -> None:
+        """取消当前请求，之后到达的结果都会被丢弃"""
+        if self._cancelled is not None:
+            self._cancelled.set()
+            self._cancelled = None
+        # 移除排队中尚未开始的任务
+        self.pool.clear()
+        self._request_id += 1
+
+    def shutdown(self) -> None:
+        """取消当前请求并等待工作线程退出，在对话框关闭时调用"""
+        self.cancel()
+        self.pool.waitForDone()
+
+    @pyqtSlot(int, str, object)
+    def _on_stage_loaded(self, request_id: int, stage: str, problem: Problem) -> None:
+        if request_id != self._request_id:
+            # 过期请求的结果
+            return
+        if stage == "metadata":
+            self.metadata_loaded.emit(problem)
+        elif stage == "description":
+            self.description_loaded.emit(problem)
+        else:
+            self._cancelled = None
+            self.problem_loaded.emit(problem)
+
+    @pyqtSlot(int, str)
+    def _on_failed(self, request_id: int, message: str) -> None:
+        if request_id != self._request_id:
+            return
+        self._cancelled = None
+        self.failed.emit(message)
@@ -3,14 +3,11 @@
 """
 import os
 import sys
-import zipfile
-import shutil
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List
 
 from PyQt6.QtWidgets import (
     QDialog, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QTextEdit, QLabel, QListWidget, QListWidgetItem, QPushButton,
+    QTextEdit, QLabel, QListWidget, QListWidgetItem, QListView, QPushButton,
     QTabWidget, QMessageBox, QFileDialog, QGroupBox,
     QTreeWidget, QTreeWidgetItem, QFrame, QScrollArea,
     QSpinBox, QComboBox, QLineEdit
@@ -21,10 +18,26 @@ from PyQt6.QtGui import QIcon, QFont, QTextCursor, QKeySequence, QShortcut
 # 当模块处于开发中，使用相对导入
 try:
     from ...models.problem import Problem, TestCase, SubTask
+    from ...utils.zip_packager import package_test_cases
+    from .problem_list_model import (
+        ProblemListModel, ProblemSortFilterProxyModel, PROBLEM_DATA_ROLE, DIRECTORY_ROLE
+    )
+    from .problem_loader import ProblemLoader
+    from .problem_watcher import ProblemWatcher
+    from ...models.problem_cache import problem_cache
+    from .data_viewer import TestDataViewer
 except ImportError:
     # 绝对导入作为后备
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
     from src.models.problem import Problem, TestCase, SubTask
+    from src.utils.zip_packager import package_test_cases
+    from src.gui.widgets.problem_list_model import (
+        ProblemListModel, ProblemSortFilterProxyModel, PROBLEM_DATA_ROLE, DIRECTORY_ROLE
+    )
+    from src.gui.widgets.problem_loader import ProblemLoader
+    from src.gui.widgets.problem_watcher import ProblemWatcher
+    from src.models.problem_cache import problem_cache
+    from src.gui.widgets.data_viewer import TestDataViewer
 
 try:
     # 尝试导入图标缓存
@@ -43,14 +56,6 @@ except ImportError:
     SEARCH_ICON_NAME = ""
 
 
-class ProblemListItem(QListWidgetItem):
-    """自定义题目列表项"""
-    def __init__(self, problem_data: Dict[str, Any]):
-        super().__init__(problem_data["title"])
-        self.problem_data = problem_data
-        self.setToolTip(f"路径: {problem_data['directory']}\n修改时间: {datetime.fromtimestamp(problem_data['modified_at']).strftime('%Y-%m-%d %H:%M:%S')}")
-
-
 class TestCaseListItem(QListWidgetItem):
     """自定义测试用例列表项"""
     def __init__(self, case_id: str, group: int = 0):
@@ -78,12 +83,23 @@ class ProblemManagerDialog(QDialog):
         # 当前编辑的测试用例ID
         self.current_test_case_id: Optional[str] = None
         
+        # 后台加载题目，只显示最后一次选中的题目
+        self.problem_loader = ProblemLoader(self)
+        self.problem_loader.metadata_loaded.connect(self.on_problem_metadata_loaded)
+        self.problem_loader.description_loaded.connect(self.on_problem_description_loaded)
+        self.problem_loader.problem_loaded.connect(self.on_problem_loaded)
+        self.problem_loader.failed.connect(self.on_problem_load_failed)
+        
         # 初始化UI
         self.init_ui()
         
         # 添加快捷键
         self.setup_shortcuts()
         
+        # 监视题库目录，其他进程生成或删除的题目实时出现在列表中
+        self.problem_watcher = ProblemWatcher("problems", self)
+        self.problem_watcher.problems_changed.connect(self.on_problems_changed)
+        
         # 加载题目列表
         self.refresh_problem_list()
         
@@ -91,9 +107,8 @@ class ProblemManagerDialog(QDialog):
         if initial_problem_dir:
             self.load_specific_problem(initial_problem_dir)
         # 否则加载第一个题目（如果有）
-        elif self.problem_list.count() > 0:
-            self.problem_list.setCurrentRow(0)
-            self.load_problem_details()
+        elif self.problem_model.rowCount() > 0:
+            self.problem_list.setCurrentIndex(self.problem_proxy.index(0, 0))
             
     def init_ui(self):
         """初始化UI"""
@@ -143,12 +158,38 @@ class ProblemManagerDialog(QDialog):
         list_label.setObjectName("sectionTitle")
         left_layout.addWidget(list_label)
         
-        # 题目列表
-        self.problem_list = QListWidget()
+        # 题目搜索和排序
+        self.problem_search = QLineEdit()
+        self.problem_search.setObjectName("searchBox")
+        self.problem_search.setPlaceholderText("搜索题目...")
+        self.problem_search.setClearButtonEnabled(True)
+        left_layout.addWidget(self.problem_search)
+        
+        self.problem_sort = QComboBox()
+        self.problem_sort.setObjectName("sortBox")
+        for text, sort_by, descending in (("最近修改", "modified_at", True), ("标题", "title", False),
+                                          ("难度", "difficulty", False), ("测试点数量", "case_count", True),
+                                          ("数据大小", "total_bytes", True)):
+            self.problem_sort.addItem(text, (sort_by, descending))
+        left_layout.addWidget(self.problem_sort)
+        
+        # 题目列表 - 模型只保存题目ID，标题等信息按页从题库索引读取
+        self.problem_model = ProblemListModel("problems", self)
+        self.problem_proxy = ProblemSortFilterProxyModel(self)
+        self.problem_proxy.setSourceModel(self.problem_model)
+        self.problem_search.textChanged.connect(self.problem_proxy.set_filter_text)
+        self.problem_sort.currentIndexChanged.connect(
+            lambda: self.problem_proxy.set_sort_key(*self.problem_sort.currentData())
+        )
+        
+        self.problem_list = QListView()
         self.problem_list.setObjectName("modernList")
         self.problem_list.setMinimumWidth(200)
         self.problem_list.setAlternatingRowColors(True)
-        self.problem_list.currentItemChanged.connect(self.load_problem_details)
+        # 行高一致时视图不需要逐行测量，只为可见行请求数据
+        self.problem_list.setUniformItemSizes(True)
+        self.problem_list.setModel(self.problem_proxy)
+        self.problem_list.selectionModel().currentChanged.connect(self.load_problem_details)
         left_layout.addWidget(self.problem_list)
         
         # 题目列表操作按钮
@@ -299,10 +340,9 @@ class ProblemManagerDialog(QDialog):
         input_layout = QVBoxLayout(input_group)
         input_layout.setContentsMargins(10, 15, 10, 10)
         
-        self.input_editor = QTextEdit()
+        # 大数据分页只读显示，不一次性放入编辑器
+        self.input_editor = TestDataViewer()
         self.input_editor.setObjectName("inputEditor")
-        self.input_editor.setFont(QFont("Consolas", 10))
-        self.input_editor.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
         input_layout.addWidget(self.input_editor)
         
         io_splitter.addWidget(input_group)
@@ -313,10 +353,9 @@ class ProblemManagerDialog(QDialog):
         output_layout = QVBoxLayout(output_group)
         output_layout.setContentsMargins(10, 15, 10, 10)
         
-        self.output_editor = QTextEdit()
+        # 大数据分页只读显示，不一次性放入编辑器
+        self.output_editor = TestDataViewer()
         self.output_editor.setObjectName("outputEditor")
-        self.output_editor.setFont(QFont("Consolas", 10))
-        self.output_editor.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
         output_layout.addWidget(self.output_editor)
         
         io_splitter.addWidget(output_group)
@@ -346,6 +385,11 @@ class ProblemManagerDialog(QDialog):
         
         bottom_layout.addStretch()
         
+        # 题目缓存统计，用于诊断
+        self.cache_label = QLabel()
+        self.cache_label.setObjectName("statusLabel")
+        bottom_layout.addWidget(self.cache_label)
+        
         # 底部按钮 - 移除更新打包文件按钮，合并两个功能
         self.save_button = QPushButton("保存修改")
         self.save_button.setObjectName("primaryButton")
@@ -394,53 +438,35 @@ class ProblemManagerDialog(QDialog):
         if self.current_problem and self.tab_widget.currentIndex() == 1:
             self.test_case_search.setFocus()
             
+    def current_problem_dir(self) -> Optional[str]:
+        """返回题目列表中当前选中的题目目录"""
+        index = self.problem_list.currentIndex()
+        return index.data(DIRECTORY_ROLE) if index.isValid() else None
+        
     def refresh_problem_list(self):
         """刷新题目列表"""
-        # 保存当前选中的项目目录
-        current_dir = None
-        if self.problem_list.currentItem():
-            item = self.problem_list.currentItem()
-            if isinstance(item, ProblemListItem):
-                current_dir = item.problem_data["directory"]
+        # 增量更新模型，选中项由模型的持久索引保留
+        self.problem_model.refresh()
         
-        # 清空列表
-        self.problem_list.clear()
-        
-        # 加载题目列表
-        problems = Problem.list_problems()
+        # 题库目录可能在对话框打开后才创建
+        self.problem_watcher.start()
         
-        if not problems:
-            return
-            
-        # 添加到列表
-        for problem_data in problems:
-            item = ProblemListItem(problem_data)
-            self.problem_list.addItem(item)
-            
-        # 恢复选择
-        if current_dir:
-            for i in range(self.problem_list.count()):
-                item = self.problem_list.item(i)
-                if isinstance(item, ProblemListItem) and item.problem_data["directory"] == current_dir:
-                    self.problem_list.setCurrentRow(i)
-                    break
-        elif self.problem_list.count() > 0:
-            self.problem_list.setCurrentRow(0)
+        if not self.problem_list.currentIndex().isValid() and self.problem_proxy.rowCount() > 0:
+            self.problem_list.setCurrentIndex(self.problem_proxy.index(0, 0))
             
+    def on_problems_changed(self, problem_dirs: List[str]):
+        """题库目录中有题目新增、删除或被修改，只更新这些题目"""
+        self.problem_model.refresh_problems(problem_dirs)
+        
     def load_specific_problem(self, problem_dir: str):
         """加载指定目录的题目"""
-        for i in range(self.problem_list.count()):
-            item = self.problem_list.item(i)
-            if isinstance(item, ProblemListItem) and item.problem_data["directory"] == problem_dir:
-                self.problem_list.setCurrentRow(i)
-                return
+        index = self.problem_proxy.index_of(problem_dir)
+        if index.isValid():
+            self.problem_list.setCurrentIndex(index)
+            return
                 
         # 如果没有找到，尝试直接加载
-        try:
-            self.current_problem = Problem.load(problem_dir)
-            self.update_ui_with_problem()
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"加载题目失败: {str(e)}")
+        self.start_loading_problem(problem_dir)
             
     def load_problem_details(self):
         """加载所选题目的详细信息"""
@@ -455,22 +481,54 @@ class ProblemManagerDialog(QDialog):
             self.test_case_search.clear()
         
         # 获取所选题目
-        item = self.problem_list.currentItem()
-        if not item or not isinstance(item, ProblemListItem):
+        problem_dir = self.current_problem_dir()
+        if not problem_dir:
+            # 题目被筛选掉或删除时不再保留旧题目，避免把已清空的编辑器内容保存进去
+            self.problem_loader.cancel()
+            self.current_problem = None
+            self.current_test_case_id = None
             return
             
-        problem_dir = item.problem_data["directory"]
+        self.start_loading_problem(problem_dir)
+        
+    def start_loading_problem(self, problem_dir: str):
+        """在后台加载题目，界面随加载进度逐步更新"""
+        # 加载完成前不保留旧题目，避免把编辑器内容保存到上一个题目
+        self.current_problem = None
+        self.current_test_case_id = None
+        self.status_label.setText(f"正在加载题目: {os.path.basename(os.path.normpath(problem_dir))}")
+        self.problem_loader.load(problem_dir)
+        
+    def on_problem_metadata_loaded(self, problem: Problem):
+        """元数据加载完成"""
+        details = f"难度 {problem.difficulty}，{problem.time_limit} ms / {problem.memory_limit} MB"
+        if problem.has_subtasks:
+            details += f"，{len(problem.subtasks)} 个子任务"
+        self.status_label.setText(f"正在加载题目: {problem.title}（{details}）")
+        
+    def on_problem_description_loaded(self, problem: Problem):
+        """题目描述加载完成，先显示描述，测试用例列表稍后填充"""
+        self.problem_editor.setText(problem.description)
+        
+    def on_problem_loaded(self, problem: Problem):
+        """题目加载完成"""
+        self.current_problem = problem
+        self.problem_watcher.watch_problem(problem.directory)
+        
+        # 加载期间编辑器里已经显示了描述，这里只填充测试用例列表
+        self.update_test_case_list()
+        self.status_label.setText(f"已加载题目: {problem.title}（{len(problem.test_cases)} 个测试点）")
+        self.update_cache_status()
+        
+    def update_cache_status(self):
+        """在状态栏显示题目缓存的占用和命中率"""
+        self.cache_label.setText(problem_cache.describe() if problem_cache.enabled else "")
+        
+    def on_problem_load_failed(self, message: str):
+        """题目加载失败"""
+        self.status_label.setText("就绪")
+        QMessageBox.warning(self, "错误", f"加载题目失败: {message}")
         
-        try:
-            # 加载题目
-            self.current_problem = Problem.load(problem_dir)
-            
-            # 更新UI
-            self.update_ui_with_problem()
-            
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"加载题目失败: {str(e)}")
-            
     def update_ui_with_problem(self):
         """用题目数据更新UI"""
         if not self.current_problem:
@@ -478,7 +536,13 @@ class ProblemManagerDialog(QDialog):
             
         # 更新题目描述
         self.problem_editor.setText(self.current_problem.description)
+        self.update_test_case_list()
         
+    def update_test_case_list(self):
+        """用当前题目的测试用例填充列表"""
+        if not self.current_problem:
+            return
+            
         # 清空搜索框
         if hasattr(self, 'test_case_search'):
             self.test_case_search.clear()
@@ -498,10 +562,14 @@ class ProblemManagerDialog(QDialog):
         # 先保存当前测试用例的修改（如果有）
         self.save_current_test_case()
         
-        # 清空当前编辑器
+        # 清空当前编辑器，查看器不再引用上一个测试用例的mmap视图
         self.input_editor.clear()
         self.output_editor.clear()
         
+        # 释放上一个测试用例未修改的数据，题目中只保留正在编辑的测试用例内容
+        if self.current_problem and self.current_test_case_id in self.current_problem.test_cases:
+            self.current_problem.test_cases[self.current_test_case_id].release()
+        
         # 检查是否有选中的测试用例
         item = self.test_case_list.currentItem()
         if not item or not isinstance(item, TestCaseListItem) or not self.current_problem:
@@ -518,9 +586,9 @@ class ProblemManagerDialog(QDialog):
             
         test_case = self.current_problem.test_cases[case_id]
         
-        # 更新编辑器
-        self.input_editor.setText(test_case.input_data)
-        self.output_editor.setText(test_case.output_data)
+        # 更新编辑器，小数据完整显示，大数据只读取当前页
+        self.input_editor.load(test_case.input_view(), lambda: test_case.input_data)
+        self.output_editor.load(test_case.output_view(), lambda: test_case.output_data)
     
     def save_current_test_case(self):
         """临时保存当前测试用例的修改"""
@@ -533,14 +601,18 @@ class ProblemManagerDialog(QDialog):
             
         test_case = self.current_problem.test_cases[self.current_test_case_id]
         
-        # 获取编辑器内容
-        input_data = self.input_editor.toPlainText()
-        output_data = self.output_editor.toPlainText()
-        
-        # 只有当内容有变化时才更新
-        if test_case.input_data != input_data or test_case.output_data != output_data:
-            test_case.input_data = input_data
-            test_case.output_data = output_data
+        # 只取回被编辑过的一侧，由文档的修改标志判断，不逐字比较全部内容
+        # 未改动的一侧保持未修改状态，保存时不会重写对应文件
+        changed = False
+        if self.input_editor.is_modified:
+            test_case.input_data = self.input_editor.text()
+            self.input_editor.set_modified(False)
+            changed = True
+        if self.output_editor.is_modified:
+            test_case.output_data = self.output_editor.text()
+            self.output_editor.set_modified(False)
+            changed = True
+        if changed:
             self.status_label.setText(f"已临时保存测试点 {self.current_test_case_id} 的修改")
         
     def update_test_cases_zip(self):
@@ -560,18 +632,16 @@ class ProblemManagerDialog(QDialog):
                 return False
                 
             # 检查测试用例目录中是否有文件
-            files = [f for f in os.listdir(test_cases_dir) if os.path.isfile(os.path.join(test_cases_dir, f))]
+            files = [f for f in os.listdir(test_cases_dir)
+                     if not f.startswith(".") and os.path.isfile(os.path.join(test_cases_dir, f))]
             if not files:
                 self.status_label.setText("错误：测试用例目录为空")
                 return False
                 
-            # 创建zip文件
-            with zipfile.ZipFile(zip_file, "w") as zipf:
-                for file_name in files:
-                    file_path = os.path.join(test_cases_dir, file_name)
-                    zipf.write(file_path, arcname=file_name)
+            # 增量更新zip文件，只替换修改过的测试点
+            result = package_test_cases(test_cases_dir, zip_file)
                     
-            self.status_label.setText(f"成功：已更新测试用例打包文件 ({len(files)} 个文件)")
+            self.status_label.setText(f"成功：已更新测试用例打包文件 ({len(files)} 个文件，{result.describe()})")
             return True
             
         except Exception as e:
@@ -581,7 +651,10 @@ class ProblemManagerDialog(QDialog):
     def save_problem_changes(self):
         """保存对题目和测试数据的修改"""
         if not self.current_problem:
-            self.status_label.setText("错误：没有加载题目")
+            if self.problem_loader.is_loading:
+                self.status_label.setText("题目正在加载，请稍后再保存")
+            else:
+                self.status_label.setText("错误：没有加载题目")
             return
             
         try:
@@ -591,29 +664,39 @@ class ProblemManagerDialog(QDialog):
             # 保存当前测试用例修改
             self.save_current_test_case()
             
-            # 保存题目
-            self.current_problem.save()
-            
-            # 更新zip文件
-            zip_result = self.update_test_cases_zip()
-            
-            if zip_result:
-                self.status_label.setText("成功：已保存所有修改并更新打包文件")
+            # 保存题目，只写入修改过的文件并增量更新打包文件；
+            # 没有修改时也检查全部测试数据，修复被删除或损坏的打包文件和索引
+            was_dirty = self.current_problem.is_dirty
+            # 标题变化时题目会保存到新目录，旧目录的缓存不能再指向这个对象
+            problem_cache.invalidate(self.current_problem.directory)
+            self.current_problem.save(force=True)
+            self.problem_model.refresh_problem(self.current_problem.directory)
+            # 保存后文件签名已变化，用刚保存的题目更新缓存
+            problem_cache.put(self.current_problem.directory, self.current_problem)
+            self.update_cache_status()
+            
+            pack_result = self.current_problem.last_pack_result
+            if not was_dirty:
+                detail = f"（{pack_result.describe()}）" if pack_result is not None else ""
+                self.status_label.setText(f"没有需要保存的修改，已检查打包文件{detail}")
+            elif pack_result is not None:
+                self.status_label.setText(f"成功：已保存所有修改并更新打包文件（{pack_result.describe()}）")
             else:
-                self.status_label.setText("警告：题目已保存，但更新打包文件失败")
+                self.status_label.setText("成功：已保存所有修改")
             
         except Exception as e:
             self.status_label.setText(f"错误：保存失败：{str(e)}")
             
     def delete_problem(self):
         """删除选中的题目"""
-        item = self.problem_list.currentItem()
-        if not item or not isinstance(item, ProblemListItem):
+        index = self.problem_list.currentIndex()
+        if not index.isValid():
             QMessageBox.information(self, "提示", "请先选择一个题目")
             return
             
-        problem_dir = item.problem_data["directory"]
-        problem_title = item.problem_data["title"]
+        problem_dir = index.data(DIRECTORY_ROLE)
+        problem_data = index.data(PROBLEM_DATA_ROLE)
+        problem_title = problem_data["title"] if problem_data else os.path.basename(problem_dir)
         
         # 确认删除
         result = QMessageBox.question(
@@ -626,11 +709,9 @@ class ProblemManagerDialog(QDialog):
             return
             
         try:
-            # 删除目录
-            shutil.rmtree(problem_dir)
-            
-            # 刷新列表
-            self.refresh_problem_list()
+            # 删除目录并更新题库索引
+            Problem.delete(problem_dir)
+            problem_cache.invalidate(problem_dir)
             
             # 清空编辑器
             self.problem_editor.clear()
@@ -639,6 +720,10 @@ class ProblemManagerDialog(QDialog):
             self.output_editor.clear()
             
             self.current_problem = None
+            self.current_test_case_id = None
+            
+            # 只移除这一行，选中项移到相邻的题目并加载
+            self.problem_model.remove_problem(problem_dir)
             
             QMessageBox.information(self, "成功", "题目已删除")
             
@@ -692,4 +777,10 @@ class ProblemManagerDialog(QDialog):
         """关闭事件，确保保存当前测试用例的修改"""
         # 保存当前测试用例的修改
         self.save_current_test_case()
-        super().closeEvent(event) 
\ No newline at end of file
+        self.problem_loader.shutdown()
+        super().closeEvent(event)
+        
+    def done(self, result):
+        """对话框通过按钮关闭时不会触发closeEvent，同样停止后台加载"""
+        self.problem_loader.shutdown()
+        super().done(result) 
\ No newline at end of file
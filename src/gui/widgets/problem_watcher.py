@@ -0,0 +1,148 @@
+"""
+题库监视器 - 监视题库目录，合并短时间内的文件系统事件后报告发生变化的题目
+"""
+import os
+import sys
+import time
+from typing import List, Optional, Set
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+# 当模块处于开发中，使用相对导入
+try:
+    from ...utils.journal import JOURNAL_NAME
+except ImportError:
+    # 绝对导入作为后备
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+    from src.utils.journal import JOURNAL_NAME
+
+DEBOUNCE_MS = 500  # 最后一个事件之后等待的时间
+MAX_DELAY_MS = 3000  # 事件持续不断时，最迟在第一个事件之后这么久处理一次
+
+
+class ProblemWatcher(QObject):
+    """
+    题库监视器
+
+    只监视题库目录本身和少数题目目录，不为上万个题目目录逐一建立监视：
+    - 题库目录：新增、删除、重命名题目目录时触发，与上次的目录列表比较得出增删的题目；
+    - 新出现但还没写完（没有 metadata.json 或题目文件，或保存事务尚未完成）的题目目录：
+      写完后再报告，之后不再监视；
+    - 当前打开的题目目录：在其他进程中被重新保存时报告。
+    事件先合并 DEBOUNCE_MS，批量生成时持续不断的事件最迟每 MAX_DELAY_MS 处理一次，
+    每次处理发出一个 problems_changed 信号，列出需要重新读取的题目目录。
+    """
+
+    problems_changed = pyqtSignal(list)  # 新增、删除或内容变化的题目目录
+
+    def __init__(self, base_dir: str = "problems", parent=None):
+        """
+        参数:
+            base_dir: 题库目录
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.base_dir = base_dir
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._first_event = 0.0
+        self._base_changed = False
+        self._changed_dirs: Set[str] = set()  # 自上次处理以来发生变化的题目目录
+        self._incomplete: Set[str] = set()  # 尚未写完的新题目目录
+        self._problem_dir: Optional[str] = None  # 当前打开的题目目录
+        self._known: Set[str] = set()
+        self.start()
+
+    def start(self) -> None:
+        """开始监视题库目录，题库目录在启动后才创建时可以再次调用"""
+        if self.base_dir in self.watcher.directories() or not os.path.isdir(self.base_dir):
+            return
+        self._known = self._list_problems()
+        self.watcher.addPath(self.base_dir)
+
+    def watch_problem(self, problem_dir: Optional[str]) -> None:
+        """
+        监视当前打开的题目目录，替换之前监视的题目
+
+        参数:
+            problem_dir: 题目目录，为None时只取消之前的监视
+        """
+        if self._problem_dir and self._problem_dir not in self._incomplete:
+            self.watcher.removePath(self._problem_dir)
+        self._problem_dir = os.path.normpath(problem_dir) if problem_dir else None
+        if self._problem_dir and os.path.isdir(self._problem_dir):
+            self.watcher.addPath(self._problem_dir)
+
+    def flush(self) -> None:
+        """立即处理已收到的事件"""
+        self._timer.stop()
+        changed: List[str] = []
+
+        if self._base_changed:
+            self._base_changed = False
+            current = self._list_problems() if os.path.isdir(self.base_dir) else set()
+            for name in sorted(current - self._known):
+                problem_dir = os.path.join(self.base_dir, name)
+                if self._is_complete(problem_dir):
+                    changed.append(problem_dir)
+                else:
+                    # 等目录中的文件写完再加入列表
+                    self._incomplete.add(problem_dir)
+                    self.watcher.addPath(problem_dir)
+            for name in sorted(self._known - current):
+                problem_dir = os.path.join(self.base_dir, name)
+                self._incomplete.discard(problem_dir)
+                changed.append(problem_dir)
+            self._known = current
+
+        for problem_dir in sorted(self._changed_dirs):
+            if problem_dir in self._incomplete:
+                if not self._is_complete(problem_dir):
+                    continue
+                self._incomplete.discard(problem_dir)
+                if problem_dir != self._problem_dir:
+                    self.watcher.removePath(problem_dir)
+            if problem_dir not in changed:
+                changed.append(problem_dir)
+        self._changed_dirs.clear()
+
+        if changed:
+            self.problems_changed.emit(changed)
+
+    def _on_directory_changed(self, path: str) -> None:
+        path = os.path.normpath(path)
+        if path == os.path.normpath(self.base_dir):
+            self._base_changed = True
+            if not os.path.isdir(self.base_dir):
+                # 题库目录被删除后监视自动失效，处理完这次变化即可
+                self._timer.start(0)
+                return
+        else:
+            self._changed_dirs.add(path)
+
+        now = time.monotonic()
+        if not self._timer.isActive():
+            self._first_event = now
+        if (now - self._first_event) * 1000 < MAX_DELAY_MS:
+            # 推迟到事件停止之后处理；已等待太久时不再推迟，让计时器按原定时间触发
+            self._timer.start(DEBOUNCE_MS)
+
+    def _list_problems(self) -> Set[str]:
+        # 与题库索引一致：以点开头的是索引自身、数据存储等内部目录
+        with os.scandir(self.base_dir) as entries:
+            return {entry.name for entry in entries if not entry.name.startswith(".") and entry.is_dir()}
+
+    @staticmethod
+    def _is_complete(problem_dir: str) -> bool:
+        """题目是否已经写完：有元数据或题目文件，且没有未完成的保存事务"""
+        try:
+            names = os.listdir(problem_dir)
+        except OSError:
+            # 目录已被删除，由列表更新处理
+            return True
+        if JOURNAL_NAME in names:
+            return False
+        return "metadata.json" in names or any(name.endswith(".txt") for name in names)
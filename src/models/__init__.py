@@ -2,5 +2,8 @@
 数据模型模块初始化文件
 """
 from .problem import Problem, TestCase, SubTask
+from .problem_index import ProblemIndex, get_problem_index
+from .problem_cache import ProblemCache, problem_cache
 
-__all__ = ['Problem', 'TestCase', 'SubTask'] 
\ No newline at end of file
+__all__ = ['Problem', 'TestCase', 'SubTask', 'ProblemIndex', 'get_problem_index',
+           'ProblemCache', 'problem_cache'] 
\ No newline at end of file
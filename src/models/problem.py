@@ -2,46 +2,210 @@
 问题模型类，用于表示洛谷题目及其属性
 """
 import os
+import sys
 import json
+import mmap
+import shutil
+import sqlite3
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Iterator, Tuple
+
+from ..utils.stream_writer import BatchWriter
+from ..utils.zip_packager import PackResult, ZipPackager, package_test_cases
+from ..utils.journal import SaveTransaction
+from .problem_index import get_problem_index
 
 
 class TestCase:
-    """测试用例类"""
+    """
+    测试用例类
+    
+    从文件加载的测试用例只记录文件路径和大小，input_data / output_data 第一次被访问时
+    才读入内存；input_view() / output_view() 返回基于mmap的只读字节视图，不会复制文件内容。
+    """
     def __init__(self, case_id: str, input_data: str = "", output_data: str = "",
                  score: int = 0, group: int = 0):
         self.case_id = case_id  # 测试点ID，如 "1"、"2.1" 等
-        self.input_data = input_data  # 输入数据
-        self.output_data = output_data  # 输出数据
+        self._input_data: Optional[str] = input_data  # 输入数据，None表示尚未从文件读取
+        self._output_data: Optional[str] = output_data  # 输出数据，None表示尚未从文件读取
         self.score = score  # 分值
         self.group = group  # 子任务组，0表示不属于子任务
+        self.input_path = ""  # 输入文件路径，内存中新建的测试用例为空
+        self.output_path = ""  # 输出文件路径
+        self._file_sizes = (0, 0)  # 从文件加载时记录的(输入, 输出)字节数
+        self._modified = [False, False]  # 输入、输出是否在读入后被修改
+        self._maps: List[mmap.mmap] = []
+        
+    @classmethod
+    def from_files(cls, case_id: str, input_path: str, output_path: str, group: int = 0) -> 'TestCase':
+        """
+        创建延迟加载的测试用例，只读取文件大小
+        """
+        test_case = cls(case_id, group=group)
+        test_case._input_data = None
+        test_case._output_data = None
+        test_case.input_path = input_path
+        test_case.output_path = output_path
+        test_case._file_sizes = (os.path.getsize(input_path), os.path.getsize(output_path))
+        return test_case
+        
+    @property
+    def input_data(self) -> str:
+        if self._input_data is None:
+            self._input_data = self._read_text(self.input_path)
+        return self._input_data
+        
+    @input_data.setter
+    def input_data(self, value: str) -> None:
+        self._input_data = value
+        self._modified[0] = True
+        
+    @property
+    def output_data(self) -> str:
+        if self._output_data is None:
+            self._output_data = self._read_text(self.output_path)
+        return self._output_data
+        
+    @output_data.setter
+    def output_data(self, value: str) -> None:
+        self._output_data = value
+        self._modified[1] = True
+        
+    @property
+    def is_loaded(self) -> bool:
+        """输入和输出是否都已读入内存"""
+        return self._input_data is not None and self._output_data is not None
+        
+    def mark_modified(self) -> None:
+        """将已读入内存的数据标记为尚未保存，用于保存失败后重试"""
+        self._modified = [self._input_data is not None, self._output_data is not None]
+        
+    @property
+    def is_dirty(self) -> bool:
+        """是否有尚未保存到文件的内容"""
+        return not (self.input_path and self.output_path) or any(self._modified)
+        
+    @property
+    def input_size(self) -> int:
+        """输入数据的字节数，未加载时不读取文件"""
+        if self._input_data is None:
+            return self._file_sizes[0]
+        return len(self._input_data.encode('utf-8'))
+        
+    @property
+    def output_size(self) -> int:
+        """输出数据的字节数，未加载时不读取文件"""
+        if self._output_data is None:
+            return self._file_sizes[1]
+        return len(self._output_data.encode('utf-8'))
+        
+    @property
+    def payload_bytes(self) -> int:
+        """已读入内存的测试数据占用的字节数，未加载的数据不计入"""
+        return sum(sys.getsizeof(data) for data in (self._input_data, self._output_data) if data is not None)
+        
+    def materialize(self) -> 'TestCase':
+        """将输入和输出读入内存，返回自身"""
+        self.input_data
+        self.output_data
+        return self
+        
+    def release(self) -> None:
+        """
+        释放已读入内存的数据和mmap，之后访问时重新从文件读取
+        被修改过且尚未保存的数据保留在内存中
+        """
+        if self.input_path and not self._modified[0]:
+            self._input_data = None
+        if self.output_path and not self._modified[1]:
+            self._output_data = None
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # 仍有视图在使用，交给垃圾回收
+                pass
+        self._maps = []
+        
+    def input_view(self) -> memoryview:
+        """返回输入数据的只读字节视图，未加载时基于mmap而不读入内存"""
+        return self._view(self._input_data, self.input_path)
+        
+    def output_view(self) -> memoryview:
+        """返回输出数据的只读字节视图，未加载时基于mmap而不读入内存"""
+        return self._view(self._output_data, self.output_path)
+        
+    def _view(self, data: Optional[str], path: str) -> memoryview:
+        if data is not None or not path:
+            return memoryview((data or "").encode('utf-8'))
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # 空文件无法mmap
+                return memoryview(b"")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)
+        
+    @staticmethod
+    def _read_text(path: str) -> str:
+        if not path:
+            return ""
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+        
+    def save_to_files(self, directory: str, batch: Optional[BatchWriter] = None) -> tuple:
+        """
+        保存测试用例到文件，流式写入并去除首尾空白
         
-    def save_to_files(self, directory: str) -> tuple:
-        """保存测试用例到文件"""
+        未加载到内存的测试用例：目标就是源文件时跳过写入，否则直接从源文件流式复制
+        
+        参数:
+            directory: 测试数据目录
+            batch: 所属的批量写入器或保存事务，为None时单独写入且不执行fsync
+        """
         if not os.path.exists(directory):
             os.makedirs(directory)
             
-        # 确保case_id是两位数格式，如01, 02等
-        case_id_formatted = self.case_id.zfill(2) if self.case_id.isdigit() else self.case_id
-            
-        input_file = os.path.join(directory, f"{case_id_formatted}.in")
-        output_file = os.path.join(directory, f"{case_id_formatted}.out")
+        input_file, output_file = self.file_paths(directory, self.case_id)
         
         try:
-            with open(input_file, 'w', encoding='utf-8', newline='\n') as f:
-                f.write(self.input_data.strip())
-                
-            with open(output_file, 'w', encoding='utf-8', newline='\n') as f:
-                f.write(self.output_data.strip())
+            writer = batch or BatchWriter(fsync=False)
+            input_size = self._save_payload(writer, self._input_data, self._modified[0],
+                                            self.input_path, input_file)
+            output_size = self._save_payload(writer, self._output_data, self._modified[1],
+                                             self.output_path, output_file)
+            # 保存后文件即为最新内容，可以随时释放内存中的副本
+            self.input_path, self.output_path = input_file, output_file
+            self._file_sizes = (input_size, output_size)
+            self._modified = [False, False]
                 
             return (input_file, output_file)
         except Exception as e:
             raise IOError(f"保存测试用例文件时出错: {str(e)}")
+            
+    @staticmethod
+    def file_paths(directory: str, case_id: str) -> tuple:
+        """返回测试用例在目录中的 (输入文件路径, 输出文件路径)"""
+        # 确保case_id是两位数格式，如01, 02等
+        case_id_formatted = case_id.zfill(2) if case_id.isdigit() else case_id
+        return (os.path.join(directory, f"{case_id_formatted}.in"),
+                os.path.join(directory, f"{case_id_formatted}.out"))
+    
+    @staticmethod
+    def _save_payload(writer: BatchWriter, data: Optional[str], modified: bool,
+                      source_path: str, target_path: str) -> int:
+        """写入一个数据文件，返回文件字节数"""
+        if source_path and not modified:
+            if os.path.exists(target_path) and os.path.samefile(source_path, target_path):
+                # 数据未修改，文件已经是最新的
+                return os.path.getsize(target_path)
+            with open(source_path, 'rb') as source:
+                return writer.write(target_path, source)
+        return writer.write(target_path, data or "")
     
     @classmethod
     def load_from_files(cls, directory: str, case_id: str) -> 'TestCase':
-        """从文件加载测试用例"""
+        """从文件加载测试用例（延迟读取内容）"""
         # 支持不同的case_id格式（原始或格式化后的）
         case_id_formatted = case_id.zfill(2) if case_id.isdigit() else case_id
         
@@ -61,12 +225,6 @@ class TestCase:
             raise FileNotFoundError(f"测试用例 {case_id} 的文件不存在")
             
         try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                input_data = f.read()
-                
-            with open(output_file, 'r', encoding='utf-8') as f:
-                output_data = f.read()
-                
             # 尝试从文件名解析子任务信息
             group = 0
             if '.' in case_id:
@@ -75,7 +233,8 @@ class TestCase:
                 except ValueError:
                     pass
                     
-            return cls(case_id, input_data, output_data, group=group)
+            # 只记录路径和大小，内容在第一次访问时读取
+            return cls.from_files(case_id, input_file, output_file, group=group)
         except Exception as e:
             raise IOError(f"加载测试用例文件时出错: {str(e)}")
 
@@ -90,10 +249,21 @@ class SubTask:
 
 
 class Problem:
-    """洛谷题目类"""
+    """
+    洛谷题目类
+    
+    记录自上次保存或加载以来修改过的字段和测试用例，save 只写入发生变化的文件
+    """
+    # 修改后需要重写文件的字段，description 对应题目描述文件，其余对应 metadata.json
+    TRACKED_FIELDS = ("title", "description", "difficulty", "time_limit", "memory_limit", "has_subtasks")
+    
     def __init__(self, title: str = "", description: str = "", 
                  difficulty: int = 0, time_limit: int = 1000, 
                  memory_limit: int = 128, has_subtasks: bool = False):
+        self._dirty_fields = set()  # 修改过的字段
+        self._dirty_cases = set()  # 新增或被替换的测试用例ID
+        self._removed_cases = set()  # 删除的测试用例ID
+        self._saved_directory = ""  # 上次保存或加载时的题目目录
         self.title = title  # 题目标题
         self.description = description  # 题目描述
         self.difficulty = difficulty  # 难度等级 (1-5)
@@ -105,41 +275,133 @@ class Problem:
         self.created_at = datetime.now()  # 创建时间
         self.modified_at = datetime.now()  # 修改时间
         self.directory = ""  # 题目目录
+        self.last_pack_result = None  # 上次保存时打包的结果
+        
+    def __setattr__(self, name: str, value: Any) -> None:
+        # 值确实发生变化时才标记为已修改
+        if name in self.TRACKED_FIELDS and getattr(self, name, None) != value:
+            self._dirty_fields.add(name)
+        super().__setattr__(name, value)
+        
+    @property
+    def is_dirty(self) -> bool:
+        """自上次保存或加载以来是否有修改"""
+        return bool(self._dirty_fields or self._dirty_cases or self._removed_cases
+                    or any(test_case.is_dirty for test_case in self.test_cases.values()))
+        
+    def mark_clean(self) -> None:
+        """将当前状态视为已保存"""
+        self._dirty_fields = set()
+        self._dirty_cases = set()
+        self._removed_cases = set()
+        self._saved_directory = self.directory
+        
+    @property
+    def payload_bytes(self) -> int:
+        """题目描述和已读入内存的测试数据占用的字节数"""
+        return sys.getsizeof(self.description) + sum(
+            test_case.payload_bytes for test_case in self.test_cases.values())
         
     def add_test_case(self, test_case: TestCase) -> None:
         """添加测试用例"""
         self.test_cases[test_case.case_id] = test_case
+        self._dirty_cases.add(test_case.case_id)
+        self._removed_cases.discard(test_case.case_id)
         self.modified_at = datetime.now()
         
+    def remove_test_case(self, case_id: str) -> None:
+        """删除测试用例，保存时一并删除对应的数据文件"""
+        if self.test_cases.pop(case_id, None) is not None:
+            self._dirty_cases.discard(case_id)
+            self._removed_cases.add(case_id)
+            self.modified_at = datetime.now()
+        
     def add_subtask(self, subtask: SubTask) -> None:
         """添加子任务"""
         self.subtasks[subtask.task_id] = subtask
+        self._dirty_fields.add("subtasks")
         self.modified_at = datetime.now()
         
-    def save(self, base_dir: str = "problems") -> str:
-        """保存题目到文件系统"""
+    def save(self, base_dir: str = "problems", force: bool = False) -> str:
+        """
+        保存题目到文件系统
+        
+        目录未变时只写入修改过的文件：题目描述、metadata.json、新增或编辑过的测试用例，
+        删除已移除测试用例的文件，并把变化的文件名交给打包器增量更新压缩包。
+        标题改变导致目录变化时写入全部文件。
+        
+        没有修改时直接返回，但压缩包或其清单缺失时仍会重新打包；
+        force 为True时总是检查全部测试数据文件、修复压缩包并更新题库索引。
+        """
         # 创建题目目录（如果没有标题，使用创建时间作为目录名）
         dir_name = self.title.replace(" ", "_") if self.title else f"problem_{int(self.created_at.timestamp())}"
-        self.directory = os.path.join(base_dir, dir_name)
+        if (self._saved_directory and "title" not in self._dirty_fields
+                and os.path.abspath(os.path.dirname(self._saved_directory)) == os.path.abspath(base_dir)):
+            # 标题未变时沿用原目录，批量生成中加了编号后缀的目录不会被保存到同名题目的目录里
+            self.directory = self._saved_directory
+        else:
+            self.directory = os.path.join(base_dir, dir_name)
+        relocated = (not self._saved_directory
+                     or os.path.abspath(self._saved_directory) != os.path.abspath(self.directory))
+        repair = force or self._package_missing()
+        if not relocated and not repair and not self.is_dirty:
+            return self.directory
         
         if not os.path.exists(self.directory):
             os.makedirs(self.directory)
             
-        # 保存题目描述文件
-        problem_file = os.path.join(self.directory, f"{self.title}.txt")
-        with open(problem_file, 'w', encoding='utf-8') as f:
-            f.write(self.description)
-            
         # 创建测试数据目录
         test_cases_dir = os.path.join(self.directory, "test_cases")
         if not os.path.exists(test_cases_dir):
             os.makedirs(test_cases_dir)
             
-        # 保存测试用例
-        for case_id, test_case in self.test_cases.items():
-            test_case.save_to_files(test_cases_dir)
+        # 所有文件先写入暂存目录，统一同步后以原子重命名提交，中途崩溃不会留下新旧混杂的数据
+        with SaveTransaction(self.directory) as txn:
+            saved_cases: List[TestCase] = []
+            try:
+                # 保存题目描述文件，文件名随标题变化
+                if relocated or self._dirty_fields & {"title", "description"}:
+                    txn.write_text(os.path.join(self.directory, f"{self.title}.txt"), self.description)
+                    
+                # 保存新增和修改过的测试用例
+                changed_files = set()
+                for case_id, test_case in self.test_cases.items():
+                    if relocated or case_id in self._dirty_cases or test_case.is_dirty:
+                        saved_cases.append(test_case)
+                        changed_files.update(os.path.basename(path)
+                                             for path in test_case.save_to_files(test_cases_dir, txn))
+                for case_id in self._removed_cases:
+                    for path in TestCase.file_paths(test_cases_dir, case_id):
+                        txn.remove(path)
+                    
+                # 保存元数据（测试用例列表变化时也需要更新）
+                if relocated or self._dirty_fields or self._dirty_cases or self._removed_cases:
+                    txn.write_text(os.path.join(self.directory, "metadata.json"),
+                                   json.dumps(self._metadata(), ensure_ascii=False, indent=2))
+                    
+                # 提交后再更新压缩包；更新完成前崩溃时清单失效，下次整体重新打包
+                packager = self._packager()
+                txn.invalidate_on_recovery(packager.manifest_path)
+                txn.commit()
+            except BaseException:
+                # 未提交的修改会被丢弃，内存中的数据需要在下次保存时重新写入
+                for test_case in saved_cases:
+                    test_case.mark_modified()
+                raise
+            self.last_pack_result = self._package_test_cases(None if relocated or repair else changed_files,
+                                                             packager)
+        self.mark_clean()
+        
+        # 更新题库索引
+        try:
+            get_problem_index(base_dir).update(self.directory)
+        except (sqlite3.Error, OSError) as e:
+            print(f"更新题库索引失败: {str(e)}")
             
-        # 保存元数据
+        return self.directory
+        
+    def _metadata(self) -> Dict[str, Any]:
+        """构建 metadata.json 的内容"""
         metadata = {
             "title": self.title,
             "difficulty": self.difficulty,
@@ -160,40 +422,48 @@ class Problem:
                     "test_cases": subtask.test_cases
                 } for task_id, subtask in self.subtasks.items()
             }
-            
-        metadata_file = os.path.join(self.directory, "metadata.json")
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
-            
-        # 创建测试数据压缩包
-        self.create_test_cases_zip()
-            
-        return self.directory
+        return metadata
         
     def create_test_cases_zip(self) -> str:
-        """创建测试数据压缩包"""
-        import zipfile
-        
+        """创建或增量更新测试数据压缩包"""
         # 检查测试数据目录是否存在
         test_cases_dir = os.path.join(self.directory, "test_cases")
         if not os.path.exists(test_cases_dir):
             raise FileNotFoundError(f"测试数据目录 {test_cases_dir} 不存在")
             
         # 检查测试数据目录中是否有文件
-        files = [f for f in os.listdir(test_cases_dir) if os.path.isfile(os.path.join(test_cases_dir, f))]
+        files = [f for f in os.listdir(test_cases_dir)
+                 if not f.startswith(".") and os.path.isfile(os.path.join(test_cases_dir, f))]
         if not files:
             raise ValueError(f"测试数据目录 {test_cases_dir} 中没有文件")
             
-        # 创建zip文件
+        # 只替换发生变化的文件
         zip_file = os.path.join(self.directory, f"{self.title}_test_cases.zip")
-        
-        with zipfile.ZipFile(zip_file, 'w') as zipf:
-            for filename in files:
-                file_path = os.path.join(test_cases_dir, filename)
-                zipf.write(file_path, arcname=filename)
+        self.last_pack_result = package_test_cases(test_cases_dir, zip_file)
                     
         return zip_file
         
+    def _package_missing(self) -> bool:
+        """有测试用例，但压缩包或打包清单不存在（被删除或打包时中断）"""
+        if not self.test_cases or not self.directory:
+            return False
+        packager = self._packager()
+        return not (os.path.exists(packager.zip_path) and os.path.exists(packager.manifest_path))
+        
+    def _packager(self) -> ZipPackager:
+        zip_file = os.path.join(self.directory, f"{self.title}_test_cases.zip")
+        return ZipPackager(zip_file, os.path.join(self.directory, "test_cases"))
+        
+    def _package_test_cases(self, changed: Optional[set] = None,
+                            packager: Optional[ZipPackager] = None) -> PackResult:
+        """增量更新压缩包，changed 为None时检查全部文件"""
+        packager = packager or self._packager()
+        test_cases_dir = packager.source_dir
+        if not any(not f.startswith(".") and os.path.isfile(os.path.join(test_cases_dir, f))
+                   for f in os.listdir(test_cases_dir)):
+            raise ValueError(f"测试数据目录 {test_cases_dir} 中没有文件")
+        return packager.update(changed)
+        
     def create_zip_package(self) -> str:
         """
         只创建zip包而不保存题目文件
@@ -205,6 +475,26 @@ class Problem:
     @classmethod
     def load(cls, problem_dir: str) -> 'Problem':
         """从文件系统加载题目"""
+        problem = None
+        for _, problem in cls.load_stages(problem_dir):
+            pass
+        return problem
+        
+    @classmethod
+    def load_stages(cls, problem_dir: str, cancelled: Optional[Callable[[], bool]] = None
+                    ) -> Iterator[Tuple[str, 'Problem']]:
+        """
+        分阶段加载题目，每完成一个阶段产出一次 (阶段, 题目)，界面可以逐步显示
+        
+        阶段依次为:
+            "metadata"     标题、难度、限制和子任务
+            "description"  题目描述
+            "test_cases"   测试用例列表（只记录文件路径和大小），此时加载完成
+        
+        参数:
+            problem_dir: 题目目录
+            cancelled: 返回True时停止加载，在阶段之间和每个测试用例之间检查
+        """
         if not os.path.exists(problem_dir) or not os.path.isdir(problem_dir):
             raise FileNotFoundError(f"题目目录 {problem_dir} 不存在")
             
@@ -248,83 +538,124 @@ class Problem:
             title = txt_files[0].rsplit('.', 1)[0]
             problem = cls(title=title)
             
-            # 读取题目描述
+        # 设置题目目录
+        problem.directory = problem_dir
+        yield "metadata", problem
+        if cancelled and cancelled():
+            return
+            
+        # 读取题目描述
+        txt_files = [f for f in os.listdir(problem_dir) if f.endswith('.txt')]
+        if txt_files:
             with open(os.path.join(problem_dir, txt_files[0]), 'r', encoding='utf-8') as f:
                 problem.description = f.read()
-                
+        yield "description", problem
+        if cancelled and cancelled():
+            return
+            
         # 加载测试用例
         test_cases_dir = os.path.join(problem_dir, "test_cases")
         if os.path.exists(test_cases_dir):
             in_files = [f for f in os.listdir(test_cases_dir) if f.endswith('.in')]
             for in_file in in_files:
+                if cancelled and cancelled():
+                    return
                 case_id = in_file.rsplit('.', 1)[0]
                 test_case = TestCase.load_from_files(test_cases_dir, case_id)
                 problem.add_test_case(test_case)
                 
-        # 设置题目目录
-        problem.directory = problem_dir
+        # 刚加载的题目与文件一致
+        problem.mark_clean()
+        yield "test_cases", problem
         
-        # 读取题目描述（如果元数据中没有）
-        if not problem.description:
-            txt_files = [f for f in os.listdir(problem_dir) if f.endswith('.txt')]
-            if txt_files:
-                with open(os.path.join(problem_dir, txt_files[0]), 'r', encoding='utf-8') as f:
-                    problem.description = f.read()
-                    
-        return problem
+    @staticmethod
+    def delete(problem_dir: str, base_dir: str = "problems") -> None:
+        """删除题目目录并从题库索引中移除"""
+        shutil.rmtree(problem_dir)
+        try:
+            get_problem_index(base_dir).remove(problem_dir)
+        except (sqlite3.Error, OSError) as e:
+            print(f"更新题库索引失败: {str(e)}")
         
     @staticmethod
-    def list_problems(base_dir: str = "problems") -> List[Dict[str, Any]]:
-        """列出所有题目"""
+    def list_problems(base_dir: str = "problems", sort_by: str = "modified_at", descending: bool = True,
+                      offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        列出题目，先按修改时间与题库索引对账，再从索引中分页查询
+        
+        参数:
+            base_dir: 题库目录
+            sort_by: 排序字段，见 problem_index.SORT_COLUMNS
+            descending: 是否降序
+            offset: 跳过的题目数
+            limit: 返回的最大题目数，为None时返回全部
+        """
         if not os.path.exists(base_dir):
             return []
             
+        try:
+            index = get_problem_index(base_dir)
+            index.reconcile()
+            return index.query(sort_by, descending, offset, limit)
+        except (sqlite3.Error, OSError) as e:
+            print(f"读取题库索引失败，改为扫描题目目录: {str(e)}")
+            problems = Problem._scan_problems(base_dir)
+            return problems[offset:None if limit is None else offset + limit]
+        
+    @staticmethod
+    def _scan_problems(base_dir: str) -> List[Dict[str, Any]]:
+        """扫描并解析全部题目目录，索引不可用时使用"""
+            
         problems = []
         for dir_name in os.listdir(base_dir):
             dir_path = os.path.join(base_dir, dir_name)
-            if not os.path.isdir(dir_path):
+            if dir_name.startswith(".") or not os.path.isdir(dir_path):
                 continue
                 
-            # 获取题目修改时间
-            modified_time = os.path.getmtime(dir_path)
+            try:
+                # 获取题目修改时间
+                modified_time = os.path.getmtime(dir_path)
             
-            # 尝试读取元数据
-            metadata_file = os.path.join(dir_path, "metadata.json")
-            if os.path.exists(metadata_file):
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
+                # 尝试读取元数据
+                metadata_file = os.path.join(dir_path, "metadata.json")
+                if os.path.exists(metadata_file):
+                    with open(metadata_file, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
                     
-                problems.append({
-                    "id": dir_name,
-                    "title": metadata.get("title", dir_name),
-                    "difficulty": metadata.get("difficulty", 0),
-                    "has_subtasks": metadata.get("has_subtasks", False),
-                    "modified_at": modified_time,
-                    "directory": dir_path
-                })
-            else:
-                # 尝试从题目文件推断
-                txt_files = [f for f in os.listdir(dir_path) if f.endswith('.txt')]
-                if txt_files:
-                    title = txt_files[0].rsplit('.', 1)[0]
                     problems.append({
                         "id": dir_name,
-                        "title": title,
-                        "difficulty": 0,
-                        "has_subtasks": False,
+                        "title": metadata.get("title", dir_name),
+                        "difficulty": metadata.get("difficulty", 0),
+                        "has_subtasks": metadata.get("has_subtasks", False),
                         "modified_at": modified_time,
                         "directory": dir_path
                     })
                 else:
-                    # 没有找到题目文件，但仍添加目录
-                    problems.append({
-                        "id": dir_name,
-                        "title": dir_name,
-                        "difficulty": 0,
-                        "has_subtasks": False,
-                        "modified_at": modified_time,
-                        "directory": dir_path
-                    })
+                    # 尝试从题目文件推断
+                    txt_files = [f for f in os.listdir(dir_path) if f.endswith('.txt')]
+                    if txt_files:
+                        title = txt_files[0].rsplit('.', 1)[0]
+                        problems.append({
+                            "id": dir_name,
+                            "title": title,
+                            "difficulty": 0,
+                            "has_subtasks": False,
+                            "modified_at": modified_time,
+                            "directory": dir_path
+                        })
+                    else:
+                        # 没有找到题目文件，但仍添加目录
+                        problems.append({
+                            "id": dir_name,
+                            "title": dir_name,
+                            "difficulty": 0,
+                            "has_subtasks": False,
+                            "modified_at": modified_time,
+                            "directory": dir_path
+                        })
+            except OSError:
+                # 扫描过程中目录被删除
+                continue
                     
         # 按修改时间排序，最新的在前
         problems.sort(key=lambda x: x["modified_at"], reverse=True)
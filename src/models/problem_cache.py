@@ -0,0 +1,180 @@
+"""
+题目缓存模块 - 在内存中保留最近加载的题目，文件变化后自动失效
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .problem import Problem
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ProblemCache:
+    """
+    已加载题目的LRU缓存
+
+    以题目目录为键保存 Problem 对象和加载前记录的文件签名：题目目录、test_cases 目录、
+    metadata.json 和题目描述文件的 inode、修改时间与大小。保存题目时文件通过重命名替换，
+    inode 和目录修改时间都会变化；读取缓存时签名不一致即视为失效。测试数据本身是延迟读取的，
+    缓存中只有测试点列表和文件大小，因此不需要逐个检查测试数据文件。
+
+    容量按题目实际占用的数据量（Problem.payload_bytes）计算，而不是按条目数，
+    超出 max_bytes 时淘汰最久未使用的题目。有未保存修改的题目不会从缓存中返回。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        """
+        参数:
+            max_bytes: 缓存的题目数据总量上限
+            enabled: 是否启用缓存
+        """
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        # 题目目录: (签名, 题目, 计入的字节数)
+        self._entries: "OrderedDict[str, Tuple[Any, Problem, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(problem_dir: str) -> Any:
+        """
+        计算题目目录的文件签名，加载题目之前调用，加载期间发生的修改会使签名在下次读取时不一致
+        """
+        def stat_key(path: str):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+        files = []
+        try:
+            with os.scandir(problem_dir) as entries:
+                for entry in entries:
+                    if entry.name == "metadata.json" or entry.name.endswith(".txt"):
+                        stat = entry.stat()
+                        files.append((entry.name, stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            return None
+        return (stat_key(problem_dir), stat_key(os.path.join(problem_dir, "test_cases")), tuple(sorted(files)))
+
+    def get(self, problem_dir: str) -> Optional[Problem]:
+        """
+        读取缓存的题目
+
+        参数:
+            problem_dir: 题目目录
+
+        返回:
+            文件未变化且没有未保存修改的题目，否则返回None
+        """
+        if not self.enabled:
+            return None
+        key = _key(problem_dir)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            signature, problem, _ = entry
+            if signature is not None and signature == self.signature(problem_dir) and not problem.is_dirty:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                        # 查看测试数据后题目占用的内存可能已变化
+                        self._account(key, signature, problem)
+                    self.hits += 1
+                return problem
+            self.invalidate(problem_dir)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, problem_dir: str, problem: Problem, signature: Any = None) -> None:
+        """
+        缓存题目
+
+        参数:
+            problem_dir: 题目目录
+            problem: 已加载或刚保存的题目
+            signature: 加载前记录的文件签名，为None时按当前文件计算
+        """
+        if not self.enabled:
+            return
+        if signature is None:
+            signature = self.signature(problem_dir)
+        if signature is None:
+            return
+        key = _key(problem_dir)
+        with self._lock:
+            self._account(key, signature, problem)
+            self._entries.move_to_end(key)
+            while self.total_bytes > self.max_bytes and self._entries:
+                # 单个题目超过上限时也会被淘汰，不缓存
+                _, (_, _, size) = self._entries.popitem(last=False)
+                self.total_bytes -= size
+                self.evictions += 1
+
+    def invalidate(self, problem_dir: str) -> None:
+        """移除一个题目，用于删除或在外部修改题目之后"""
+        with self._lock:
+            entry = self._entries.pop(_key(problem_dir), None)
+            if entry is not None:
+                self.total_bytes -= entry[2]
+
+    def clear(self) -> None:
+        """清空缓存，保留统计"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存占用和命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def describe(self) -> str:
+        """返回一行统计摘要"""
+        stats = self.stats()
+        return (f"题目缓存: {stats['entries']} 个 / {stats['bytes'] / 1024 / 1024:.1f} MB，"
+                f"命中率 {stats['hit_rate']:.0%}（{stats['hits']}/{stats['hits'] + stats['misses']}）")
+
+    def _account(self, key: str, signature: Any, problem: Problem) -> None:
+        """写入条目并重新计算它占用的字节数，调用方持有锁"""
+        old = self._entries.get(key)
+        if old is not None:
+            self.total_bytes -= old[2]
+        size = problem.payload_bytes + sys.getsizeof(problem)
+        self._entries[key] = (signature, problem, size)
+        self.total_bytes += size
+
+
+def _key(problem_dir: str) -> str:
+    return os.path.normcase(os.path.abspath(problem_dir))
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 进程内共享的题目缓存，题目管理器关闭后再打开仍然有效
+problem_cache = ProblemCache(
+    max_bytes=int(_env_float("PROBLEM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)) * 1024 * 1024),
+    enabled=os.environ.get("PROBLEM_CACHE", "1").lower() not in ("0", "false", "no")
+)
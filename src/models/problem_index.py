@@ -0,0 +1,314 @@
+"""
+题库索引模块 - 将题目列表信息持久化到SQLite，避免每次刷新都扫描并解析全部题目目录
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+INDEX_FILENAME = ".index.sqlite3"
+
+# 可用于排序的字段
+SORT_COLUMNS = ("modified_at", "title", "difficulty", "subtask_count", "case_count", "total_bytes")
+
+_ROW_COLUMNS = "id, title, difficulty, has_subtasks, subtask_count, modified_at, case_count, total_bytes"
+
+
+class ProblemIndex:
+    """
+    题库索引
+
+    每道题目一行，记录标题、难度、子任务、修改时间、测试点数量和测试数据总字节数。
+    保存、删除题目时直接更新对应的行；对账时只 stat 每个题目目录、metadata.json
+    和 test_cases 目录，签名（三者的修改时间）与索引一致的题目不再读取元数据，
+    因此刷新列表的开销与变化的题目数量成正比，而不是与题库大小成正比。
+    """
+
+    def __init__(self, base_dir: str = "problems", path: Optional[str] = None):
+        """
+        参数:
+            base_dir: 题库目录
+            path: 索引数据库路径，默认为题库目录下的 .index.sqlite3
+        """
+        self.base_dir = base_dir
+        self.path = path or os.path.join(base_dir, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def update(self, problem_dir: str) -> None:
+        """
+        重新索引单个题目目录，目录不存在时从索引中删除
+
+        参数:
+            problem_dir: 题目目录
+        """
+        problem_id = self._problem_id(problem_dir)
+        path = os.path.join(self.base_dir, problem_id)
+        if not os.path.isdir(path):
+            self.remove(problem_dir)
+            return
+        try:
+            row = self._read_problem(problem_id, path)
+        except OSError:
+            # 读取过程中目录被删除
+            self.remove(problem_dir)
+            return
+        with self._lock:
+            conn = self._connect()
+            self._upsert(conn, row)
+            conn.commit()
+
+    def remove(self, problem_dir: str) -> None:
+        """
+        从索引中删除题目
+
+        参数:
+            problem_dir: 题目目录
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM problems WHERE id = ?", (self._problem_id(problem_dir),))
+            conn.commit()
+
+    def reconcile(self) -> Tuple[int, int]:
+        """
+        将索引与题库目录对账：新增或签名变化的题目重新索引，已不存在的题目删除
+
+        返回:
+            (重新索引的题目数, 删除的题目数)
+        """
+        if not os.path.isdir(self.base_dir):
+            with self._lock:
+                conn = self._connect()
+                removed = conn.execute("DELETE FROM problems").rowcount
+                conn.commit()
+            return 0, removed
+
+        with self._lock:
+            known = dict(self._connect().execute("SELECT id, signature FROM problems").fetchall())
+
+        changed = []
+        seen = set()
+        with os.scandir(self.base_dir) as entries:
+            for entry in entries:
+                # 以点开头的是索引自身、数据存储等内部目录
+                if entry.name.startswith(".") or not entry.is_dir():
+                    continue
+                try:
+                    if known.get(entry.name) != self._signature(entry.path)[0]:
+                        changed.append(self._read_problem(entry.name, entry.path))
+                except OSError:
+                    # 对账过程中目录被删除（如批量生成或其他进程正在整理题库），按已不存在处理
+                    continue
+                seen.add(entry.name)
+        missing = [problem_id for problem_id in known if problem_id not in seen]
+
+        if changed or missing:
+            with self._lock:
+                conn = self._connect()
+                for row in changed:
+                    self._upsert(conn, row)
+                conn.executemany("DELETE FROM problems WHERE id = ?", [(problem_id,) for problem_id in missing])
+                conn.commit()
+        return len(changed), len(missing)
+
+    def query(self, sort_by: str = "modified_at", descending: bool = True,
+              offset: int = 0, limit: Optional[int] = None, search: str = "") -> List[Dict[str, Any]]:
+        """
+        分页查询题目列表
+
+        参数:
+            sort_by: 排序字段，见 SORT_COLUMNS
+            descending: 是否降序
+            offset: 跳过的题目数
+            limit: 返回的最大题目数，为None时返回全部
+            search: 只返回标题包含该文本的题目
+
+        返回:
+            题目信息字典列表，字段与 Problem.list_problems 相同
+        """
+        order = self._order(sort_by, descending)
+        where, params = self._where(search)
+        sql = f"SELECT {_ROW_COLUMNS} FROM problems{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._connect().execute(
+                sql, params + [-1 if limit is None else limit, max(0, offset)]
+            ).fetchall()
+        return [self._row_dict(row) for row in rows]
+
+    def ids(self, sort_by: str = "modified_at", descending: bool = True, search: str = "") -> List[str]:
+        """
+        按排序返回全部题目ID，只读取索引中的主键和排序列，题目详情再用 get 分批读取
+
+        参数含义与 query 相同
+        """
+        order = self._order(sort_by, descending)
+        where, params = self._where(search)
+        with self._lock:
+            rows = self._connect().execute(f"SELECT id FROM problems{where} ORDER BY {order}", params).fetchall()
+        return [problem_id for problem_id, in rows]
+
+    def get(self, problem_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量读取题目信息
+
+        参数:
+            problem_ids: 题目ID列表
+
+        返回:
+            {题目ID: 题目信息字典}，索引中不存在的题目不包含在内
+        """
+        result = {}
+        with self._lock:
+            conn = self._connect()
+            # SQLite 单条语句的参数数量有限，分批查询
+            for start in range(0, len(problem_ids), 500):
+                batch = problem_ids[start:start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                rows = conn.execute(f"SELECT {_ROW_COLUMNS} FROM problems WHERE id IN ({placeholders})",
+                                    batch).fetchall()
+                for row in rows:
+                    result[row[0]] = self._row_dict(row)
+        return result
+
+    def count(self, search: str = "") -> int:
+        """返回题目总数，search 含义与 query 相同"""
+        where, params = self._where(search)
+        with self._lock:
+            return self._connect().execute(f"SELECT COUNT(*) FROM problems{where}", params).fetchone()[0]
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _row_dict(self, row: Tuple) -> Dict[str, Any]:
+        problem_id, title, difficulty, has_subtasks, subtask_count, modified_at, case_count, total_bytes = row
+        return {
+            "id": problem_id,
+            "title": title,
+            "difficulty": difficulty,
+            "has_subtasks": bool(has_subtasks),
+            "subtask_count": subtask_count,
+            "modified_at": modified_at,
+            "case_count": case_count,
+            "total_bytes": total_bytes,
+            "directory": os.path.join(self.base_dir, problem_id),
+        }
+
+    @staticmethod
+    def _order(sort_by: str, descending: bool) -> str:
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"不支持的排序字段: {sort_by}")
+        return f"{sort_by} {'DESC' if descending else 'ASC'}, id ASC"
+
+    def _problem_id(self, problem_dir: str) -> str:
+        return os.path.basename(os.path.normpath(problem_dir))
+
+    @staticmethod
+    def _where(search: str) -> Tuple[str, List[Any]]:
+        if not search:
+            return "", []
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return " WHERE title LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[str, float]:
+        """
+        计算题目目录的签名和修改时间
+
+        新增、删除文件会改变所在目录的修改时间，改写元数据会改变 metadata.json 的修改时间
+        """
+        mtimes = []
+        for target in (path, os.path.join(path, "metadata.json"), os.path.join(path, "test_cases")):
+            try:
+                mtimes.append(os.stat(target).st_mtime_ns)
+            except OSError:
+                mtimes.append(0)
+        return ":".join(str(mtime) for mtime in mtimes), max(mtimes) / 1e9
+
+    def _read_problem(self, problem_id: str, path: str) -> Tuple:
+        """读取题目目录，返回索引行"""
+        signature, modified_at = self._signature(path)
+        metadata: Dict[str, Any] = {}
+        metadata_file = os.path.join(path, "metadata.json")
+        if os.path.exists(metadata_file):
+            try:
+                with open(metadata_file, "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"读取题目元数据失败 {metadata_file}: {str(e)}")
+
+        title = metadata.get("title")
+        if not title:
+            # 尝试从题目文件推断，没有题目文件时使用目录名
+            txt_files = [f for f in os.listdir(path) if f.endswith(".txt")]
+            title = txt_files[0].rsplit(".", 1)[0] if txt_files else problem_id
+
+        case_count = 0
+        total_bytes = 0
+        test_cases_dir = os.path.join(path, "test_cases")
+        if os.path.isdir(test_cases_dir):
+            with os.scandir(test_cases_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    total_bytes += entry.stat().st_size
+                    if entry.name.endswith(".in"):
+                        case_count += 1
+
+        subtasks = metadata.get("subtasks") or []
+        return (problem_id, title, metadata.get("difficulty", 0) or 0,
+                int(bool(metadata.get("has_subtasks", False))), len(subtasks),
+                modified_at, case_count, total_bytes, signature, time.time())
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, row: Tuple) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO problems (id, title, difficulty, has_subtasks, subtask_count, "
+            "modified_at, case_count, total_bytes, signature, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            row
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS problems ("
+                "id TEXT PRIMARY KEY, title TEXT NOT NULL, difficulty INTEGER NOT NULL, "
+                "has_subtasks INTEGER NOT NULL, subtask_count INTEGER NOT NULL, modified_at REAL NOT NULL, "
+                "case_count INTEGER NOT NULL, total_bytes INTEGER NOT NULL, "
+                "signature TEXT NOT NULL, indexed_at REAL NOT NULL)"
+            )
+            for column in SORT_COLUMNS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_problems_{column} ON problems ({column})")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+
+_indexes: Dict[str, ProblemIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_problem_index(base_dir: str = "problems") -> ProblemIndex:
+    """
+    返回题库目录对应的索引，同一目录在进程内共享一个实例
+
+    参数:
+        base_dir: 题库目录
+    """
+    key = os.path.abspath(base_dir)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = ProblemIndex(base_dir)
+        return _indexes[key]
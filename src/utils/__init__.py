@@ -1,14 +1,27 @@
 """
 工具模块初始化文件
 """
-from .api_utils import call_api, mock_api_call
+from .api_utils import call_api, acall_api, mock_api_call, session_manager, set_api_concurrency
+from .response_cache import ResponseCache, response_cache
+from .retry import RetryPolicy, default_retry_policy
+from .rate_limiter import RateLimiter, rate_limiter
+from .stream_writer import BatchWriter, write_normalized
+from .zip_packager import ZipPackager, package_test_cases
+from .journal import SaveTransaction, recover_all
+from .blob_store import BlobStore, blob_store
+from .markdown_doc import MarkdownDocument, parse_markdown
+from .line_index import LineIndex
 from .file_utils import (
     ensure_dir, clean_dir, list_directories, list_files,
     read_file, write_file, create_zip, extract_zip, get_newest_file
 )
 
 __all__ = [
-    'call_api', 'mock_api_call',
+    'call_api', 'acall_api', 'mock_api_call', 'session_manager', 'set_api_concurrency',
+    'ResponseCache', 'response_cache', 'RetryPolicy', 'default_retry_policy',
+    'RateLimiter', 'rate_limiter', 'BatchWriter', 'write_normalized',
+    'ZipPackager', 'package_test_cases', 'SaveTransaction', 'recover_all',
+    'BlobStore', 'blob_store', 'MarkdownDocument', 'parse_markdown', 'LineIndex',
     'ensure_dir', 'clean_dir', 'list_directories', 'list_files',
     'read_file', 'write_file', 'create_zip', 'extract_zip', 'get_newest_file'
 ] 
\ No newline at end of file
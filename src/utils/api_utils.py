@@ -4,8 +4,99 @@ API 工具模块 - 用于调用DeepSeek API进行文本生成
 import os
 import json
 import time
+import asyncio
+import threading
+import functools
+import weakref
+import sqlite3
 import requests
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, Callable
+
+from .response_cache import response_cache
+from .retry import RetryPolicy, default_retry_policy
+from .rate_limiter import rate_limiter, estimate_tokens
+
+
+DEFAULT_API_URL = "https://api.deepseek.com/v1/chat/completions"
+
+
+class SessionManager:
+    """
+    HTTP会话管理器
+    
+    在进程内共享一个带连接池的 requests.Session，避免每次调用API都重新建立
+    TCP/TLS连接。生成器和GUI生成线程都通过 call_api 间接使用同一个会话。
+    """
+    
+    def __init__(self, pool_size: int = 10, keep_alive: bool = True):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+        
+    def configure(self, pool_size: Optional[int] = None, keep_alive: Optional[bool] = None) -> None:
+        """
+        修改连接池配置，已有会话会被关闭并在下次使用时按新配置重建
+        
+        参数:
+            pool_size: 连接池大小（每个主机保持的最大连接数）
+            keep_alive: 是否复用连接
+        """
+        with self._lock:
+            if pool_size is not None:
+                if pool_size < 1:
+                    raise ValueError("连接池大小必须大于0")
+                self.pool_size = pool_size
+            if keep_alive is not None:
+                self.keep_alive = keep_alive
+            self._close_locked()
+            
+    def get_session(self) -> requests.Session:
+        """获取共享会话，首次调用时创建"""
+        with self._lock:
+            if self._session is None:
+                self._session = self._create_session()
+            return self._session
+        
+    def close(self) -> None:
+        """关闭会话并释放连接池中的所有连接"""
+        with self._lock:
+            self._close_locked()
+            
+    def _close_locked(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+            
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=False
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+
+def _env_int(name: str, default: int) -> int:
+    """读取整数类型的环境变量，无效时返回默认值"""
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 进程内共享的会话管理器
+session_manager = SessionManager(
+    pool_size=max(1, _env_int("API_POOL_SIZE", 10)),
+    keep_alive=os.environ.get("API_KEEP_ALIVE", "1").lower() not in ("0", "false", "no")
+)
 
 
 def get_api_key() -> str:
@@ -16,13 +107,22 @@ def get_api_key() -> str:
     return api_key
 
 
+def get_api_url() -> str:
+    """获取API地址，可通过DEEPSEEK_API_URL环境变量覆盖（例如指向本地测试服务）"""
+    return os.environ.get("DEEPSEEK_API_URL", DEFAULT_API_URL)
+
+
 def call_api(
     prompt: str,
     model: str = "deepseek-chat",
     temperature: float = 0.7,
     max_tokens: int = 4000,
-    max_retries: int = 3,
-    retry_delay: int = 5
+    max_retries: Optional[int] = None,
+    retry_delay: Optional[float] = None,
+    use_cache: bool = True,
+    stream: bool = False,
+    on_delta: Optional[Callable[[str], None]] = None,
+    retry_policy: Optional[RetryPolicy] = None
 ) -> str:
     """
     调用DeepSeek API进行文本生成
@@ -32,14 +132,83 @@ def call_api(
         model: 使用的模型名称
         temperature: 温度参数，控制随机性
         max_tokens: 最大生成的token数量
-        max_retries: 最大重试次数
-        retry_delay: 重试间隔（秒）
+        max_retries: 最大尝试次数，默认取重试策略的设置
+        retry_delay: 指数退避的基础间隔（秒），默认取重试策略的设置
+        use_cache: 是否使用本地响应缓存（全局缓存被禁用时无效）
+        stream: 是否以SSE流式方式接收结果
+        on_delta: 流式模式下每收到一段文本时的回调；命中缓存时以完整文本调用一次
+        retry_policy: 重试策略，默认使用进程内共享的 default_retry_policy
         
     返回:
-        生成的文本
+        生成的完整文本
+    """
+    cache_key = None
+    if use_cache and response_cache.enabled:
+        cache_key = response_cache.make_key(prompt, model, temperature, max_tokens)
+        try:
+            cached = response_cache.get(cache_key)
+        except (sqlite3.Error, OSError) as e:
+            print(f"读取响应缓存失败: {str(e)}")
+            cached = None
+        if cached is not None:
+            if stream and on_delta is not None:
+                on_delta(cached)
+            return cached
+            
+    policy = (retry_policy or default_retry_policy).with_overrides(
+        max_attempts=max_retries, base_delay=retry_delay
+    )
+    if stream:
+        content = _request_completion(prompt, model, temperature, max_tokens, policy,
+                                      on_delta=on_delta or (lambda text: None))
+    else:
+        content = _request_completion(prompt, model, temperature, max_tokens, policy)
+    
+    if cache_key is not None:
+        try:
+            response_cache.put(cache_key, content)
+        except (sqlite3.Error, OSError) as e:
+            print(f"写入响应缓存失败: {str(e)}")
+            
+    return content
+
+
+def discard_cached_response(
+    prompt: str,
+    model: str = "deepseek-chat",
+    temperature: float = 0.7,
+    max_tokens: int = 4000
+) -> None:
+    """
+    从响应缓存中删除指定调用的结果
+    
+    当缓存的响应无法被解析时调用，避免下次生成继续命中同一个错误结果
+    """
+    if not response_cache.enabled:
+        return
+    try:
+        response_cache.invalidate(response_cache.make_key(prompt, model, temperature, max_tokens))
+    except (sqlite3.Error, OSError) as e:
+        print(f"清除响应缓存失败: {str(e)}")
+
+
+def _request_completion(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    policy: RetryPolicy,
+    on_delta: Optional[Callable[[str], None]] = None
+) -> str:
+    """
+    向API发送请求并返回生成的文本，失败时按重试策略退避重试
+    
+    提供 on_delta 时使用流式模式。流式响应一旦开始向调用方输出内容就无法重放，
+    因此此后出现的错误不再重试，直接抛出。
     """
     api_key = get_api_key()
-    url = "https://api.deepseek.com/v1/chat/completions"
+    url = get_api_url()
+    session = session_manager.get_session()
     
     headers = {
         "Content-Type": "application/json",
@@ -57,28 +226,213 @@ def call_api(
         "temperature": temperature,
         "max_tokens": max_tokens
     }
+    if on_delta is not None:
+        data["stream"] = True
+        # 要求在最后一个事件中返回用量，用于退还限流额度
+        data["stream_options"] = {"include_usage": True}
+    
+    delivered = [False]
+    received_tokens = [0]
+    
+    def forward(text: str) -> None:
+        delivered[0] = True
+        received_tokens[0] += estimate_tokens(text)
+        on_delta(text)
     
-    for attempt in range(max_retries):
+    # TPM限流按提示词估算值加上最大生成长度预订额度，每次尝试结束后（无论成败）退还未用完的部分
+    prompt_tokens = estimate_tokens(prompt) if rate_limiter.enabled else 0
+    reserved_tokens = prompt_tokens + max_tokens if rate_limiter.enabled else 0
+    
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=120)
-            response.raise_for_status()  # 如果响应状态不是2xx，抛出HTTPError异常
-            
-            result = response.json()
-            if "choices" in result and result["choices"]:
-                return result["choices"][0]["message"]["content"]
-            else:
-                raise ValueError(f"API返回无效结果: {result}")
+            policy.wait_for_cooldown(started)
+            rate_limiter.acquire(reserved_tokens, max_wait=policy.remaining(started))
+            usage: Dict[str, Any] = {}
+            received_tokens[0] = 0
+            try:
+                timeout = max(1.0, min(120.0, policy.remaining(started)))
+                
+                if on_delta is not None:
+                    with session.post(url, headers=headers, json=data, timeout=timeout, stream=True) as response:
+                        response.raise_for_status()
+                        return _read_event_stream(response, forward, usage)
+                        
+                response = session.post(url, headers=headers, json=data, timeout=timeout)
+                response.raise_for_status()  # 如果响应状态不是2xx，抛出HTTPError异常
                 
+                result = response.json()
+                usage.update(result.get("usage") or {})
+                if "choices" in result and result["choices"]:
+                    content = result["choices"][0]["message"]["content"]
+                    received_tokens[0] = estimate_tokens(content or "")
+                    return content
+                else:
+                    raise ValueError(f"API返回无效结果: {result}")
+            finally:
+                if reserved_tokens:
+                    _refund_unused(reserved_tokens, usage.get("total_tokens"), prompt_tokens + received_tokens[0])
+                    
+        except TimeoutError as e:
+            raise RuntimeError(f"API请求失败，超出总时限: {str(e)}")
         except requests.exceptions.RequestException as e:
-            print(f"API请求失败 (尝试 {attempt+1}/{max_retries}): {str(e)}")
+            print(f"API请求失败 (尝试 {attempt}/{policy.max_attempts}): {str(e)}")
             
-            if attempt < max_retries - 1:
-                print(f"等待 {retry_delay} 秒后重试...")
-                time.sleep(retry_delay)
-            else:
+            if delivered[0]:
+                raise RuntimeError(f"流式响应中断: {str(e)}")
+            
+            if not policy.is_retryable(e):
+                raise RuntimeError(f"API请求失败，错误不可重试: {str(e)}")
+            
+            if attempt >= policy.max_attempts:
                 raise RuntimeError(f"API请求失败，已达到最大重试次数: {str(e)}")
+            
+            delay = policy.next_delay(attempt, e)
+            if delay >= policy.remaining(started):
+                raise RuntimeError(f"API请求失败，超出总时限: {str(e)}")
+                
+            print(f"等待 {delay:.1f} 秒后重试...")
+            time.sleep(delay)
+
+
+def _refund_unused(reserved_tokens: int, used_tokens: Optional[int], estimated_tokens: int) -> None:
+    """
+    一次尝试结束后退还未用完的TPM额度
+    
+    参数:
+        reserved_tokens: 本次尝试预订的token数
+        used_tokens: API返回的实际用量，没有返回时为None
+        estimated_tokens: 没有实际用量时按提示词和已收到的内容估算的用量
+    """
+    used = used_tokens if used_tokens else estimated_tokens
+    if used < reserved_tokens:
+        # 共享状态不可用时限流器自行退回进程内限流，退还不会抛出异常
+        rate_limiter.refund(reserved_tokens - used)
+
+
+def _read_event_stream(response: "requests.Response", on_delta: Callable[[str], None],
+                       usage: Optional[Dict[str, Any]] = None) -> str:
+    """
+    读取SSE格式的流式响应
+    
+    参数:
+        response: 以stream=True发出的请求的响应
+        on_delta: 每收到一段文本时的回调
+        usage: 服务端在流中返回用量时写入其中
+        
+    返回:
+        拼接后的完整文本
+    """
+    parts = []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            break
+        try:
+            event = json.loads(payload)
+        except json.JSONDecodeError:
+            continue
+        if usage is not None and event.get("usage"):
+            usage.update(event["usage"])
+        choices = event.get("choices") or []
+        if not choices:
+            continue
+        text = (choices[0].get("delta") or {}).get("content")
+        if text:
+            parts.append(text)
+            on_delta(text)
     
-    raise RuntimeError("无法连接到API服务")
+    if not parts:
+        raise ValueError("API流式响应中没有内容")
+    return "".join(parts)
+
+
+# 异步调用的并发上限，每个事件循环各自持有一个信号量
+_async_concurrency = max(1, _env_int("API_MAX_CONCURRENCY", 4))
+_async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_async_executor: Optional[ThreadPoolExecutor] = None
+_async_lock = threading.Lock()
+
+
+def set_api_concurrency(limit: int) -> None:
+    """
+    设置异步API调用的最大并发数
+    
+    参数:
+        limit: 同时进行中的请求数量上限
+    """
+    global _async_concurrency, _async_executor
+    if limit < 1:
+        raise ValueError("并发数必须大于0")
+    with _async_lock:
+        _async_concurrency = limit
+        _async_semaphores.clear()
+        if _async_executor is not None:
+            _async_executor.shutdown(wait=False)
+            _async_executor = None
+    session_manager.configure(pool_size=max(limit, session_manager.pool_size))
+
+
+def _get_async_resources() -> tuple:
+    """获取当前事件循环的信号量和执行请求用的线程池"""
+    global _async_executor
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        semaphore = _async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(_async_concurrency)
+            _async_semaphores[loop] = semaphore
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(
+                max_workers=_async_concurrency,
+                thread_name_prefix="api"
+            )
+        return semaphore, _async_executor
+
+
+async def acall_api(
+    prompt: str,
+    model: str = "deepseek-chat",
+    temperature: float = 0.7,
+    max_tokens: int = 4000,
+    max_retries: Optional[int] = None,
+    retry_delay: Optional[float] = None,
+    use_cache: bool = True,
+    stream: bool = False,
+    on_delta: Optional[Callable[[str], None]] = None,
+    retry_policy: Optional[RetryPolicy] = None
+) -> str:
+    """
+    call_api 的异步版本
+    
+    请求通过共享连接池在后台线程中发出，同一事件循环上同时进行中的请求数
+    受信号量限制（默认4，可通过API_MAX_CONCURRENCY或set_api_concurrency调整），
+    因此可以用 asyncio.gather 一次提交大量题目而不会压垮API服务。
+    
+    参数与返回值同 call_api；流式模式下 on_delta 在后台线程中被调用
+    """
+    semaphore, executor = _get_async_resources()
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor,
+            functools.partial(
+                call_api, prompt,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                use_cache=use_cache,
+                stream=stream,
+                on_delta=on_delta,
+                retry_policy=retry_policy
+            )
+        )
 
 
 def mock_api_call(prompt: str) -> str:
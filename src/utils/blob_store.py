@@ -0,0 +1,318 @@
+"""
+去重存储模块 - 测试数据按内容哈希保存一份，题目目录中的文件通过硬链接引用
+"""
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from .stream_writer import DEFAULT_CHUNK_SIZE, TextSource, write_normalized
+
+DEFAULT_STORE_PATH = os.path.join("problems", ".store")
+DEFAULT_GC_GRACE = 3600  # 无引用的数据块至少保留1小时，避免与正在进行的写入竞争
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class BlobStore:
+    """
+    内容寻址的测试数据存储
+
+    每份不同的测试数据在 .store/<哈希前两位>/<哈希> 保存一次，题目目录中的 .in/.out
+    文件是指向它的硬链接，因此在重新生成或相似题目之间重复出现的数据只占一份磁盘空间，
+    内容已存在时也不需要再写一遍。数据块的链接数为1说明已没有题目引用，由 gc 清理。
+
+    硬链接共享同一份数据，所有写入测试数据的地方都必须先断开链接（见 stream_writer.detach）
+    或写入新文件再替换，不能原地修改。文件系统不支持硬链接或存储与题目不在同一设备时，
+    自动退回普通写入。
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_PATH, enabled: bool = True,
+                 gc_grace: float = DEFAULT_GC_GRACE):
+        """
+        参数:
+            root: 存储目录，必须与题目目录位于同一文件系统
+            enabled: 是否启用去重
+            gc_grace: 无引用的数据块被清理前至少保留的秒数
+        """
+        self.root = root
+        self.enabled = enabled
+        self.gc_grace = gc_grace
+        self.hits = 0  # 内容已存在、只建立链接的写入次数
+        self.misses = 0  # 新增数据块的次数
+        self.bytes_deduplicated = 0  # 因内容已存在而省去的写入字节数
+        self._lock = threading.Lock()
+        self._links_failed = False
+
+    def blob_path(self, digest: str) -> str:
+        """数据块路径"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def write(self, path: str, source: TextSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        去除首尾空白后写入 path，内容相同的文件共享同一个数据块
+
+        参数:
+            path: 目标文件路径
+            source: 数据来源
+            chunk_size: 流式写入的分块大小
+
+        返回:
+            文件字节数
+        """
+        if not self.enabled or self._links_failed:
+            return write_normalized(path, source, chunk_size)
+
+        if isinstance(source, (str, bytes, bytearray, memoryview)):
+            # 已在内存中的数据先计算哈希，内容已存在时完全不需要写入
+            text = source if isinstance(source, str) else bytes(source).decode("utf-8")
+            data = text.strip().encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()
+            blob = self.blob_path(digest)
+
+            def publish() -> None:
+                temp_path = self._temp_path()
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                self._publish(temp_path, blob)
+
+            if not os.path.exists(blob):
+                publish()
+            else:
+                self._count_hit(len(data))
+            return self._link(blob, path, len(data), restore=publish,
+                              fallback=lambda: write_normalized(path, data))
+
+        # 流式数据先写入临时文件，再根据内容哈希决定是否发布为新数据块；
+        # 临时文件保留到链接完成，数据块不存在或在此期间被 gc 删除时用它创建
+        temp_path = self._temp_path()
+        try:
+            size = write_normalized(temp_path, source, chunk_size)
+            blob = self.blob_path(_file_sha256(temp_path))
+            if os.path.exists(blob):
+                self._count_hit(size)
+            return self._link(blob, path, size, restore=lambda: self._publish(temp_path, blob, keep=True),
+                              fallback=lambda: self._copy(temp_path, path))
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def ingest(self, path: str) -> bool:
+        """
+        将已写好的文件纳入存储：内容已存在时改为链接到已有数据块，否则把文件登记为新数据块
+
+        参数:
+            path: 文件路径
+
+        返回:
+            是否与已有数据重复
+        """
+        if not self.enabled or self._links_failed:
+            return False
+        blob = self.blob_path(_file_sha256(path))
+        size = os.path.getsize(path)
+        try:
+            if os.path.samefile(blob, path):
+                return False
+        except FileNotFoundError:
+            return self._adopt(path, blob)
+        self._count_hit(size)
+        # 链接失败时 path 仍是原来的文件，无需退回写入
+        self._link(blob, path, size, restore=lambda: self._adopt(path, blob), fallback=lambda: None)
+        return True
+
+    def _adopt(self, path: str, blob: str) -> bool:
+        """把文件登记为新数据块，返回是否改为链接到了其他线程刚写入的相同数据块"""
+        try:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.link(path, blob)
+            with self._lock:
+                self.misses += 1
+        except FileExistsError:
+            # 其他线程刚刚写入了相同的内容
+            return self.ingest(path)
+        except OSError as e:
+            self._disable_links(e)
+        return False
+
+    def gc(self) -> Tuple[int, int]:
+        """
+        删除已没有题目引用的数据块和遗留的临时文件
+
+        返回:
+            (删除的数据块数, 释放的字节数)
+        """
+        removed = 0
+        freed = 0
+        if not os.path.isdir(self.root):
+            return removed, freed
+        deadline = time.time() - self.gc_grace
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                    # 建立或删除链接会更新ctime，刚被引用或刚写入的数据块不会被误删
+                    if stat.st_nlink > 1 or stat.st_ctime > deadline:
+                        continue
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+                freed += stat.st_size
+        return removed, freed
+
+    def stats(self) -> Dict[str, Any]:
+        """返回存储占用和去重效果统计"""
+        blobs = 0
+        stored = 0
+        referenced = 0
+        unreferenced = 0
+        if os.path.isdir(self.root):
+            for directory, _, files in os.walk(self.root):
+                if os.path.basename(directory) == "tmp":
+                    continue
+                for name in files:
+                    try:
+                        stat = os.stat(os.path.join(directory, name))
+                    except FileNotFoundError:
+                        continue
+                    blobs += 1
+                    stored += stat.st_size
+                    # 除存储自身外的每个链接都是一个引用它的测试数据文件
+                    referenced += stat.st_size * (stat.st_nlink - 1)
+                    if stat.st_nlink <= 1:
+                        unreferenced += 1
+        return {
+            "blobs": blobs,
+            "stored_bytes": stored,
+            "referenced_bytes": referenced,
+            "saved_bytes": max(0, referenced - stored),
+            "unreferenced_blobs": unreferenced,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_deduplicated": self.bytes_deduplicated,
+        }
+
+    def describe(self) -> str:
+        """返回一行统计摘要"""
+        stats = self.stats()
+        return (f"去重存储: {stats['blobs']} 个数据块共 {stats['stored_bytes'] / 1024 / 1024:.1f} MB，"
+                f"被引用 {stats['referenced_bytes'] / 1024 / 1024:.1f} MB，"
+                f"节省 {stats['saved_bytes'] / 1024 / 1024:.1f} MB；本次运行 {stats['hits']} 次重复内容"
+                f"（省去写入 {stats['bytes_deduplicated'] / 1024 / 1024:.1f} MB），{stats['misses']} 个新数据块")
+
+    def ingest_tree(self, base_dir: str = "problems") -> int:
+        """
+        将题库中已有的测试数据纳入存储，用于启用去重之前生成的题目
+
+        返回:
+            与已有数据重复的文件数
+        """
+        duplicates = 0
+        if not os.path.isdir(base_dir):
+            return duplicates
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                test_cases_dir = os.path.join(entry.path, "test_cases")
+                if entry.name.startswith(".") or not os.path.isdir(test_cases_dir):
+                    continue
+                for name in sorted(os.listdir(test_cases_dir)):
+                    path = os.path.join(test_cases_dir, name)
+                    if os.path.isfile(path) and self.ingest(path):
+                        duplicates += 1
+        return duplicates
+
+    def _temp_path(self) -> str:
+        directory = os.path.join(self.root, "tmp")
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix="blob_", dir=directory)
+        os.close(fd)
+        return temp_path
+
+    def _publish(self, temp_path: str, blob: str, keep: bool = False) -> None:
+        """
+        将临时文件发布为数据块，内容相同的并发写入互相覆盖不影响结果
+
+        keep 为True时以硬链接发布，临时文件仍然保留，可在链接失败时作为写入的数据来源
+        """
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        os.chmod(temp_path, 0o644)
+        if not keep:
+            os.replace(temp_path, blob)
+        else:
+            try:
+                os.link(temp_path, blob)
+            except FileExistsError:
+                return
+        with self._lock:
+            self.misses += 1
+
+    def _link(self, blob: str, path: str, size: int, restore: Callable[[], Any],
+              fallback: Callable[[], Any]) -> int:
+        """
+        让 path 成为数据块的硬链接，先链接到临时名再原子替换
+
+        检查数据块存在与建立链接之间，gc 可能删除了这个没有引用的数据块；
+        直接尝试链接，数据块不存在时调用 restore 重新创建后再链接一次。
+        仍然无法链接时调用 fallback 从调用方的数据普通写入 path，不依赖可能已被删除的数据块
+        """
+        directory = os.path.dirname(path) or "."
+        temp_path = os.path.join(directory, f".{os.path.basename(path)}.link")
+        try:
+            if os.path.lexists(temp_path):
+                os.unlink(temp_path)
+            try:
+                os.link(blob, temp_path)
+            except FileNotFoundError:
+                if not os.path.isdir(directory):
+                    raise
+                restore()
+                if os.path.exists(path) and os.path.samefile(blob, path):
+                    # 文件本身被登记为了数据块（见 ingest）
+                    return size
+                os.link(blob, temp_path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            if os.path.lexists(temp_path):
+                os.unlink(temp_path)
+            if not isinstance(e, FileNotFoundError):
+                # 数据块被并发删除不代表文件系统不支持硬链接
+                self._disable_links(e)
+            # 退回普通写入
+            fallback()
+        return size
+
+    @staticmethod
+    def _copy(source_path: str, path: str) -> None:
+        with open(source_path, "rb") as source:
+            write_normalized(path, source)
+
+    def _disable_links(self, error: OSError) -> None:
+        if not self._links_failed:
+            self._links_failed = True
+            print(f"无法创建硬链接，已停用测试数据去重: {str(error)}")
+
+    def _count_hit(self, size: int) -> None:
+        with self._lock:
+            self.hits += 1
+            self.bytes_deduplicated += size
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 进程内共享的去重存储
+blob_store = BlobStore(
+    root=os.environ.get("DEDUP_STORE_PATH", DEFAULT_STORE_PATH),
+    enabled=os.environ.get("DEDUP_STORE", "1").lower() not in ("0", "false", "no")
+)
@@ -0,0 +1,381 @@
+"""
+保存事务模块 - 先写入暂存目录，记录预写日志后以原子重命名提交，崩溃后可恢复
+"""
+import os
+import sys
+import json
+import time
+import shutil
+from typing import Dict, List, Optional
+
+from .stream_writer import BatchWriter, TextSource, fsync_paths
+from .blob_store import blob_store
+
+JOURNAL_NAME = ".journal.json"
+STAGING_NAME = ".staging"
+LOCK_NAME = ".lock"
+
+if os.name == "posix":
+    import fcntl
+else:
+    import msvcrt
+
+
+class DirectoryLock:
+    """
+    题目目录的事务所有者锁
+
+    锁加在题目目录下的锁文件上，进程退出（包括崩溃）时由操作系统自动释放，
+    因此持有锁即表示事务仍在进行，拿不到锁的目录不能恢复。
+    同一进程中分别打开的锁文件之间同样互斥，两个线程保存同一目录时会依次进行。
+    """
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, LOCK_NAME)
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        获取锁
+
+        参数:
+            blocking: 为False时锁被占用立即返回
+
+        返回:
+            是否获得了锁
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        while True:
+            try:
+                if os.name == "posix":
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if not blocking:
+                    os.close(fd)
+                    return False
+                time.sleep(0.05)
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        """释放锁，锁文件保留在目录中"""
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            if os.name == "posix":
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+class SaveTransaction:
+    """
+    题目目录的保存事务
+
+    所有文件先写入题目目录下的暂存目录（与目标在同一文件系统，重命名是原子的），
+    提交时按以下顺序进行：
+        1. 一次性将全部暂存文件同步到磁盘
+        2. 原子地写入日志，列出要替换和删除的文件——日志落盘即为提交点
+        3. 逐个重命名暂存文件、删除文件，并按目录同步一次
+        4. 调用方完成后续步骤（如更新压缩包）后删除日志和暂存目录
+
+    在提交点之前崩溃，恢复时丢弃暂存目录，原有文件保持不变；在提交点之后崩溃，
+    恢复时根据日志重做剩余的重命名和删除，因此目录中不会出现新旧数据混杂的状态。
+
+    用法:
+        with SaveTransaction(directory) as txn:
+            txn.write(path, data)
+            txn.write_text(path, text)
+            txn.remove(path)
+    正常退出时自动提交，发生异常时回滚。write 的参数是最终路径，
+    因此可以作为 BatchWriter 传给 TestCase.save_to_files 等方法。
+
+    事务从开始到结束持有目录锁，其他进程（批量生成、另一个GUI实例）的恢复流程
+    会跳过该目录，不会删除正在使用的暂存目录。
+    """
+
+    def __init__(self, directory: str):
+        """
+        参数:
+            directory: 题目目录，事务中的文件都必须位于该目录下
+        """
+        self.directory = directory
+        self.staging_dir = os.path.join(directory, STAGING_NAME)
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self._lock = DirectoryLock(directory)
+        # 测试数据写入去重存储，暂存目录中的文件是数据块的硬链接，重命名后仍然共享
+        self.batch = BatchWriter(store=blob_store)
+        self.bytes_written = 0
+        self._writes: Dict[str, str] = {}  # 相对路径: 暂存路径
+        self._removes: List[str] = []
+        self._invalidate: List[str] = []
+        self._committed = False
+        self._applied = False
+        self._closed = False
+
+    def __enter__(self) -> "SaveTransaction":
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._committed:
+            if not self._applied:
+                # 重命名中途失败，保留日志和暂存文件并释放锁，由恢复流程重做
+                self._lock.release()
+                return
+            if exc_type is not None:
+                # 文件已经提交，后续步骤失败时使依赖它们的派生文件失效
+                _remove_files(self.directory, self._invalidate)
+            self.close()
+        elif exc_type is None:
+            try:
+                self.commit()
+            except BaseException:
+                # 提交失败同样需要按上面的规则回滚或保留日志，并释放目录锁
+                self.__exit__(*sys.exc_info())
+                raise
+            self.close()
+        else:
+            self.rollback()
+
+    def begin(self) -> None:
+        """开始事务：获取目录锁（等待同一目录上正在进行的事务结束），再恢复上一次未完成的事务"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock.acquire()
+        try:
+            _recover(self.directory)
+            os.makedirs(self.staging_dir, exist_ok=True)
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def write(self, path: str, source: TextSource) -> int:
+        """
+        流式写入一个文件（去除首尾空白），提交前写在暂存目录中
+
+        参数:
+            path: 最终文件路径
+            source: 数据来源
+
+        返回:
+            写入的字节数
+        """
+        written = self.batch.write(self._stage(path), source)
+        self.bytes_written += written
+        return written
+
+    def write_text(self, path: str, text: str) -> None:
+        """
+        原样写入文本文件，提交前写在暂存目录中
+
+        参数:
+            path: 最终文件路径
+            text: 文件内容
+        """
+        staged = self._stage(path)
+        with open(staged, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.batch.add(staged)
+
+    def remove(self, path: str) -> None:
+        """提交时删除文件"""
+        relative = self._relative(path)
+        self._writes.pop(relative, None)
+        self._removes.append(relative)
+
+    def invalidate_on_recovery(self, path: str) -> None:
+        """
+        登记一个由本次提交的文件派生出来的文件（如压缩包清单），
+        提交后、事务结束前发生崩溃或异常时将其删除，使其在下次使用时重建
+        """
+        self._invalidate.append(self._relative(path))
+
+    def commit(self) -> None:
+        """将暂存的修改提交到题目目录，提交后事务结束前仍保留日志"""
+        if self._committed:
+            return
+        # 1. 批量同步暂存文件及暂存目录
+        self.batch.commit()
+        # 2. 写入日志
+        _write_json_atomic(self.journal_path, {
+            "writes": list(self._writes),
+            "removes": self._removes,
+            "invalidate": self._invalidate,
+        })
+        self._committed = True
+        # 3. 重命名和删除
+        _apply(self.directory, self.staging_dir, list(self._writes), self._removes, strict=True)
+        self._applied = True
+
+    def close(self) -> None:
+        """删除日志和暂存目录，结束事务"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        finally:
+            self._lock.release()
+
+    def rollback(self) -> None:
+        """放弃尚未提交的修改"""
+        if self._committed:
+            raise RuntimeError("事务已提交，无法回滚")
+        self._closed = True
+        try:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        finally:
+            self._lock.release()
+
+    def _relative(self, path: str) -> str:
+        relative = os.path.relpath(path, self.directory)
+        if relative.startswith(os.pardir) or os.path.isabs(relative):
+            raise ValueError(f"文件 {path} 不在题目目录 {self.directory} 中")
+        return relative
+
+    def _stage(self, path: str) -> str:
+        relative = self._relative(path)
+        staged = os.path.join(self.staging_dir, relative)
+        os.makedirs(os.path.dirname(staged), exist_ok=True)
+        if relative in self._removes:
+            self._removes.remove(relative)
+        self._writes[relative] = staged
+        return staged
+
+
+def _apply(directory: str, staging_dir: str, writes: List[str], removes: List[str],
+           strict: bool = False) -> None:
+    """
+    按日志重命名暂存文件并删除文件，可重复执行；每个受影响的目录只同步一次
+
+    参数:
+        strict: 由事务所有者提交时为True，此时暂存文件不可能已被移动，缺失说明数据丢失，抛出异常
+    """
+    directories = set()
+    for relative in writes:
+        staged = os.path.join(staging_dir, relative)
+        if not os.path.exists(staged):
+            if strict:
+                raise FileNotFoundError(f"暂存文件 {staged} 丢失，保存未完成")
+            # 上次恢复或提交时已经移动过
+            continue
+        target = os.path.join(directory, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(staged, target)
+        directories.add(os.path.dirname(target))
+    directories.update(_remove_files(directory, removes))
+    _fsync_directories(directories)
+
+
+def _remove_files(directory: str, relatives: List[str]) -> List[str]:
+    """删除文件，返回受影响的目录"""
+    directories = []
+    for relative in relatives:
+        target = os.path.join(directory, relative)
+        if os.path.exists(target):
+            os.remove(target)
+            directories.append(os.path.dirname(target))
+    return directories
+
+
+def _fsync_directories(directories) -> None:
+    # Windows 不支持打开目录进行同步
+    if os.name != "posix":
+        return
+    for directory in directories:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _write_json_atomic(path: str, data: Dict) -> None:
+    """写入临时文件、同步后原子替换，日志要么完整存在要么不存在"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    fsync_paths([path])
+
+
+def recover_directory(directory: str) -> Optional[str]:
+    """
+    恢复题目目录中未完成的保存事务
+
+    参数:
+        directory: 题目目录
+
+    返回:
+        "committed" 表示按日志重做了已提交的事务，"rolled_back" 表示丢弃了未提交的暂存文件，
+        没有需要恢复的事务或事务仍在其他进程（线程）中进行时返回None
+    """
+    if not any(os.path.exists(os.path.join(directory, name))
+               for name in (JOURNAL_NAME, f"{JOURNAL_NAME}.tmp", STAGING_NAME)):
+        return None
+    lock = DirectoryLock(directory)
+    if not lock.acquire(blocking=False):
+        return None
+    try:
+        return _recover(directory)
+    finally:
+        lock.release()
+
+
+def _recover(directory: str) -> Optional[str]:
+    """恢复未完成的事务，调用方必须持有目录锁"""
+    journal_path = os.path.join(directory, JOURNAL_NAME)
+    staging_dir = os.path.join(directory, STAGING_NAME)
+    outcome = None
+    if os.path.exists(journal_path):
+        try:
+            with open(journal_path, "r", encoding="utf-8") as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            journal = None
+        if journal is not None:
+            _apply(directory, staging_dir, journal.get("writes", []), journal.get("removes", []))
+            _remove_files(directory, journal.get("invalidate", []))
+            outcome = "committed"
+        os.remove(journal_path)
+    if os.path.exists(f"{journal_path}.tmp"):
+        # 日志尚未写完就中断，事务没有提交
+        os.remove(f"{journal_path}.tmp")
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        outcome = outcome or "rolled_back"
+    return outcome
+
+
+def recover_all(base_dir: str = "problems") -> Dict[str, str]:
+    """
+    恢复题库中所有题目目录的未完成事务，用于程序启动时；正在进行的事务会被跳过
+
+    参数:
+        base_dir: 题库目录
+
+    返回:
+        {题目目录: 恢复结果}
+    """
+    recovered = {}
+    if not os.path.isdir(base_dir):
+        return recovered
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            outcome = recover_directory(entry.path)
+            if outcome:
+                recovered[entry.path] = outcome
+    return recovered
@@ -0,0 +1,104 @@
+"""
+增量JSON解析模块 - 从流式返回的文本中逐个取出数组元素
+"""
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+
+class JsonArrayStreamParser:
+    """
+    增量解析 {"<key>": [ {...}, {...}, ... ]} 形式的JSON文本
+
+    每次 feed 一段新到达的文本，返回本次新闭合的数组元素（已解析为对象）。
+    只跟踪字符串、转义和括号深度，不会重复扫描已经处理过的文本，
+    因此即使模型在JSON前后输出了额外的说明文字或代码块标记也能正常工作。
+    """
+
+    def __init__(self, key: str = "test_cases"):
+        self._key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._pos = 0  # 下一个待扫描字符的位置
+        self._in_array = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = -1
+        self.count = 0  # 已解析出的元素数量
+
+    @property
+    def finished(self) -> bool:
+        """数组是否已经闭合"""
+        return self._finished
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        输入新到达的文本
+        
+        参数:
+            text: 新增的文本片段
+        
+        返回:
+            本次新闭合的数组元素列表
+        """
+        if self._finished or not text:
+            return []
+        
+        self._buffer += text
+        items = []
+        
+        if not self._in_array:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                return []
+            self._in_array = True
+            self._pos = match.end()
+        
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._item_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # 数组本身闭合
+                    self._finished = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    item = self._decode(buffer[self._item_start:i + 1])
+                    if item is not None:
+                        items.append(item)
+                        self.count += 1
+                    self._item_start = -1
+            i += 1
+        
+        # 丢弃已经处理完的前缀，只保留未闭合元素的文本
+        keep_from = self._item_start if self._item_start >= 0 else i
+        self._buffer = buffer[keep_from:]
+        if self._item_start >= 0:
+            self._item_start = 0
+        self._pos = i - keep_from
+        return items
+
+    @staticmethod
+    def _decode(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
@@ -0,0 +1,84 @@
+"""
+行索引模块 - 在不读入内存的大文件（mmap视图）上按行号定位和截取文本
+"""
+import bisect
+from typing import List, Tuple
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+
+
+class LineIndex:
+    """
+    稀疏行索引
+
+    建立索引时只统计每个数据块中的换行符数量，不记录每一行的位置，因此上百MB的测试数据
+    也只需扫描一遍、保存几百个整数；按行号定位时先确定所在的块，再只在这一个块中查找。
+    """
+
+    def __init__(self, data, block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        参数:
+            data: 支持切片的字节数据，如 TestCase.input_view() 返回的mmap视图
+            block_size: 数据块大小
+        """
+        self.data = data
+        self.size = len(data)
+        self.block_size = block_size
+        # _newlines_before[i] 是第i块之前的换行符总数，最后一项是全文的换行符数
+        self._newlines_before: List[int] = [0]
+        for start in range(0, self.size, block_size):
+            count = bytes(data[start:start + block_size]).count(b"\n")
+            self._newlines_before.append(self._newlines_before[-1] + count)
+        newlines = self._newlines_before[-1]
+        # 最后一行没有换行符结尾时同样计为一行
+        ends_with_newline = self.size == 0 or data[self.size - 1] == ord("\n")
+        self.line_count = newlines if ends_with_newline else newlines + 1
+
+    def offset_of(self, line: int) -> int:
+        """
+        返回第 line 行（从0开始）起始处的字节偏移，超出末行时返回文件大小
+        """
+        if line <= 0:
+            return 0
+        if line >= self.line_count:
+            return self.size
+        # 第 line 行从第 line 个换行符之后开始
+        block = bisect.bisect_left(self._newlines_before, line) - 1
+        start = block * self.block_size
+        chunk = bytes(self.data[start:start + self.block_size])
+        remaining = line - self._newlines_before[block]
+        # split 在C层面完成查找，最后一段就是目标换行符之后的内容
+        rest = chunk.split(b"\n", remaining)[-1]
+        return start + len(chunk) - len(rest)
+
+    def line_of(self, offset: int) -> int:
+        """返回字节偏移所在的行号（从0开始）"""
+        offset = max(0, min(offset, self.size))
+        block = offset // self.block_size
+        start = block * self.block_size
+        return self._newlines_before[block] + bytes(self.data[start:offset]).count(b"\n")
+
+    def window(self, first_line: int, max_lines: int, max_bytes: int) -> Tuple[str, int, bool]:
+        """
+        截取从 first_line 开始的若干行
+
+        参数:
+            first_line: 起始行号（从0开始）
+            max_lines: 最多截取的行数
+            max_bytes: 最多截取的字节数，超长的行会在此处截断
+
+        返回:
+            (文本, 截取的行数, 是否因字节数限制被截断)
+        """
+        start = self.offset_of(first_line)
+        end = self.offset_of(first_line + max_lines)
+        truncated = end - start > max_bytes
+        if truncated:
+            end = start + max_bytes
+        raw = bytes(self.data[start:end])
+        # 截断处可能落在多字节字符中间，按替换字符显示
+        text = raw.decode("utf-8", errors="replace").replace("\r\n", "\n")
+        if text.endswith("\n"):
+            text = text[:-1]
+        lines = min(max_lines, self.line_count - first_line) if not truncated else text.count("\n") + 1
+        return text, max(0, lines), truncated
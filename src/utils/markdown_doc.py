@@ -0,0 +1,231 @@
+"""
+Markdown题面解析模块 - 一次扫描将题目描述切分为标题章节和代码块
+"""
+import re
+from typing import Iterator, List, Optional
+
+# 一次 finditer 同时识别ATX标题（# 到 ######）和代码块围栏（``` 或 ~~~），其余文本不逐行处理。
+# 以换行符开头而不是用 ^ 锚定，正则引擎可以直接跳到下一个换行符，而不必在每个位置尝试匹配
+_BLOCK_PATTERN = re.compile(
+    r'\n[ \t]{0,3}(?:(?P<fence>`{3,}|~{3,})(?P<info>[^\n]*)'
+    r'|(?P<hashes>#{1,6})(?:[ \t]+(?P<title>[^\n]*?))?[ \t#]*)$',
+    re.MULTILINE
+)
+# 比较章节标题时忽略的字符：空白、加粗标记、冒号、编号符号
+_TITLE_NOISE = re.compile(r'[\s*_:：#.．、()（）\[\]]+')
+_SAMPLE_PREFIXES = ("样例", "示例")
+
+
+class CodeBlock:
+    """围栏代码块"""
+
+    def __init__(self, info: str, content: str, start: int):
+        self.info = info  # 围栏后的语言标记
+        self.content = content  # 代码块内容，不含围栏行
+        self.start = start  # 开始围栏在原文中的位置
+
+
+class Section:
+    """一个标题及其下属内容（直到下一个同级或更高级标题），子标题是 children"""
+
+    def __init__(self, source: str, level: int, title: str, start: int, body_start: int,
+                 parent: Optional["Section"] = None):
+        self.source = source
+        self.level = level
+        self.title = title
+        self.start = start  # 标题行在原文中的位置
+        self.body_start = body_start
+        self.end = len(source)
+        self.parent = parent
+        self.children: List["Section"] = []
+        self.code_blocks: List[CodeBlock] = []  # 直接属于本章节（不在子章节中）的代码块
+        self.kind = _title_kind(title)
+
+    @property
+    def text(self) -> str:
+        """章节正文（含子章节），去除首尾空白"""
+        return self.source[self.body_start:self.end].strip()
+
+    @property
+    def intro(self) -> str:
+        """第一个子标题之前的正文"""
+        end = self.children[0].start if self.children else self.end
+        return self.source[self.body_start:end].strip()
+
+    def walk(self) -> Iterator["Section"]:
+        """按原文顺序遍历本章节及全部子章节"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class Sample:
+    """一组样例"""
+
+    def __init__(self, input_data: str = "", output_data: str = "", explanation: str = ""):
+        self.input_data = input_data
+        self.output_data = output_data
+        self.explanation = explanation
+
+
+class MarkdownDocument:
+    """
+    解析后的题目描述
+
+    sections 按原文顺序列出全部章节，roots 是顶层章节树；
+    查找章节、提取样例都在这棵树上进行，不再对原文重复做正则扫描。
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.sections: List[Section] = []
+        self.roots: List[Section] = []
+        self.code_blocks: List[CodeBlock] = []  # 全部代码块，按原文顺序
+
+    def find(self, kind: str) -> Optional[Section]:
+        """
+        返回第一个指定类型的章节
+
+        参数:
+            kind: 章节类型，如 "input_format"、"output_format"、"samples"、"hints"、"subtasks"
+        """
+        for section in self.sections:
+            if section.kind == kind:
+                return section
+        return None
+
+    def section_text(self, kind: str) -> str:
+        """返回第一个指定类型章节的正文，不存在时返回空字符串"""
+        section = self.find(kind)
+        return section.text if section else ""
+
+    def samples(self) -> List[Sample]:
+        """
+        提取样例
+
+        优先在“样例”/“示例”章节中按“输入”“输出”“解释”子标题配对，子标题下取第一个代码块；
+        样例章节没有这些子标题时，按顺序将其中的代码块两两配对。
+        全文都没有样例章节时，在全部章节中查找“输入”“输出”子标题。
+        """
+        containers = []
+        covered = -1
+        for section in self.sections:
+            if section.kind == "samples" and section.start >= covered:
+                containers.append(section)
+                covered = section.end
+        if not containers:
+            return _pair_sections([section for root in self.roots for section in root.walk()])
+
+        samples = []
+        for container in containers:
+            found = _pair_sections(list(container.walk()))
+            if not found:
+                blocks = [block for section in container.walk() for block in section.code_blocks]
+                found = [Sample(blocks[i].content.strip(), blocks[i + 1].content.strip())
+                         for i in range(0, len(blocks) - 1, 2)]
+            samples.extend(found)
+        return samples
+
+
+def parse_markdown(source: str) -> MarkdownDocument:
+    """
+    解析题目描述
+
+    参数:
+        source: Markdown文本
+
+    返回:
+        MarkdownDocument
+    """
+    document = MarkdownDocument(source)
+    stack: List[Section] = []
+    fence = None  # 未闭合的围栏: (字符, 长度, 语言标记, 内容起点, 围栏起点)
+    # 在开头补一个换行符使第一行也能匹配，匹配位置恰好对应原文中的行首，
+    # match.end() - 1 对应原文中的行尾
+    for match in _BLOCK_PATTERN.finditer("\n" + source):
+        marker = match.group("fence")
+        if fence is not None:
+            # 代码块内的 # 不是标题，只寻找匹配的结束围栏
+            if marker and marker[0] == fence[0] and len(marker) >= fence[1] and not match.group("info").strip():
+                _add_code_block(document, stack, CodeBlock(fence[2], source[fence[3]:match.start()], fence[4]))
+                fence = None
+            continue
+        if marker:
+            info = match.group("info")
+            if marker[0] == "`" and "`" in info:
+                # 行内代码，不是围栏
+                continue
+            fence = (marker[0], len(marker), info.strip(), match.end(), match.start())
+            continue
+
+        level = len(match.group("hashes"))
+        while stack and stack[-1].level >= level:
+            stack.pop().end = match.start()
+        parent = stack[-1] if stack else None
+        section = Section(source, level, (match.group("title") or "").strip(), match.start(),
+                          min(match.end(), len(source)), parent)
+        (parent.children if parent else document.roots).append(section)
+        document.sections.append(section)
+        stack.append(section)
+
+    if fence is not None:
+        # 未闭合的代码块延续到文末
+        _add_code_block(document, stack, CodeBlock(fence[2], source[fence[3]:], fence[4]))
+    return document
+
+
+def _add_code_block(document: MarkdownDocument, stack: List[Section], block: CodeBlock) -> None:
+    document.code_blocks.append(block)
+    if stack:
+        stack[-1].code_blocks.append(block)
+
+
+def _title_kind(title: str) -> Optional[str]:
+    """根据标题判断章节类型"""
+    name = _TITLE_NOISE.sub("", title)
+    if name.startswith("输入格式"):
+        return "input_format"
+    if name.startswith("输出格式"):
+        return "output_format"
+    if name.startswith(("提示", "说明/提示")):
+        return "hints"
+    if name.startswith("子任务"):
+        return "subtasks"
+    if name.startswith(("输入输出", "输入与输出", "输入和输出")) and name.rstrip("0123456789").endswith(_SAMPLE_PREFIXES):
+        # 洛谷题面的“输入输出样例”
+        return "samples"
+    prefixed = name.startswith(_SAMPLE_PREFIXES)
+    rest = name[2:] if prefixed else name
+    if rest.startswith("输入"):
+        return "sample_input"
+    if rest.startswith("输出"):
+        return "sample_output"
+    if rest.startswith(("解释", "说明")):
+        return "sample_explanation"
+    if prefixed and (not rest or rest.isdigit() or rest == "数据"):
+        return "samples"
+    return None
+
+
+def _section_payload(section: Section) -> str:
+    """样例子章节的内容：第一个代码块，没有代码块时取正文"""
+    if section.code_blocks:
+        return section.code_blocks[0].content.strip()
+    return section.intro
+
+
+def _pair_sections(sections: List[Section]) -> List[Sample]:
+    """将按顺序出现的输入、输出、解释章节配对为样例"""
+    samples: List[Sample] = []
+    inputs: List[str] = []
+    outputs: List[str] = []
+    for section in sections:
+        if section.kind == "sample_input":
+            inputs.append(_section_payload(section))
+        elif section.kind == "sample_output":
+            outputs.append(_section_payload(section))
+            if len(outputs) <= len(inputs):
+                samples.append(Sample(inputs[len(outputs) - 1], outputs[-1]))
+        elif section.kind == "sample_explanation" and samples:
+            samples[-1].explanation = section.intro
+    return samples
@@ -0,0 +1,197 @@
+"""
+限流模块 - 按每分钟请求数和每分钟token数限制API调用
+"""
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数量
+
+    中日韩字符大致一字一token，其余字符按每4个字符一个token计算
+    """
+    cjk = sum(1 for ch in text if "\u2e80" <= ch <= "\u9fff" or "\uf900" <= ch <= "\ufaff")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class _MemoryBuckets:
+    """进程内的令牌桶状态"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Dict[str, Tuple[float, float]] = {}
+
+    def update(self, changes: Dict[str, Tuple[float, float, float]]) -> Dict[str, float]:
+        """
+        原子地补充并扣减多个桶
+        
+        参数:
+            changes: {桶名: (扣减量, 每秒补充量, 容量)}，扣减量为负表示退还
+        
+        返回:
+            {桶名: 扣减后的余量}，余量可以为负（表示排在前面的调用方欠下的额度）
+        """
+        with self._lock:
+            now = time.monotonic()
+            result = {}
+            for name, (cost, rate, capacity) in changes.items():
+                tokens, updated = self._state.get(name, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated) * rate) - cost
+                self._state[name] = (tokens, now)
+                result[name] = tokens
+            return result
+
+
+class _SqliteBuckets:
+    """保存在SQLite中的令牌桶状态，供多个进程共享"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def update(self, changes: Dict[str, Tuple[float, float, float]]) -> Dict[str, float]:
+        """与 _MemoryBuckets.update 相同，在排他事务中完成以保证跨进程原子性"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 跨进程共享时使用墙上时间
+                now = time.time()
+                result = {}
+                for name, (cost, rate, capacity) in changes.items():
+                    row = conn.execute(
+                        "SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                    ).fetchone()
+                    tokens, updated = row if row else (capacity, now)
+                    tokens = min(capacity, tokens + max(0.0, now - updated) * rate) - cost
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                        (name, tokens, now)
+                    )
+                    result[name] = tokens
+                conn.execute("COMMIT")
+                return result
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+
+class RateLimiter:
+    """
+    令牌桶限流器
+
+    同时限制每分钟请求数(RPM)和每分钟token数(TPM)。每次调用在锁内一次性预订所需额度，
+    额度不足时桶余量变为负数，调用方根据欠额精确计算需要等待的时间后休眠一次，
+    而不是轮询重试。后到的调用方看到的欠额更大、等待更久，因此按预订顺序公平排队。
+
+    指定 path 时桶状态保存在SQLite中，同一台机器上的多个进程共享同一组额度。
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 path: Optional[str] = None, burst_seconds: float = 10.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+        self._buckets = _SqliteBuckets(path) if path else _MemoryBuckets()
+        self._fallback_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests_per_minute > 0 or self.tokens_per_minute > 0
+
+    def acquire(self, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """
+        预订一次请求及其token额度，必要时阻塞等待
+        
+        参数:
+            tokens: 本次请求预计消耗的token数
+            max_wait: 最长等待时间（秒），超出时退还预订并抛出TimeoutError
+        
+        返回:
+            实际等待的秒数
+        """
+        changes = self._changes(1, tokens)
+        if not changes:
+            return 0.0
+        balances = self._update(changes)
+        wait = max(
+            (-balance / changes[name][1] for name, balance in balances.items() if balance < 0),
+            default=0.0
+        )
+        if max_wait is not None and wait > max_wait:
+            self._update({name: (-cost, rate, capacity)
+                          for name, (cost, rate, capacity) in changes.items()})
+            raise TimeoutError(f"限流等待时间 {wait:.1f} 秒超出上限")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def refund(self, tokens: int) -> None:
+        """
+        退还预订了但没有用完的token额度
+        
+        参数:
+            tokens: 退还的token数
+        """
+        changes = self._changes(0, -tokens)
+        changes.pop("requests", None)
+        if changes:
+            self._update(changes)
+
+    def _update(self, changes: Dict[str, Tuple[float, float, float]]) -> Dict[str, float]:
+        """
+        更新桶状态；共享的SQLite状态不可用（只读目录、数据库被锁等）时
+        退回只在本进程内限流，不让限流器的故障中断API调用
+        """
+        buckets = self._buckets
+        try:
+            return buckets.update(changes)
+        except (sqlite3.Error, OSError) as e:
+            with self._fallback_lock:
+                if self._buckets is buckets:
+                    print(f"共享限流状态不可用，改为只在本进程内限流: {str(e)}")
+                    self._buckets = _MemoryBuckets()
+            return self._buckets.update(changes)
+
+    def _changes(self, requests: int, tokens: int) -> Dict[str, Tuple[float, float, float]]:
+        changes = {}
+        if self.requests_per_minute > 0:
+            rate = self.requests_per_minute / 60
+            changes["requests"] = (requests, rate, max(1.0, rate * self.burst_seconds))
+        if self.tokens_per_minute > 0 and tokens:
+            rate = self.tokens_per_minute / 60
+            changes["tokens"] = (tokens, rate, max(1.0, rate * self.burst_seconds))
+        return changes
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 进程内共享的限流器；API_RATE_LIMIT_PATH 为空时只在本进程内限流
+rate_limiter = RateLimiter(
+    requests_per_minute=_env_float("API_RPM", 60),
+    tokens_per_minute=_env_float("API_TPM", 0),
+    path=os.environ.get("API_RATE_LIMIT_PATH", os.path.join(".cache", "rate_limit.sqlite3")) or None
+)
@@ -0,0 +1,171 @@
+"""
+API响应缓存模块 - 将模型返回结果按内容寻址持久化到SQLite
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "api_responses.sqlite3")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30天
+
+
+class ResponseCache:
+    """
+    API响应缓存
+
+    以 (model, temperature, max_tokens, prompt) 的哈希为键，响应文本经zlib压缩后
+    存入SQLite。写入时按条目年龄和总大小淘汰旧数据，读取时更新最近访问时间，
+    因此超出容量时优先淘汰最久未使用的条目。
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = DEFAULT_MAX_AGE, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(prompt: str, model: str, temperature: float, max_tokens: int) -> str:
+        """计算缓存键"""
+        payload = json.dumps([model, temperature, max_tokens, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的响应
+        
+        参数:
+            key: make_key 计算得到的缓存键
+        
+        返回:
+            缓存的响应文本，未命中或已过期时返回None
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, key: str, response: str) -> None:
+        """
+        写入响应并执行淘汰
+        
+        参数:
+            key: 缓存键
+            response: 响应文本
+        """
+        data = zlib.compress(response.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now)
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def invalidate(self, key: str) -> None:
+        """删除单个条目，用于丢弃无法解析的响应"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中统计和缓存占用情况"""
+        with self._lock:
+            conn = self._connect()
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total
+        }
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 按最近访问时间从旧到新删除，直到总大小回到上限以内
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 进程内共享的响应缓存
+response_cache = ResponseCache(
+    path=os.environ.get("RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+    max_bytes=int(_env_float("RESPONSE_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)) * 1024 * 1024),
+    max_age=_env_float("RESPONSE_CACHE_MAX_DAYS", DEFAULT_MAX_AGE / (24 * 3600)) * 24 * 3600,
+    enabled=os.environ.get("RESPONSE_CACHE", "1").lower() not in ("0", "false", "no")
+)
@@ -0,0 +1,139 @@
+"""
+重试策略模块 - 指数退避、随机抖动、Retry-After 与总时限
+"""
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+
+# 可以重试的HTTP状态码：超时、冲突、限流和服务端临时错误
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# 会携带 Retry-After 的状态码
+RETRY_AFTER_STATUS_CODES = frozenset({429, 503})
+
+
+class _Cooldown:
+    """多个调用方共享的冷却时间点"""
+
+    def __init__(self):
+        self.until = 0.0
+        self.lock = threading.Lock()
+
+
+class RetryPolicy:
+    """
+    API重试策略
+
+    - 指数退避加全抖动：第n次重试等待 [0, min(max_delay, base_delay * multiplier^(n-1))] 内的随机时长，
+      避免并发调用方在同一时刻一起重试
+    - 429/503 携带 Retry-After 时按服务端要求等待，并让共享同一策略的所有调用方一起暂停
+    - 400/401/403/404 等客户端错误视为致命错误，不再重试
+    - 单次调用从第一次请求开始的总耗时不超过 deadline 秒
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 30.0,
+                 multiplier: float = 2.0, deadline: float = 300.0):
+        if max_attempts < 1:
+            raise ValueError("最大尝试次数必须大于0")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.deadline = deadline
+        self._cooldown = _Cooldown()
+
+    def with_overrides(self, max_attempts: Optional[int] = None,
+                       base_delay: Optional[float] = None) -> "RetryPolicy":
+        """
+        返回修改了部分参数的副本，副本与原策略共享冷却状态
+        
+        参数:
+            max_attempts: 最大尝试次数
+            base_delay: 退避的基础间隔（秒）
+        """
+        policy = RetryPolicy(
+            max_attempts=self.max_attempts if max_attempts is None else max_attempts,
+            base_delay=self.base_delay if base_delay is None else base_delay,
+            max_delay=self.max_delay,
+            multiplier=self.multiplier,
+            deadline=self.deadline
+        )
+        policy._cooldown = self._cooldown
+        return policy
+
+    def is_retryable(self, error: Exception) -> bool:
+        """判断异常是否值得重试"""
+        if isinstance(error, requests.exceptions.HTTPError):
+            status = _status_code(error)
+            return status is None or status in RETRYABLE_STATUS_CODES
+        return isinstance(error, (requests.exceptions.ConnectionError,
+                                  requests.exceptions.Timeout,
+                                  requests.exceptions.ChunkedEncodingError))
+
+    def next_delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """
+        计算第 attempt 次失败后的等待时长
+        
+        服务端给出 Retry-After 时以其为准，并更新共享冷却时间
+        """
+        retry_after = _retry_after_seconds(error) if error is not None else None
+        if retry_after is not None:
+            delay = min(retry_after, self.deadline)
+            with self._cooldown.lock:
+                self._cooldown.until = max(self._cooldown.until, time.monotonic() + delay)
+            return delay
+        ceiling = min(self.max_delay, self.base_delay * (self.multiplier ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def remaining(self, started: float) -> float:
+        """返回总时限内剩余的秒数"""
+        return self.deadline - (time.monotonic() - started)
+
+    def wait_for_cooldown(self, started: float) -> None:
+        """
+        如果其他调用方收到了 Retry-After，等待共享冷却结束
+        
+        等待时间超过剩余时限时抛出 TimeoutError
+        """
+        with self._cooldown.lock:
+            wait = self._cooldown.until - time.monotonic()
+        if wait <= 0:
+            return
+        if wait > self.remaining(started):
+            raise TimeoutError(f"API限流冷却时间 {wait:.1f} 秒超出剩余时限")
+        time.sleep(wait)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """从异常携带的响应中解析 Retry-After（秒数或HTTP日期）"""
+    if _status_code(error) not in RETRY_AFTER_STATUS_CODES:
+        return None
+    value = error.response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+# 进程内所有API调用共享的默认策略
+default_retry_policy = RetryPolicy()
@@ -0,0 +1,190 @@
+"""
+程序运行模块 - 在本地编译并运行参考程序或数据生成器
+"""
+import os
+import sys
+import math
+import time
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .stream_writer import detach
+
+
+# 支持的语言：源文件名、编译命令、运行命令、解释器额外占用的内存(MB)
+LANGUAGES: Dict[str, Dict] = {
+    "cpp": {
+        "source": "std.cpp",
+        "compile": lambda source, binary: [os.environ.get("CXX", "g++"), "-O2", "-std=c++17",
+                                           "-o", binary, source],
+        "run": lambda source, binary: [binary],
+        "memory_overhead": 0,
+    },
+    "python": {
+        "source": "std.py",
+        "compile": None,
+        "run": lambda source, binary: [sys.executable, source],
+        "memory_overhead": 64,
+    },
+}
+
+# 模型可能使用的语言别名
+LANGUAGE_ALIASES = {
+    "c++": "cpp", "cpp": "cpp", "cxx": "cpp", "c++17": "cpp",
+    "python": "python", "python3": "python", "py": "python",
+}
+
+
+def normalize_language(language: str) -> str:
+    """将语言名称规范化为 LANGUAGES 中的键，不支持时抛出ValueError"""
+    key = LANGUAGE_ALIASES.get((language or "").strip().lower())
+    if key is None:
+        raise ValueError(f"不支持的参考程序语言: {language}")
+    return key
+
+
+class RunResult:
+    """单个测试点的运行结果"""
+
+    def __init__(self, status: str, elapsed: float = 0.0, message: str = ""):
+        self.status = status  # OK / TLE / RE
+        self.elapsed = elapsed  # 耗时(秒)
+        self.message = message
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "OK"
+
+    def describe(self) -> str:
+        names = {"OK": "通过", "TLE": "超时", "RE": "运行错误"}
+        text = names.get(self.status, self.status)
+        return f"{text}（{self.message}）" if self.message else text
+
+
+class SolutionRunner:
+    """
+    参考程序运行器，也用于运行数据生成器
+
+    编译一次后，每个测试点在独立的子进程中运行：输入文件直接作为标准输入，
+    标准输出直接写入输出文件，大数据不经过内存。多个子进程由工作线程池并发驱动，
+    并按题目的时间和内存限制设置超时与资源上限。
+    """
+
+    def __init__(self, source: str, language: str = "cpp", time_limit: int = 1000,
+                 memory_limit: int = 128, time_factor: float = 2.0, workers: Optional[int] = None):
+        """
+        参数:
+            source: 参考程序源代码
+            language: 语言，支持 cpp 和 python
+            time_limit: 时间限制(毫秒)
+            memory_limit: 内存限制(MB)
+            time_factor: 本地运行时对时间限制的放宽倍数，参考程序只需算出正确输出
+            workers: 同时运行的子进程数，默认为CPU核数
+        """
+        self.source = source
+        self.language = normalize_language(language)
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.time_factor = time_factor
+        self.workers = workers or os.cpu_count() or 1
+        self._workdir = ""
+        self._command: List[str] = []
+
+    def __enter__(self) -> "SolutionRunner":
+        self.compile()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def compile(self) -> None:
+        """
+        写出源文件并编译，编译失败时抛出RuntimeError
+        """
+        spec = LANGUAGES[self.language]
+        self._workdir = tempfile.mkdtemp(prefix="solution_")
+        source_path = os.path.join(self._workdir, spec["source"])
+        binary_path = os.path.join(self._workdir, "std.exe" if os.name == "nt" else "std")
+        with open(source_path, "w", encoding="utf-8") as f:
+            f.write(self.source)
+
+        if spec["compile"]:
+            try:
+                result = subprocess.run(spec["compile"](source_path, binary_path),
+                                        capture_output=True, text=True, timeout=60)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                raise RuntimeError(f"编译参考程序失败: {str(e)}")
+            if result.returncode != 0:
+                raise RuntimeError(f"编译参考程序失败:\n{result.stderr[-2000:]}")
+        self._command = spec["run"](source_path, binary_path)
+
+    def run_case(self, input_path: Optional[str], output_path: str, args: Sequence[str] = ()) -> RunResult:
+        """
+        以 input_path 为标准输入运行程序，标准输出写入 output_path
+
+        参数:
+            input_path: 输入文件路径，为None时标准输入为空
+            output_path: 输出文件路径
+            args: 传给程序的命令行参数
+
+        返回:
+            RunResult
+        """
+        if not self._command:
+            raise RuntimeError("程序尚未编译")
+        timeout = self.time_limit * self.time_factor / 1000
+        stdin = open(input_path, "rb") if input_path else subprocess.DEVNULL
+        # 输出文件可能是去重存储中与其他测试点共享的数据，不能原地覆盖
+        detach(output_path)
+        try:
+            with open(output_path, "wb") as stdout:
+                started = time.monotonic()
+                try:
+                    process = subprocess.run(self._limited_command() + list(args), stdin=stdin, stdout=stdout,
+                                             stderr=subprocess.PIPE, timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    return RunResult("TLE", time.monotonic() - started, f"超过 {timeout:.1f} 秒")
+                elapsed = time.monotonic() - started
+        finally:
+            if input_path:
+                stdin.close()
+        if process.returncode != 0:
+            stderr = process.stderr.decode("utf-8", errors="replace").strip()
+            return RunResult("RE", elapsed, f"返回值 {process.returncode}" + (f"，{stderr[-500:]}" if stderr else ""))
+        return RunResult("OK", elapsed)
+
+    def run_all(self, cases: List[Tuple]) -> List[RunResult]:
+        """
+        并发运行全部测试点
+
+        参数:
+            cases: (输入文件路径, 输出文件路径) 或 (输入文件路径, 输出文件路径, 命令行参数) 列表
+
+        返回:
+            与 cases 顺序一致的 RunResult 列表
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(lambda case: self.run_case(*case), cases))
+
+    def close(self) -> None:
+        """删除编译产生的临时目录"""
+        if self._workdir:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = ""
+            self._command = []
+
+    def _limited_command(self) -> List[str]:
+        """
+        在POSIX系统上通过 sh 的 ulimit 限制CPU时间、虚拟内存和栈大小后再执行参考程序
+        （preexec_fn 在多线程下不安全）；Windows 上只依靠超时限制
+        """
+        if os.name != "posix":
+            return self._command
+        cpu_seconds = math.ceil(self.time_limit * self.time_factor / 1000) + 1
+        memory_kb = (self.memory_limit + LANGUAGES[self.language]["memory_overhead"]) * 1024
+        script = (f"ulimit -t {cpu_seconds} 2>/dev/null; ulimit -v {memory_kb} 2>/dev/null; "
+                  f"ulimit -s {memory_kb} 2>/dev/null; exec \"$@\"")
+        return ["/bin/sh", "-c", script, "sh"] + self._command
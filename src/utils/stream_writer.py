@@ -0,0 +1,211 @@
+"""
+流式写入模块 - 分块写入测试数据文件，边写边去除首尾空白，按批同步到磁盘
+"""
+import io
+import os
+import codecs
+import shutil
+import tempfile
+from typing import IO, Iterable, Iterator, List, Union
+
+# 默认分块大小（字节/字符）
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# 可写入的数据来源：字符串、字节串、逐块产生字符串或字节串的迭代器、可读的文件对象
+TextSource = Union[str, bytes, Iterable[Union[str, bytes]], IO]
+
+
+def iter_text_chunks(source: TextSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    将各种数据来源按块转换为字符串，字节数据按UTF-8增量解码
+
+    参数:
+        source: 数据来源
+        chunk_size: 从字符串、字节串或文件中每次取出的大小
+
+    返回:
+        字符串块的迭代器
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def decode(piece) -> str:
+        return piece if isinstance(piece, str) else decoder.decode(bytes(piece))
+
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield decoder.decode(view[start:start + chunk_size])
+    elif hasattr(source, "read"):
+        while True:
+            piece = source.read(chunk_size)
+            if not piece:
+                break
+            yield decode(piece)
+    else:
+        for piece in source:
+            yield decode(piece)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def write_normalized(path: str, source: TextSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    分块写入文件，结果与写入 str(source).strip() 相同，但不会在内存中保留完整内容
+
+    开头的空白在遇到第一个非空白字符前丢弃；末尾的空白先暂存，
+    只有后面还有非空白内容时才写出，因此文件结尾不会有多余的空白。
+
+    参数:
+        path: 目标文件路径
+        source: 数据来源
+        chunk_size: 分块大小
+
+    返回:
+        写入的字节数
+    """
+    detach(path)
+    written = 0
+    started = False
+    pending = ""
+    with open(path, "wb", buffering=max(chunk_size, io.DEFAULT_BUFFER_SIZE)) as f:
+        for chunk in iter_text_chunks(source, chunk_size):
+            if not started:
+                chunk = chunk.lstrip()
+                if not chunk:
+                    continue
+                started = True
+            body = chunk.rstrip()
+            if not body:
+                pending += chunk
+                continue
+            data = (pending + body).encode("utf-8")
+            f.write(data)
+            written += len(data)
+            pending = chunk[len(body):]
+    return written
+
+
+def detach(path: str) -> None:
+    """
+    文件与其他路径共享数据（去重存储的硬链接）时先删除该路径，
+    使接下来的原地写入创建新文件，而不会修改其他题目共享的数据
+
+    参数:
+        path: 即将被原地写入的文件路径
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def normalize_file(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    就地去除文件的首尾空白，通过临时文件和原子替换完成
+
+    参数:
+        path: 文件路径
+        chunk_size: 分块大小
+
+    返回:
+        处理后文件的字节数
+    """
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(prefix=".normalize_", dir=directory)
+    os.close(fd)
+    try:
+        with open(path, "rb") as source:
+            written = write_normalized(temp_path, source, chunk_size)
+        # mkstemp 创建的文件权限为0600，恢复原文件的权限
+        shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return written
+
+
+def fsync_paths(paths: Iterable[str]) -> None:
+    """
+    将一批已写入的文件及其所在目录同步到磁盘
+
+    参数:
+        paths: 文件路径
+    """
+    directories = set()
+    for path in paths:
+        fd = os.open(path, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        directories.add(os.path.dirname(os.path.abspath(path)))
+    # Windows 不支持打开目录进行同步
+    if os.name == "posix":
+        for directory in directories:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+class BatchWriter:
+    """
+    批量写入器
+
+    每个文件流式写入后立即关闭，commit 时才统一执行fsync，
+    一批测试数据只需要同步一次而不是每写一个文件同步一次。
+    指定 store（去重存储）时，内容相同的文件共享同一份数据。
+    作为上下文管理器使用时，正常退出会自动 commit。
+    """
+
+    def __init__(self, fsync: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE, store=None):
+        self.fsync = fsync
+        self.chunk_size = chunk_size
+        self.store = store
+        self.paths: List[str] = []
+        self.bytes_written = 0
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+
+    def write(self, path: str, source: TextSource) -> int:
+        """
+        流式写入一个文件（去除首尾空白）
+
+        参数:
+            path: 目标文件路径
+            source: 数据来源
+
+        返回:
+            写入的字节数
+        """
+        if self.store is not None:
+            written = self.store.write(path, source, self.chunk_size)
+        else:
+            written = write_normalized(path, source, self.chunk_size)
+        self.paths.append(path)
+        self.bytes_written += written
+        return written
+
+    def add(self, path: str) -> None:
+        """登记一个以其他方式写入的文件，commit 时一并同步"""
+        self.paths.append(path)
+
+    def commit(self) -> None:
+        """将本批写入的文件同步到磁盘"""
+        if self.fsync and self.paths:
+            fsync_paths(self.paths)
+        self.paths = []
@@ -0,0 +1,426 @@
+"""
+增量打包模块 - 根据每个成员的大小、修改时间和哈希只替换发生变化的测试数据文件，
+需要压缩时多个成员并行压缩后按顺序写入
+"""
+import os
+import bz2
+import json
+import time
+import zlib
+import shutil
+import struct
+import hashlib
+import zipfile
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+COPY_CHUNK_SIZE = 1 << 20
+# 空洞小于该字节数时不整体重新打包，避免小压缩包频繁重写
+COMPACTION_MIN_BYTES = 1 << 20
+# 并行压缩的成员先写入内存，超过该大小时转存到临时文件
+SPOOL_SIZE = 16 << 20
+
+# 可用的压缩方式，"deflate:9" 这样的写法可以指定压缩级别；
+# 洛谷等评测平台和常见解压工具都支持 stored 和 deflate，bzip2 / lzma 压缩率更高但兼容性较差
+CODECS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+DEFAULT_CODEC = "stored"
+
+# 本地文件头固定部分长度，以及其中文件名长度、扩展字段长度的位置
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_LENGTHS = struct.Struct("<HH")
+_LOCAL_HEADER_LENGTHS_OFFSET = 26
+
+
+def parse_codec(codec: str) -> Tuple[str, int, Optional[int]]:
+    """
+    解析压缩方式
+
+    参数:
+        codec: 压缩方式名称，可带压缩级别，如 stored、deflate、deflate:9、bzip2:5、lzma
+
+    返回:
+        (规范化的名称, zipfile压缩类型, 压缩级别)，未指定级别时级别为None
+    """
+    name, _, level_text = (codec or DEFAULT_CODEC).strip().lower().partition(":")
+    if name not in CODECS:
+        raise ValueError(f"不支持的压缩方式: {codec}，可用: {', '.join(CODECS)}")
+    level = None
+    if level_text:
+        limits = {"deflate": (0, 9), "bzip2": (1, 9)}
+        if name not in limits:
+            raise ValueError(f"压缩方式 {name} 不支持指定压缩级别")
+        try:
+            level = int(level_text)
+        except ValueError:
+            raise ValueError(f"压缩级别无效: {level_text}")
+        low, high = limits[name]
+        if not low <= level <= high:
+            raise ValueError(f"{name} 的压缩级别必须在 {low} 到 {high} 之间")
+    normalized = f"{name}:{level}" if level is not None else name
+    return normalized, CODECS[name], level
+
+
+def _compressor(compress_type: int, level: Optional[int]):
+    """创建与zipfile兼容的压缩器"""
+    if compress_type == zipfile.ZIP_DEFLATED:
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15)
+    if compress_type == zipfile.ZIP_BZIP2:
+        return bz2.BZ2Compressor(9 if level is None else level)
+    # zip中的LZMA数据带有特定的头部，使用zipfile提供的压缩器
+    return zipfile.LZMACompressor()
+
+
+class PackResult:
+    """一次打包的结果"""
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.replaced: List[str] = []
+        self.removed: List[str] = []
+        self.unchanged = 0
+        self.rebuilt = False
+        self.elapsed = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.rebuilt or self.added or self.replaced or self.removed)
+
+    def describe(self) -> str:
+        """返回一行摘要"""
+        if self.rebuilt:
+            return f"重新打包 {self.unchanged} 个文件，耗时 {self.elapsed:.2f} 秒"
+        if not self.changed:
+            return "测试数据没有变化"
+        return (f"新增 {len(self.added)}、替换 {len(self.replaced)}、删除 {len(self.removed)} 个文件，"
+                f"耗时 {self.elapsed:.3f} 秒")
+
+
+class ZipPackager:
+    """
+    测试数据增量打包器
+
+    zip旁边的隐藏清单文件记录每个成员的大小、修改时间、inode和SHA-1，以及zip自身的大小和修改时间。
+    更新时大小、修改时间和inode都未变的文件直接跳过，其余文件计算哈希确认内容确实变化后，
+    以追加模式写入zip：从中央目录中去掉旧成员，新成员写在原中央目录的位置，再写出新的中央目录，
+    其他成员的数据原样保留。被替换的旧数据如果位于文件末尾会被截掉，否则成为无人引用的空洞，
+    空洞累计超过有效数据的一定比例时整体重新打包一次。
+    清单缺失、zip被外部修改或无法解析、压缩方式改变时同样整体重新打包。
+
+    使用压缩时，成员在线程池中并行压缩（zlib、bz2、lzma压缩时会释放GIL），
+    主线程按文件名顺序写入，同时在途的已压缩成员数量有上限，内存占用不随测试数据规模增长。
+    """
+
+    def __init__(self, zip_path: str, source_dir: str, compaction_ratio: float = 0.5,
+                 codec: Optional[str] = None, workers: Optional[int] = None):
+        """
+        参数:
+            zip_path: zip文件路径
+            source_dir: 测试数据目录，目录下的文件（不含子目录）按文件名打包
+            compaction_ratio: 空洞字节数超过有效数据字节数的该比例时整体重新打包
+            codec: 压缩方式，见 parse_codec，默认取环境变量 ZIP_CODEC，未设置时不压缩
+            workers: 并行压缩的线程数，默认取环境变量 ZIP_WORKERS，未设置时为CPU核数
+        """
+        self.zip_path = zip_path
+        self.source_dir = source_dir
+        self.compaction_ratio = compaction_ratio
+        self.codec, self.compress_type, self.compress_level = parse_codec(
+            codec or os.environ.get("ZIP_CODEC") or DEFAULT_CODEC
+        )
+        self.workers = max(1, workers or _env_int("ZIP_WORKERS", 0) or os.cpu_count() or 1)
+        directory, name = os.path.split(zip_path)
+        self.manifest_path = os.path.join(directory, f".{name}.manifest.json")
+
+    def update(self, changed_files: Optional[Iterable[str]] = None) -> PackResult:
+        """
+        使zip与测试数据目录一致，只写入新增和变化的文件
+
+        参数:
+            changed_files: 调用方已知发生变化的文件名，指定时其余已打包的文件不再检查；
+                           为None时检查全部文件
+
+        返回:
+            PackResult
+        """
+        started = time.monotonic()
+        manifest = self._load_manifest()
+        if manifest is None:
+            result = self.rebuild()
+            result.elapsed = time.monotonic() - started
+            return result
+
+        result = PackResult()
+        members: Dict[str, Dict] = manifest["members"]
+        files = self._list_files()
+        candidates = files
+        if changed_files is not None:
+            known = set(changed_files)
+            candidates = [name for name in files if name in known or name not in members]
+            result.unchanged = len(files) - len(candidates)
+        changed = []
+        for name in candidates:
+            path = os.path.join(self.source_dir, name)
+            stat = os.stat(path)
+            record = members.get(name)
+            # 去重存储中的文件被替换为另一个数据块的链接时修改时间可能不变，还需比较inode
+            if (record and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns
+                    and record.get("ino", stat.st_ino) == stat.st_ino):
+                result.unchanged += 1
+                continue
+            if record and record["size"] == stat.st_size and record["sha1"] == _file_sha1(path):
+                # 只是修改时间或inode变了，内容相同
+                record["mtime_ns"] = stat.st_mtime_ns
+                record["ino"] = stat.st_ino
+                result.unchanged += 1
+                continue
+            changed.append(name)
+        removed = [name for name in members if name not in files]
+
+        if changed or removed:
+            result.added = [name for name in changed if name not in members]
+            result.replaced = [name for name in changed if name in members]
+            try:
+                garbage = self._apply(manifest, changed, removed)
+            except (OSError, zipfile.BadZipFile, _NeedsRebuild) as e:
+                print(f"增量打包失败，重新打包: {str(e)}")
+                result = self.rebuild()
+                result.elapsed = time.monotonic() - started
+                return result
+            if garbage is None:
+                result = self.rebuild()
+                result.elapsed = time.monotonic() - started
+                return result
+            result.removed = removed
+        # 即使zip没有变化也要保存，记录修改时间变化但内容相同的文件
+        self._save_manifest(manifest)
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def rebuild(self) -> PackResult:
+        """
+        整体重新打包，先写入临时文件再替换，并重建清单
+
+        返回:
+            PackResult
+        """
+        started = time.monotonic()
+        result = PackResult()
+        result.rebuilt = True
+        directory = os.path.dirname(self.zip_path) or "."
+        fd, temp_path = tempfile.mkstemp(prefix=".zip_", dir=directory)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(temp_path, "w") as zipf:
+                members = self._write_members(zipf, self._list_files())
+            result.unchanged = len(members)
+            os.replace(temp_path, self.zip_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._save_manifest({"members": members, "garbage": 0})
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def _apply(self, manifest: Dict, changed: List[str], removed: List[str]) -> Optional[int]:
+        """
+        以追加模式替换、删除成员，返回新的空洞字节数；空洞过多需要整体重新打包时返回None
+        """
+        members = manifest["members"]
+        with zipfile.ZipFile(self.zip_path, "a") as zipf:
+            if set(zipf.NameToInfo) != set(members):
+                raise _NeedsRebuild("zip成员与清单不一致")
+
+            outdated = set(changed) | set(removed)
+            dropped = [info for info in zipf.filelist if info.filename in outdated]
+            garbage = manifest.get("garbage", 0) + sum(self._span(zipf, info) for info in dropped)
+            live = [info for info in zipf.filelist if info.filename not in outdated]
+            live_bytes = sum(info.compress_size for info in live)
+            last = max(live, key=lambda info: info.header_offset, default=None)
+            tail = last.header_offset + self._span(zipf, last) if last else 0
+            # 末尾已无有效成员的部分可以直接覆盖，不计为空洞
+            garbage -= max(0, zipf.start_dir - tail)
+            if garbage > max(self.compaction_ratio * live_bytes, COMPACTION_MIN_BYTES):
+                return None
+
+            for info in dropped:
+                zipf.filelist.remove(info)
+                del zipf.NameToInfo[info.filename]
+            zipf.start_dir = min(zipf.start_dir, tail)
+            for name in removed:
+                members.pop(name, None)
+            members.update(self._write_members(zipf, changed))
+            # 只删除成员时也需要重写中央目录
+            zipf._didModify = True
+        manifest["garbage"] = max(0, garbage)
+        return manifest["garbage"]
+
+    def _write_members(self, zipf: zipfile.ZipFile, names: List[str]) -> Dict[str, Dict]:
+        """按顺序写入成员，返回 {文件名: 清单记录}"""
+        records = {}
+        if self.compress_type == zipfile.ZIP_STORED:
+            # 不压缩时瓶颈在磁盘，直接流式复制
+            for name in names:
+                records[name] = self._write_member(zipf, name)
+            return records
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for name in names:
+                pending.append(pool.submit(self._compress_member, name))
+                # 限制已压缩但尚未写入的成员数量
+                if len(pending) >= self.workers * 2:
+                    records.update(self._write_compressed(zipf, *pending.popleft().result()))
+            while pending:
+                records.update(self._write_compressed(zipf, *pending.popleft().result()))
+        return records
+
+    def _compress_member(self, name: str) -> Tuple[zipfile.ZipInfo, tempfile.SpooledTemporaryFile, Dict]:
+        """在工作线程中压缩一个成员，同时计算CRC32和SHA-1"""
+        path = os.path.join(self.source_dir, name)
+        stat = os.stat(path)
+        info = zipfile.ZipInfo.from_file(path, arcname=name)
+        info.compress_type = self.compress_type
+        compressor = _compressor(self.compress_type, self.compress_level)
+        data = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        digest = hashlib.sha1()
+        crc = 0
+        size = 0
+        with open(path, "rb") as source:
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+                digest.update(chunk)
+                size += len(chunk)
+                data.write(compressor.compress(chunk))
+        data.write(compressor.flush())
+        info.CRC = crc
+        info.file_size = size
+        info.compress_size = data.tell()
+        # LZMA数据带有结束标记，与zipfile的写法保持一致
+        info.flag_bits = 0x02 if self.compress_type == zipfile.ZIP_LZMA else 0
+        return info, data, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "ino": stat.st_ino,
+                            "sha1": digest.hexdigest()}
+
+    @staticmethod
+    def _write_compressed(zipf: zipfile.ZipFile, info: zipfile.ZipInfo,
+                          data: tempfile.SpooledTemporaryFile, record: Dict) -> Dict[str, Dict]:
+        """将已压缩的成员写在中央目录的位置，大小和CRC已知，因此不需要回填本地文件头"""
+        try:
+            zipf.fp.seek(zipf.start_dir)
+            info.header_offset = zipf.fp.tell()
+            zipf._writecheck(info)
+            zipf._didModify = True
+            zipf.fp.write(info.FileHeader())
+            data.seek(0)
+            shutil.copyfileobj(data, zipf.fp, COPY_CHUNK_SIZE)
+            zipf.filelist.append(info)
+            zipf.NameToInfo[info.filename] = info
+            zipf.start_dir = zipf.fp.tell()
+        finally:
+            data.close()
+        return {info.filename: record}
+
+    def _write_member(self, zipf: zipfile.ZipFile, name: str) -> Dict:
+        """不压缩地写入一个成员，同时计算SHA-1，返回清单记录"""
+        path = os.path.join(self.source_dir, name)
+        stat = os.stat(path)
+        info = zipfile.ZipInfo.from_file(path, arcname=name)
+        info.compress_type = zipfile.ZIP_STORED
+        digest = hashlib.sha1()
+        with open(path, "rb") as source, zipf.open(info, "w", force_zip64=stat.st_size > 0x7FFFFFFF) as target:
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                target.write(chunk)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "ino": stat.st_ino,
+                "sha1": digest.hexdigest()}
+
+    @staticmethod
+    def _span(zipf: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+        """成员在zip中占用的字节数（本地文件头 + 数据）"""
+        if info.flag_bits & 0x08:
+            # 带数据描述符的成员长度无法仅从头部确定
+            raise _NeedsRebuild(f"成员 {info.filename} 使用了数据描述符")
+        zipf.fp.seek(info.header_offset + _LOCAL_HEADER_LENGTHS_OFFSET)
+        name_length, extra_length = _LOCAL_HEADER_LENGTHS.unpack(zipf.fp.read(_LOCAL_HEADER_LENGTHS.size))
+        return _LOCAL_HEADER_SIZE + name_length + extra_length + info.compress_size
+
+    def _list_files(self) -> List[str]:
+        # 以点开头的是中断的写入留下的临时文件（如 .01.in.link、.normalize_*），不打包
+        return sorted(name for name in os.listdir(self.source_dir)
+                      if not name.startswith(".") and os.path.isfile(os.path.join(self.source_dir, name)))
+
+    def _load_manifest(self) -> Optional[Dict]:
+        """读取清单，清单与zip不匹配时返回None"""
+        if not os.path.exists(self.zip_path) or not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        stat = os.stat(self.zip_path)
+        if (manifest.get("version") != MANIFEST_VERSION
+                or manifest.get("codec", DEFAULT_CODEC) != self.codec
+                or manifest.get("zip") != {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}):
+            return None
+        return manifest
+
+    def _save_manifest(self, manifest: Dict) -> None:
+        stat = os.stat(self.zip_path)
+        manifest["version"] = MANIFEST_VERSION
+        manifest["codec"] = self.codec
+        manifest["zip"] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+
+
+class _NeedsRebuild(Exception):
+    """增量更新无法安全进行，需要整体重新打包"""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def package_test_cases(source_dir: str, zip_path: str, codec: Optional[str] = None) -> PackResult:
+    """
+    增量更新测试数据压缩包
+
+    参数:
+        source_dir: 测试数据目录
+        zip_path: zip文件路径
+        codec: 压缩方式，默认取环境变量 ZIP_CODEC
+
+    返回:
+        PackResult
+    """
+    return ZipPackager(zip_path, source_dir, codec=codec).update()
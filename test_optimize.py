@@ -37,7 +37,7 @@ def main():
     
     try:
         # 使用模拟的API调用
-        with patch('src.utils.api_utils.call_api', side_effect=mock_call_api):
+        with patch('src.generators.base_generator.call_api', side_effect=mock_call_api):
             # 格式化题目
             result = generator.format_problem()
             
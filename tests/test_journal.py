@@ -0,0 +1,101 @@
+"""
+SaveTransaction 提交与崩溃恢复测试
+"""
+import os
+
+import pytest
+
+from src.utils import journal
+from src.utils.blob_store import blob_store
+from src.utils.journal import SaveTransaction, recover_directory, JOURNAL_NAME, STAGING_NAME
+
+
+@pytest.fixture
+def problem_dir(tmp_path, monkeypatch):
+    # 去重存储必须与题目目录位于同一文件系统
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / ".store"))
+    directory = tmp_path / "problem"
+    directory.mkdir()
+    (directory / "01.in").write_text("old input")
+    (directory / "stale.out").write_text("stale")
+    return str(directory)
+
+
+def read(directory: str, name: str) -> str:
+    with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_commit_replaces_and_removes(problem_dir):
+    with SaveTransaction(problem_dir) as txn:
+        txn.write(os.path.join(problem_dir, "01.in"), "  new input \n")
+        txn.write_text(os.path.join(problem_dir, "meta.json"), "{}\n")
+        txn.remove(os.path.join(problem_dir, "stale.out"))
+        # 提交前原文件不变
+        assert read(problem_dir, "01.in") == "old input"
+    assert read(problem_dir, "01.in") == "new input"
+    assert read(problem_dir, "meta.json") == "{}\n"
+    assert not os.path.exists(os.path.join(problem_dir, "stale.out"))
+    assert not os.path.exists(os.path.join(problem_dir, JOURNAL_NAME))
+    assert not os.path.exists(os.path.join(problem_dir, STAGING_NAME))
+
+
+def test_exception_rolls_back(problem_dir):
+    with pytest.raises(RuntimeError):
+        with SaveTransaction(problem_dir) as txn:
+            txn.write(os.path.join(problem_dir, "01.in"), "new input")
+            raise RuntimeError("写入中断")
+    assert read(problem_dir, "01.in") == "old input"
+    assert not os.path.exists(os.path.join(problem_dir, STAGING_NAME))
+
+
+def test_rejects_paths_outside_directory(problem_dir):
+    with SaveTransaction(problem_dir) as txn:
+        with pytest.raises(ValueError):
+            txn.write(os.path.join(problem_dir, "..", "escape.txt"), "x")
+
+
+def test_crash_before_commit_point_is_rolled_back(problem_dir):
+    txn = SaveTransaction(problem_dir)
+    txn.begin()
+    txn.write(os.path.join(problem_dir, "01.in"), "new input")
+    # 模拟进程崩溃：暂存文件留在磁盘上，锁随进程退出释放
+    txn._lock.release()
+    assert recover_directory(problem_dir) == "rolled_back"
+    assert read(problem_dir, "01.in") == "old input"
+    assert not os.path.exists(os.path.join(problem_dir, STAGING_NAME))
+
+
+def test_crash_after_commit_point_is_redone(problem_dir, monkeypatch):
+    apply = journal._apply
+
+    def crash_after_first_rename(directory, staging_dir, writes, removes, strict=False):
+        apply(directory, staging_dir, writes[:1], [], strict=strict)
+        raise OSError("模拟崩溃")
+
+    monkeypatch.setattr(journal, "_apply", crash_after_first_rename)
+    with pytest.raises(OSError):
+        with SaveTransaction(problem_dir) as txn:
+            txn.write(os.path.join(problem_dir, "01.in"), "new input")
+            txn.write(os.path.join(problem_dir, "01.out"), "new output")
+            txn.remove(os.path.join(problem_dir, "stale.out"))
+    assert os.path.exists(os.path.join(problem_dir, JOURNAL_NAME))
+    monkeypatch.setattr(journal, "_apply", apply)
+
+    assert recover_directory(problem_dir) == "committed"
+    assert read(problem_dir, "01.in") == "new input"
+    assert read(problem_dir, "01.out") == "new output"
+    assert not os.path.exists(os.path.join(problem_dir, "stale.out"))
+    assert not os.path.exists(os.path.join(problem_dir, JOURNAL_NAME))
+    assert recover_directory(problem_dir) is None
+
+
+def test_recovery_skips_directory_with_active_transaction(problem_dir):
+    txn = SaveTransaction(problem_dir)
+    txn.begin()
+    txn.write(os.path.join(problem_dir, "01.in"), "new input")
+    try:
+        assert recover_directory(problem_dir) is None
+        assert os.path.exists(os.path.join(problem_dir, STAGING_NAME))
+    finally:
+        txn.rollback()
@@ -0,0 +1,50 @@
+"""
+JsonArrayStreamParser 测试
+"""
+import json
+
+from src.utils.json_stream import JsonArrayStreamParser
+
+
+CASES = [
+    {"input": "1 2", "output": "3"},
+    {"input": "{[\"]}\\", "output": "brackets and escapes"},
+    {"input": "a\nb", "output": "嵌套 {\"x\": [1, 2]}"},
+]
+
+
+def feed_in_chunks(parser: JsonArrayStreamParser, text: str, size: int):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items
+
+
+def test_items_are_returned_as_they_close():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('{"test_cases": [{"input": "1"') == []
+    assert parser.feed(', "output": "2"}, ') == [{"input": "1", "output": "2"}]
+    assert not parser.finished
+    assert parser.feed("]}") == []
+    assert parser.finished
+    assert parser.count == 1
+
+
+def test_any_chunking_yields_the_same_items():
+    text = "说明文字\n```json\n" + json.dumps({"test_cases": CASES}, ensure_ascii=False) + "\n```"
+    for size in (1, 2, 5, 17, len(text)):
+        parser = JsonArrayStreamParser()
+        assert feed_in_chunks(parser, text, size) == CASES
+        assert parser.finished
+
+
+def test_nested_values_are_kept_whole():
+    text = json.dumps({"test_cases": [{"input": [1, [2, 3]], "output": {"k": "]"}}]})
+    assert JsonArrayStreamParser().feed(text) == [{"input": [1, [2, 3]], "output": {"k": "]"}}]
+
+
+def test_other_keys_and_invalid_items_are_skipped():
+    parser = JsonArrayStreamParser("test_cases")
+    text = '{"samples": [{"input": "x"}], "test_cases": [1, {"input": "y", "output": "z"}]} trailing'
+    assert parser.feed(text) == [{"input": "y", "output": "z"}]
+    assert parser.feed('{"test_cases": [{"input": "late"}]}') == []
@@ -0,0 +1,66 @@
+"""
+LineIndex 测试
+"""
+import pytest
+
+from src.utils.line_index import LineIndex
+
+
+def make_lines(count: int) -> bytes:
+    return b"".join(f"line {i}\n".encode() for i in range(count))
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 1024])
+def test_offset_of_matches_line_starts(block_size):
+    data = make_lines(50)
+    index = LineIndex(data, block_size=block_size)
+    assert index.line_count == 50
+    starts = [0] + [i + 1 for i, byte in enumerate(data) if byte == ord("\n")]
+    for line in range(50):
+        assert index.offset_of(line) == starts[line]
+    assert index.offset_of(-1) == 0
+    assert index.offset_of(50) == len(data)
+
+
+@pytest.mark.parametrize("block_size", [3, 16, 1024])
+def test_line_of_inverts_offset_of(block_size):
+    data = make_lines(30)
+    index = LineIndex(data, block_size=block_size)
+    for line in range(30):
+        start = index.offset_of(line)
+        assert index.line_of(start) == line
+        assert index.line_of(start + 2) == line
+    assert index.line_of(len(data) + 100) == 30
+
+
+def test_last_line_without_newline_counts():
+    assert LineIndex(b"a\nb").line_count == 2
+    assert LineIndex(b"a\nb\n").line_count == 2
+    assert LineIndex(b"").line_count == 0
+
+
+def test_window_returns_requested_lines():
+    index = LineIndex(make_lines(10), block_size=8)
+    text, lines, truncated = index.window(3, 4, 1024)
+    assert text == "line 3\nline 4\nline 5\nline 6"
+    assert lines == 4
+    assert not truncated
+    text, lines, truncated = index.window(8, 5, 1024)
+    assert text == "line 8\nline 9"
+    assert lines == 2
+
+
+def test_window_truncates_long_lines():
+    index = LineIndex(b"x" * 100 + b"\nshort\n")
+    text, lines, truncated = index.window(0, 2, 10)
+    assert text == "x" * 10
+    assert lines == 1
+    assert truncated
+
+
+def test_window_handles_split_multibyte_characters():
+    index = LineIndex("测试数据\n".encode("utf-8"))
+    text, _, truncated = index.window(0, 1, 4)
+    assert truncated
+    assert text.startswith("测")
+    assert "�" in text
@@ -0,0 +1,75 @@
+"""
+RateLimiter 测试
+"""
+import os
+import time
+
+import pytest
+
+from src.utils.rate_limiter import RateLimiter, _MemoryBuckets, estimate_tokens
+
+
+def test_disabled_limiter_never_waits():
+    limiter = RateLimiter()
+    assert not limiter.enabled
+    assert limiter.acquire(10 ** 6) == 0.0
+
+
+def test_burst_then_wait_for_debt():
+    # 每秒补充1个请求额度，突发容量为1
+    limiter = RateLimiter(requests_per_minute=60, burst_seconds=1)
+    assert limiter.acquire() == 0.0
+    started = time.monotonic()
+    wait = limiter.acquire()
+    assert 0.8 < wait <= 1.0
+    assert time.monotonic() - started >= wait - 0.05
+
+
+def test_max_wait_refunds_the_reservation():
+    limiter = RateLimiter(requests_per_minute=60, burst_seconds=1)
+    limiter.acquire()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(max_wait=0.1)
+    # 超时的预订已退还，下一次只需等待第一次留下的欠额
+    assert limiter.acquire(max_wait=1.5) <= 1.0
+
+
+def test_refund_returns_unused_tokens():
+    limiter = RateLimiter(tokens_per_minute=600, burst_seconds=1)
+    assert limiter.acquire(10) == 0.0
+    limiter.refund(10)
+    assert limiter.acquire(10) == 0.0
+
+
+def test_shared_state_between_limiters(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first = RateLimiter(requests_per_minute=60, path=path, burst_seconds=1)
+    second = RateLimiter(requests_per_minute=60, path=path, burst_seconds=1)
+    assert first.acquire(max_wait=0) == 0.0
+    with pytest.raises(TimeoutError):
+        second.acquire(max_wait=0.1)
+
+
+@pytest.mark.skipif(os.name != "posix" or os.geteuid() == 0, reason="需要可以设为只读的目录")
+def test_unusable_shared_state_falls_back_to_memory(tmp_path):
+    tmp_path.chmod(0o500)
+    try:
+        limiter = RateLimiter(requests_per_minute=60, path=str(tmp_path / "sub" / "limits.db"))
+        assert limiter.acquire() == 0.0
+    finally:
+        tmp_path.chmod(0o700)
+    assert isinstance(limiter._buckets, _MemoryBuckets)
+
+
+def test_broken_shared_state_falls_back_to_memory(tmp_path):
+    path = tmp_path / "limits.db"
+    path.write_bytes(b"not a database" * 100)
+    limiter = RateLimiter(requests_per_minute=60, path=str(path))
+    assert limiter.acquire() == 0.0
+    assert isinstance(limiter._buckets, _MemoryBuckets)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("测试") == 2
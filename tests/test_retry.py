@@ -0,0 +1,72 @@
+"""
+RetryPolicy 测试
+"""
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from src.utils.retry import RetryPolicy
+
+
+def http_error(status: int, headers=None) -> requests.exceptions.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.exceptions.HTTPError(f"HTTP {status}", response=response)
+
+
+def test_rejects_non_positive_attempts():
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+
+
+@pytest.mark.parametrize("status, retryable", [
+    (408, True), (429, True), (500, True), (503, True),
+    (400, False), (401, False), (403, False), (404, False),
+])
+def test_http_status_classification(status, retryable):
+    assert RetryPolicy().is_retryable(http_error(status)) is retryable
+
+
+def test_network_errors_are_retryable():
+    policy = RetryPolicy()
+    assert policy.is_retryable(requests.exceptions.ConnectionError())
+    assert policy.is_retryable(requests.exceptions.Timeout())
+    assert not policy.is_retryable(ValueError())
+
+
+def test_backoff_is_capped_full_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, multiplier=2.0)
+    for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)]:
+        delays = [policy.next_delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling / 2
+
+
+def test_retry_after_seconds_sets_shared_cooldown():
+    policy = RetryPolicy(deadline=60)
+    copy = policy.with_overrides(max_attempts=1)
+    assert policy.next_delay(1, http_error(429, {"Retry-After": "0.2"})) == pytest.approx(0.2)
+    started = time.monotonic()
+    copy.wait_for_cooldown(started)
+    assert time.monotonic() - started >= 0.15
+
+
+def test_retry_after_http_date():
+    header = formatdate(time.time() + 30, usegmt=True)
+    delay = RetryPolicy().next_delay(1, http_error(503, {"Retry-After": header}))
+    assert 25 <= delay <= 30
+
+
+def test_retry_after_is_ignored_for_other_statuses():
+    policy = RetryPolicy(base_delay=0.01, max_delay=0.01)
+    assert policy.next_delay(1, http_error(500, {"Retry-After": "100"})) <= 0.01
+
+
+def test_cooldown_longer_than_deadline_raises():
+    policy = RetryPolicy(deadline=10)
+    policy.next_delay(1, http_error(429, {"Retry-After": "5"}))
+    with pytest.raises(TimeoutError):
+        policy.wait_for_cooldown(time.monotonic() - 8)
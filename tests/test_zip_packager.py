@@ -0,0 +1,106 @@
+"""
+ZipPackager 增量打包测试
+"""
+import os
+import zipfile
+
+import pytest
+
+from src.utils.zip_packager import ZipPackager, COMPACTION_MIN_BYTES
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    directory = tmp_path / "test_cases"
+    directory.mkdir()
+    for i in range(1, 6):
+        (directory / f"{i:02d}.in").write_text(f"input {i}\n" * 100)
+        (directory / f"{i:02d}.out").write_text(f"output {i}\n")
+    return directory
+
+
+def zip_contents(path: str) -> dict:
+    with zipfile.ZipFile(path) as zipf:
+        assert zipf.testzip() is None
+        return {name: zipf.read(name) for name in zipf.namelist()}
+
+
+def dir_contents(directory) -> dict:
+    return {path.name: path.read_bytes() for path in directory.iterdir()
+            if path.is_file() and not path.name.startswith(".")}
+
+
+@pytest.mark.parametrize("codec", ["stored", "deflate"])
+def test_incremental_update_matches_directory(tmp_path, source_dir, codec):
+    zip_path = str(tmp_path / "cases.zip")
+    packager = ZipPackager(zip_path, str(source_dir), codec=codec, workers=2)
+    result = packager.update()
+    assert result.rebuilt
+    assert zip_contents(zip_path) == dir_contents(source_dir)
+
+    (source_dir / "02.out").write_text("changed output\n")
+    (source_dir / "06.in").write_text("new input\n")
+    (source_dir / "03.in").unlink()
+    result = packager.update()
+    assert not result.rebuilt
+    assert result.added == ["06.in"]
+    assert result.replaced == ["02.out"]
+    assert result.removed == ["03.in"]
+    assert zip_contents(zip_path) == dir_contents(source_dir)
+
+    result = packager.update()
+    assert not result.changed
+
+
+def test_changed_files_hint_limits_checks(tmp_path, source_dir):
+    zip_path = str(tmp_path / "cases.zip")
+    packager = ZipPackager(zip_path, str(source_dir))
+    packager.update()
+    (source_dir / "01.in").write_text("edited\n")
+    result = packager.update(changed_files=["01.in"])
+    assert result.replaced == ["01.in"]
+    assert result.unchanged == len(dir_contents(source_dir)) - 1
+    assert zip_contents(zip_path) == dir_contents(source_dir)
+
+
+def test_touched_but_identical_file_is_not_rewritten(tmp_path, source_dir):
+    zip_path = str(tmp_path / "cases.zip")
+    packager = ZipPackager(zip_path, str(source_dir))
+    packager.update()
+    path = source_dir / "04.in"
+    os.utime(path, ns=(0, 0))
+    assert not packager.update().changed
+
+
+def test_external_modification_triggers_rebuild(tmp_path, source_dir):
+    zip_path = str(tmp_path / "cases.zip")
+    packager = ZipPackager(zip_path, str(source_dir))
+    packager.update()
+    with zipfile.ZipFile(zip_path, "a") as zipf:
+        zipf.writestr("extra.txt", "not from the directory")
+    result = packager.update()
+    assert result.rebuilt
+    assert zip_contents(zip_path) == dir_contents(source_dir)
+
+
+def test_repeated_rewrites_are_compacted(tmp_path, source_dir):
+    zip_path = str(tmp_path / "cases.zip")
+    packager = ZipPackager(zip_path, str(source_dir), compaction_ratio=0.5)
+    packager.update()
+    rebuilt = False
+    for round_number in range(20):
+        # 交替修改两个文件，被替换的旧数据不在文件末尾，成为空洞
+        name = "01.in" if round_number % 2 else "02.in"
+        (source_dir / name).write_text(f"round {round_number}\n" * 40000)
+        rebuilt = packager.update().rebuilt or rebuilt
+        assert zip_contents(zip_path) == dir_contents(source_dir)
+    assert rebuilt
+    live = sum(len(data) for data in dir_contents(source_dir).values())
+    assert os.path.getsize(zip_path) < live + COMPACTION_MIN_BYTES + (1 << 20)
+
+
+def test_hidden_temp_files_are_not_packed(tmp_path, source_dir):
+    (source_dir / ".01.in.link").write_text("partial")
+    zip_path = str(tmp_path / "cases.zip")
+    ZipPackager(zip_path, str(source_dir)).update()
+    assert ".01.in.link" not in zip_contents(zip_path)